@@ -16,13 +16,19 @@ from core.config import settings
 
 config = context.config
 
+# Connection handed over by db/migrate.py (already tested and holding the migration lock)
+shared_connection = config.attributes.get("connection")
+
 # Determine which database to use for migrations
 # Try PostgreSQL first, fallback to SQLite
 db_url = None
 is_sqlite = False
 
+if shared_connection is not None:
+    db_url = shared_connection.engine.url.render_as_string(hide_password=False)
+    is_sqlite = shared_connection.dialect.name == "sqlite"
 # Try to use PostgreSQL if available
-if settings.DB_URL and settings.DB_URL.startswith(("postgresql", "postgres")):
+elif settings.DB_URL and settings.DB_URL.startswith(("postgresql", "postgres")):
     # Test PostgreSQL connection
     try:
         from sqlalchemy import create_engine, text
@@ -40,7 +46,7 @@ else:
     db_url = settings.sqlite_url
     is_sqlite = True
 
-config.set_main_option("sqlalchemy.url", db_url)
+config.set_main_option("sqlalchemy.url", db_url.replace("%", "%%"))
 
 # SQLite compatibility: convert ARRAY to JSON
 def render_item(type_, obj, autogen_context):
@@ -68,6 +74,16 @@ def run_migrations_offline() -> None:
         context.run_migrations()
 
 def run_migrations_online() -> None:
+    if shared_connection is not None:
+        context.configure(
+            connection=shared_connection,
+            target_metadata=target_metadata,
+            render_item=render_item if is_sqlite else None,
+        )
+        with context.begin_transaction():
+            context.run_migrations()
+        return
+
     connectable = engine_from_config(
         config.get_section(config.config_ini_section, {}),
         prefix="sqlalchemy.",
@@ -0,0 +1,34 @@
+"""add_change_journal_replays
+
+Revision ID: a3d5f7b9c1e2
+Revises: f2c4e6a8b0d1
+Create Date: 2026-10-18 20:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3d5f7b9c1e2'
+down_revision: Union[str, Sequence[str], None] = 'f2c4e6a8b0d1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Markers of SQLite journal replays committed here (see db/journal.py)"""
+    op.create_table(
+        'change_journal_replays',
+        sa.Column('replay_id', sa.String(length=36), nullable=False),
+        sa.Column('last_entry_id', sa.Integer(), nullable=False),
+        sa.Column('new_ids', sa.JSON(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('replay_id')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('change_journal_replays')
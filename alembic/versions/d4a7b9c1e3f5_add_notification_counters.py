@@ -0,0 +1,41 @@
+"""add_notification_counters
+
+Revision ID: d4a7b9c1e3f5
+Revises: c9e2f4a6b8d0
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4a7b9c1e3f5'
+down_revision: Union[str, Sequence[str], None] = 'c9e2f4a6b8d0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Per-user unread counters and the (user_id, created_at, id) feed index"""
+    op.create_table(
+        'notification_counters',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('unread', sa.Integer(), server_default='0', nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('user_id')
+    )
+    op.execute(
+        "INSERT INTO notification_counters (user_id, unread) "
+        "SELECT user_id, COUNT(*) FROM notifications WHERE is_read = false GROUP BY user_id"
+    )
+    op.create_index(
+        'ix_notifications_user_id_created_at_id', 'notifications', ['user_id', 'created_at', 'id'], unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_notifications_user_id_created_at_id', table_name='notifications')
+    op.drop_table('notification_counters')
@@ -0,0 +1,67 @@
+"""add_hot_filter_indexes
+
+Revision ID: e6b8d0f2a4c7
+Revises: d4a7b9c1e3f5
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e6b8d0f2a4c7'
+down_revision: Union[str, Sequence[str], None] = 'd4a7b9c1e3f5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# name, table, columns, partial index predicate
+INDEXES = [
+    ('ix_tasks_project_id', 'tasks', ['project_id'], None),
+    ('ix_memberships_user_id_project_id', 'memberships', ['user_id', 'project_id'], None),
+    ('ix_applications_type_target_id_status', 'applications', ['type', 'target_id', 'status'], None),
+    ('ix_applications_applicant_id', 'applications', ['applicant_id'], None),
+    ('ix_hackathon_participants_hackathon_id_user_id', 'hackathon_participants', ['hackathon_id', 'user_id'], None),
+    ('ix_projects_status_created_at', 'projects', ['status', 'created_at'], None),
+    # Unread badge/feed and mark-all-read touch only unread rows
+    ('ix_notifications_user_id_unread', 'notifications', ['user_id', 'created_at', 'id'], 'is_read = false'),
+]
+
+
+def _drop_invalid(name: str):
+    """A failed CREATE INDEX CONCURRENTLY leaves an INVALID index behind; IF NOT EXISTS would keep it"""
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return
+    invalid = bind.execute(sa.text(
+        "SELECT 1 FROM pg_class c JOIN pg_index i ON i.indexrelid = c.oid "
+        "WHERE c.relname = :name AND NOT i.indisvalid"
+    ), {'name': name}).scalar()
+    if invalid:
+        op.drop_index(name, postgresql_concurrently=True, if_exists=True)
+
+
+def upgrade() -> None:
+    """Indexes for the filters the services run on every request.
+
+    Built with CREATE INDEX CONCURRENTLY on PostgreSQL (outside the migration
+    transaction) so writes to the tables keep going; plain indexes elsewhere.
+    """
+    with op.get_context().autocommit_block():
+        for name, table, columns, where in INDEXES:
+            _drop_invalid(name)
+            op.create_index(
+                name, table, columns, unique=False, if_not_exists=True,
+                postgresql_concurrently=True,
+                postgresql_where=sa.text(where) if where else None,
+                # SQLAlchemy renders "== False" as "= 0" on SQLite, and its planner matches the text
+                sqlite_where=sa.text(where.replace('false', '0')) if where else None,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, columns, where in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,153 @@
+"""add_project_tech_tags
+
+Revision ID: f2c4e6a8b0d1
+Revises: e6b8d0f2a4c7
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2c4e6a8b0d1'
+down_revision: Union[str, Sequence[str], None] = 'e6b8d0f2a4c7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# SQLite triggers created by db.tech_tags.ensure_sqlite_tables; they read projects.tech_tags
+SQLITE_TRIGGERS = (
+    'projects_tech_tags_insert', 'projects_tech_tags_update', 'projects_tech_tags_delete',
+    'project_tech_tags_count_insert', 'project_tech_tags_count_delete',
+)
+
+
+def upgrade() -> None:
+    """Normalized tech tags (see db/tech_tags.py): GIN index for filters, trigger-kept counts."""
+    if op.get_bind().dialect.name == 'sqlite':
+        # Only the column: db.tech_tags.ensure_sqlite_tables builds the tag tables and
+        # triggers at startup and fills tech_tags for rows where it is NULL
+        op.add_column('projects', sa.Column('tech_tags', sa.JSON(), nullable=True))
+        return
+
+    op.add_column('projects', sa.Column('tech_tags', postgresql.ARRAY(sa.String()), nullable=True))
+    # Same normalization as db.tech_tags.normalize_tags: trimmed, lowercased, no blanks or repeats
+    op.execute("""
+        UPDATE projects SET tech_tags = ARRAY(
+            SELECT lower(btrim(t.tag))
+            FROM unnest(tech_stack) WITH ORDINALITY AS t(tag, n)
+            WHERE btrim(t.tag) <> ''
+            GROUP BY lower(btrim(t.tag))
+            ORDER BY min(t.n)
+        )
+    """)
+
+    # Per-tag totals for GET /projects/tech-tags, kept by a trigger like on SQLite
+    op.create_table(
+        'project_tech_tag_counts',
+        sa.Column('tag', sa.String(), nullable=False),
+        sa.Column('projects', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('tag'),
+    )
+    op.execute("""
+        INSERT INTO project_tech_tag_counts (tag, projects)
+        SELECT tag, count(*) FROM projects, unnest(tech_tags) AS tag GROUP BY tag
+    """)
+    # Statement-level with transition tables: one upsert per tag per statement,
+    # so bulk writes (journal replay) don't rewrite the same counter rows per row
+    op.execute("""
+        CREATE FUNCTION project_tech_tag_counts_insert() RETURNS trigger AS $$
+        BEGIN
+            INSERT INTO project_tech_tag_counts (tag, projects)
+            SELECT tag, count(*) FROM new_rows, unnest(new_rows.tech_tags) AS tag
+            GROUP BY tag ORDER BY tag
+            ON CONFLICT (tag) DO UPDATE SET projects = project_tech_tag_counts.projects + excluded.projects;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE FUNCTION project_tech_tag_counts_update() RETURNS trigger AS $$
+        BEGIN
+            -- Net change per tag; updates that leave tech_tags alone write nothing
+            INSERT INTO project_tech_tag_counts (tag, projects)
+            SELECT tag, sum(delta) FROM (
+                SELECT unnest(n.tech_tags) AS tag, 1 AS delta
+                FROM new_rows n JOIN old_rows o ON o.id = n.id
+                WHERE n.tech_tags IS DISTINCT FROM o.tech_tags
+                UNION ALL
+                SELECT unnest(o.tech_tags), -1
+                FROM new_rows n JOIN old_rows o ON o.id = n.id
+                WHERE n.tech_tags IS DISTINCT FROM o.tech_tags
+            ) d
+            GROUP BY tag HAVING sum(delta) <> 0 ORDER BY tag
+            ON CONFLICT (tag) DO UPDATE SET projects = project_tech_tag_counts.projects + excluded.projects;
+            IF FOUND THEN
+                DELETE FROM project_tech_tag_counts WHERE projects <= 0;
+            END IF;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE FUNCTION project_tech_tag_counts_delete() RETURNS trigger AS $$
+        BEGIN
+            UPDATE project_tech_tag_counts c SET projects = c.projects - d.n
+            FROM (
+                SELECT tag, count(*) AS n FROM old_rows, unnest(old_rows.tech_tags) AS tag GROUP BY tag
+            ) d
+            WHERE c.tag = d.tag;
+            DELETE FROM project_tech_tag_counts WHERE projects <= 0;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER projects_tech_tag_counts_insert AFTER INSERT ON projects
+        REFERENCING NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION project_tech_tag_counts_insert()
+    """)
+    op.execute("""
+        CREATE TRIGGER projects_tech_tag_counts_update AFTER UPDATE ON projects
+        REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION project_tech_tag_counts_update()
+    """)
+    op.execute("""
+        CREATE TRIGGER projects_tech_tag_counts_delete AFTER DELETE ON projects
+        REFERENCING OLD TABLE AS old_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION project_tech_tag_counts_delete()
+    """)
+
+    with op.get_context().autocommit_block():
+        invalid = op.get_bind().execute(sa.text(
+            "SELECT 1 FROM pg_class c JOIN pg_index i ON i.indexrelid = c.oid "
+            "WHERE c.relname = 'ix_projects_tech_tags' AND NOT i.indisvalid"
+        )).scalar()
+        if invalid:
+            op.drop_index('ix_projects_tech_tags', postgresql_concurrently=True, if_exists=True)
+        op.create_index(
+            'ix_projects_tech_tags', 'projects', ['tech_tags'], unique=False, if_not_exists=True,
+            postgresql_using='gin', postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == 'sqlite':
+        for name in SQLITE_TRIGGERS:
+            op.execute(f"DROP TRIGGER IF EXISTS {name}")
+        op.execute("DROP TABLE IF EXISTS project_tech_tags")
+        op.execute("DROP TABLE IF EXISTS project_tech_tag_counts")
+        op.drop_column('projects', 'tech_tags')
+        return
+
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_projects_tech_tags', table_name='projects', postgresql_concurrently=True, if_exists=True)
+    for event in ('insert', 'update', 'delete'):
+        op.execute(f"DROP TRIGGER IF EXISTS projects_tech_tag_counts_{event} ON projects")
+        op.execute(f"DROP FUNCTION IF EXISTS project_tech_tag_counts_{event}()")
+    op.drop_table('project_tech_tag_counts')
+    op.drop_column('projects', 'tech_tags')
@@ -1,11 +1,18 @@
-from fastapi import Depends, HTTPException, status
+from typing import Optional
+from fastapi import Depends, HTTPException, Query, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy import select
 from sqlalchemy.orm import Session
-from db.session import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from db.session import get_db, get_async_db
+from core.config import settings
 from core.security import decode_token
 from models.user import User
+from services.user_cache import user_cache
+from services.token_revocation import revocations
 
 security = HTTPBearer()
+optional_security = HTTPBearer(auto_error=False)
 
 
 def get_current_user(
@@ -20,8 +27,19 @@ def get_current_user(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid authentication credentials"
         )
+    if revocations.is_revoked(payload):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token has been revoked"
+        )
 
     user_id = int(payload.get("sub"))
+    if settings.USER_CACHE_ENABLED:
+        cached = user_cache.get(user_id)
+        if cached is not None:
+            # Attach without a SELECT so routes can still modify and commit it
+            return db.merge(cached, load=False)
+        version = user_cache.version
     user = db.query(User).filter(User.id == user_id).first()
 
     if not user:
@@ -30,9 +48,81 @@ def get_current_user(
             detail="User not found"
         )
 
+    if settings.USER_CACHE_ENABLED:
+        user_cache.put(user, version)
+    return user
+
+
+async def get_current_user_async(
+        credentials: HTTPAuthorizationCredentials = Depends(security),
+        db: AsyncSession = Depends(get_async_db)
+) -> User:
+    """get_current_user for `async def` routes using the AsyncSession"""
+    token = credentials.credentials
+    payload = decode_token(token)
+
+    if not payload or payload.get("type") != "access":
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid authentication credentials"
+        )
+    if revocations.is_revoked(payload):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token has been revoked"
+        )
+
+    user_id = int(payload.get("sub"))
+    if settings.USER_CACHE_ENABLED:
+        cached = user_cache.get(user_id)
+        if cached is not None:
+            return await db.merge(cached, load=False)
+        version = user_cache.version
+    user = await db.scalar(select(User).where(User.id == user_id))
+
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="User not found"
+        )
+
+    if settings.USER_CACHE_ENABLED:
+        user_cache.put(user, version)
     return user
 
 
+def _access_claims(token: str) -> dict:
+    payload = decode_token(token)
+    if not payload or payload.get("type") != "access" or revocations.is_revoked(payload):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid authentication credentials"
+        )
+    return payload
+
+
+def get_access_claims(
+        credentials: HTTPAuthorizationCredentials = Depends(security)
+) -> dict:
+    """Claims of a valid, unrevoked access token (no user lookup)"""
+    return _access_claims(credentials.credentials)
+
+
+def get_stream_claims(
+        credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security),
+        token: Optional[str] = Query(None, description="Access token, for clients that can't send headers (EventSource)")
+) -> dict:
+    """get_access_claims for long-lived responses: no database session is held"""
+    if credentials is not None:
+        return _access_claims(credentials.credentials)
+    if token:
+        return _access_claims(token)
+    raise HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Not authenticated"
+    )
+
+
 def get_admin_user(
         current_user: User = Depends(get_current_user)
 ) -> User:
@@ -56,3 +146,10 @@ def require_project_creation_permission(
             detail="You don't have permission to create projects. Only admins and mentors can create projects."
         )
     return current_user
+
+
+async def require_project_creation_permission_async(
+        current_user: User = Depends(get_current_user_async)
+) -> User:
+    """require_project_creation_permission for `async def` routes"""
+    return require_project_creation_permission(current_user)
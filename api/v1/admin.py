@@ -12,6 +12,7 @@ from schemas.application import ApplicationResponse
 from schemas.user import UserResponse, UserUpdate
 from services.project_service import ProjectService
 from services.application_service import ApplicationService
+from services.token_revocation import TokenRevocationService
 
 router = APIRouter(prefix="/admin", tags=["admin"])
 
@@ -174,6 +175,7 @@ def delete_user_admin(
         raise HTTPException(status_code=404, detail="User not found")
     
     db.delete(user)
+    TokenRevocationService.revoke_user(db, user_id, persist=False)
     db.commit()
 
 
@@ -227,3 +229,97 @@ def get_statistics(
     
     return stats
 
+
+# ==================== DATABASE ====================
+
+@router.get("/db/pool")
+def get_pool_statistics(
+        current_user: User = Depends(get_admin_user)
+):
+    """Connection pool counts and checkout wait histograms (admin only)"""
+    from db.pool_stats import snapshot_all
+    from db.session import is_using_sqlite, get_writer_stats
+
+    return {
+        "database": "sqlite" if is_using_sqlite() else "postgresql",
+        "pools": snapshot_all(),
+        "sqlite_writer": get_writer_stats()
+    }
+
+
+@router.get("/db/failover")
+def get_failover_status(
+        current_user: User = Depends(get_admin_user)
+):
+    """Circuit breaker state and failover/failback timings (admin only)"""
+    from db import failover
+    from db.session import is_using_sqlite
+
+    return {
+        "database": "sqlite" if is_using_sqlite() else "postgresql",
+        **failover.status()
+    }
+
+
+
+# ==================== CACHES ====================
+
+@router.get("/cache/users")
+def get_user_cache_statistics(
+        current_user: User = Depends(get_admin_user)
+):
+    """Authenticated-user cache hit rate and pub/sub state (admin only)"""
+    from core.pubsub import broker
+    from services.user_cache import user_cache
+
+    return {
+        "users": user_cache.stats(),
+        "pubsub": broker.stats()
+    }
+
+
+@router.get("/cache/tokens")
+def get_token_cache_statistics(
+        current_user: User = Depends(get_admin_user)
+):
+    """Verified-JWT cache hit rate (admin only)"""
+    from core.security import token_cache
+
+    return token_cache.stats()
+
+
+@router.get("/auth/revocations")
+def get_revocation_statistics(
+        current_user: User = Depends(get_admin_user)
+):
+    """In-memory token denylist size and rejections (admin only)"""
+    from services.token_revocation import revocations
+
+    return revocations.stats()
+
+
+# ==================== AUTH ====================
+
+@router.get("/auth/password-pool")
+def get_password_pool_statistics(
+        current_user: User = Depends(get_admin_user)
+):
+    """bcrypt worker pool: calibrated cost, in-flight jobs and rejections (admin only)"""
+    from core.password_pool import password_pool
+
+    return password_pool.stats()
+
+
+# ==================== WEBSOCKETS ====================
+
+@router.get("/ws")
+def get_websocket_statistics(
+        current_user: User = Depends(get_admin_user)
+):
+    """WebSocket connections held by this process and fan-out counters (admin only)"""
+    from ws.manager import manager
+
+    return {
+        "manager": manager.stats(),
+        "pubsub": manager.broker.stats()
+    }
@@ -1,8 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException, Query, BackgroundTasks
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from db.session import get_db
 from api.deps import get_current_user
+from models.application import Application
+from models.hackathon import Hackathon
 from models.user import User
 from models.project import Project
 from schemas.application import ApplicationCreate, ApplicationResponse, ApplicationUpdate
@@ -11,16 +14,8 @@ from services.application_service import ApplicationService
 router = APIRouter(prefix="/applications", tags=["applications"])
 
 
-@router.post("", response_model=ApplicationResponse, status_code=201)
-def create_application(
-        app_data: ApplicationCreate,
-        current_user: User = Depends(get_current_user),
-        db: Session = Depends(get_db)
-):
-    # All roles can create applications (advertising themselves)
-    application = ApplicationService.create(db, app_data, current_user.id)
-    
-    # Convert to response format
+def _to_response(db: Session, application: Application, hackathon_creator: bool = False) -> dict:
+    """Response dict with the applicant and the target project/hackathon"""
     result = {
         "id": application.id,
         "type": application.type,
@@ -31,8 +26,8 @@ def create_application(
         "created_at": application.created_at,
         "updated_at": application.updated_at,
     }
-    
-    # Load applicant data if available
+
+    # Applicant is eagerly loaded by the ApplicationService list queries
     if application.applicant:
         result["applicant"] = {
             "id": application.applicant.id,
@@ -42,10 +37,11 @@ def create_application(
             "skills": application.applicant.skills or [],
             "avatar_url": application.applicant.avatar_url,
         }
-    
-    # Load project/hackathon data if available
+
     if application.type == "project":
-        project = db.query(Project).filter(Project.id == application.target_id).first()
+        project = db.execute(
+            select(Project.id, Project.title, Project.created_by).where(Project.id == application.target_id)
+        ).first()
         if project:
             result["project"] = {
                 "id": project.id,
@@ -53,17 +49,50 @@ def create_application(
                 "created_by": project.created_by,
             }
     elif application.type == "hackathon":
-        from models.hackathon import Hackathon
-        hackathon = db.query(Hackathon).filter(Hackathon.id == application.target_id).first()
+        hackathon = db.execute(
+            select(Hackathon.id, Hackathon.title, Hackathon.created_by).where(Hackathon.id == application.target_id)
+        ).first()
         if hackathon:
             result["hackathon"] = {
                 "id": hackathon.id,
                 "title": hackathon.title,
             }
-    
+            if hackathon_creator:
+                result["hackathon"]["created_by"] = hackathon.created_by
+
     return result
 
 
+def _check_target_owner(db: Session, application_id: int, user_id: int):
+    """404 for an unknown application, 403 unless the user created its project/hackathon"""
+    application = db.execute(
+        select(Application.type, Application.target_id).where(Application.id == application_id)
+    ).first()
+    if not application:
+        raise HTTPException(status_code=404, detail="Application not found")
+
+    # Check authorization based on application type
+    if application.type == "project":
+        creator_id = db.scalar(select(Project.created_by).where(Project.id == application.target_id))
+        if creator_id is None or creator_id != user_id:
+            raise HTTPException(status_code=403, detail="Not authorized")
+    elif application.type == "hackathon":
+        creator_id = db.scalar(select(Hackathon.created_by).where(Hackathon.id == application.target_id))
+        if creator_id is None or creator_id != user_id:
+            raise HTTPException(status_code=403, detail="Not authorized")
+
+
+@router.post("", response_model=ApplicationResponse, status_code=201)
+def create_application(
+        app_data: ApplicationCreate,
+        current_user: User = Depends(get_current_user),
+        db: Session = Depends(get_db)
+):
+    # All roles can create applications (advertising themselves)
+    application = ApplicationService.create(db, app_data, current_user.id)
+    return _to_response(db, application)
+
+
 @router.get("", response_model=List[ApplicationResponse])
 def list_applications(
         type: Optional[str] = Query(None),
@@ -71,79 +100,30 @@ def list_applications(
         current_user: User = Depends(get_current_user),
         db: Session = Depends(get_db)
 ):
-    from models.application import Application
-    from models.user import User
-    from models.project import Project
-    from models.hackathon import Hackathon
-    
     # If user is listing their own applications
     if not type and not target_id:
         applications = ApplicationService.list_by_user(db, current_user.id)
     # If listing by project
     elif type == "project" and target_id:
-        project = db.query(Project).filter(Project.id == target_id).first()
-        if not project:
+        creator_id = db.scalar(select(Project.created_by).where(Project.id == target_id))
+        if creator_id is None:
             raise HTTPException(status_code=404, detail="Project not found")
-        if project.created_by != current_user.id:
+        if creator_id != current_user.id:
             raise HTTPException(status_code=403, detail="Not authorized")
         applications = ApplicationService.list_by_project(db, target_id)
     # If listing by hackathon
     elif type == "hackathon" and target_id:
-        hackathon = db.query(Hackathon).filter(Hackathon.id == target_id).first()
-        if not hackathon:
+        creator_id = db.scalar(select(Hackathon.created_by).where(Hackathon.id == target_id))
+        if creator_id is None:
             raise HTTPException(status_code=404, detail="Hackathon not found")
-        if hackathon.created_by != current_user.id:
+        if creator_id != current_user.id:
             raise HTTPException(status_code=403, detail="Not authorized")
         applications = ApplicationService.list_by_hackathon(db, target_id)
     else:
         raise HTTPException(status_code=400, detail="Invalid parameters")
-    
+
     # Enrich applications with related data
-    result = []
-    for app in applications:
-        app_dict = {
-            "id": app.id,
-            "type": app.type,
-            "target_id": app.target_id,
-            "applicant_id": app.applicant_id,
-            "message": app.message,
-            "status": app.status,
-            "created_at": app.created_at,
-            "updated_at": app.updated_at,
-        }
-        
-        # Load applicant data
-        if app.applicant:
-            app_dict["applicant"] = {
-                "id": app.applicant.id,
-                "name": app.applicant.name,
-                "email": app.applicant.email,
-                "role": app.applicant.role,
-                "skills": app.applicant.skills or [],
-                "avatar_url": app.applicant.avatar_url,
-            }
-        
-        # Load project/hackathon data
-        if app.type == "project":
-            project = db.query(Project).filter(Project.id == app.target_id).first()
-            if project:
-                app_dict["project"] = {
-                    "id": project.id,
-                    "title": project.title,
-                    "created_by": project.created_by,
-                }
-        elif app.type == "hackathon":
-            hackathon = db.query(Hackathon).filter(Hackathon.id == app.target_id).first()
-            if hackathon:
-                app_dict["hackathon"] = {
-                    "id": hackathon.id,
-                    "title": hackathon.title,
-                    "created_by": hackathon.created_by,
-                }
-        
-        result.append(app_dict)
-    
-    return result
+    return [_to_response(db, app, hackathon_creator=True) for app in applications]
 
 
 @router.post("/{application_id}/approve", response_model=ApplicationResponse)
@@ -153,66 +133,9 @@ def approve_application(
         current_user: User = Depends(get_current_user),
         db: Session = Depends(get_db)
 ):
-    from models.application import Application
-    application = db.query(Application).filter(Application.id == application_id).first()
-    if not application:
-        raise HTTPException(status_code=404, detail="Application not found")
-
-    # Check authorization based on application type
-    if application.type == "project":
-        project = db.query(Project).filter(Project.id == application.target_id).first()
-        if not project or project.created_by != current_user.id:
-            raise HTTPException(status_code=403, detail="Not authorized")
-    elif application.type == "hackathon":
-        from models.hackathon import Hackathon
-        hackathon = db.query(Hackathon).filter(Hackathon.id == application.target_id).first()
-        if not hackathon or hackathon.created_by != current_user.id:
-            raise HTTPException(status_code=403, detail="Not authorized")
-
+    _check_target_owner(db, application_id, current_user.id)
     application = ApplicationService.approve(db, application_id, background_tasks)
-    
-    # Convert to response format
-    result = {
-        "id": application.id,
-        "type": application.type,
-        "target_id": application.target_id,
-        "applicant_id": application.applicant_id,
-        "message": application.message,
-        "status": application.status,
-        "created_at": application.created_at,
-        "updated_at": application.updated_at,
-    }
-    
-    # Load applicant data if available
-    if application.applicant:
-        result["applicant"] = {
-            "id": application.applicant.id,
-            "name": application.applicant.name,
-            "email": application.applicant.email,
-            "role": application.applicant.role,
-            "skills": application.applicant.skills or [],
-            "avatar_url": application.applicant.avatar_url,
-        }
-    
-    # Load project/hackathon data if available
-    if application.type == "project":
-        project = db.query(Project).filter(Project.id == application.target_id).first()
-        if project:
-            result["project"] = {
-                "id": project.id,
-                "title": project.title,
-                "created_by": project.created_by,
-            }
-    elif application.type == "hackathon":
-        from models.hackathon import Hackathon
-        hackathon = db.query(Hackathon).filter(Hackathon.id == application.target_id).first()
-        if hackathon:
-            result["hackathon"] = {
-                "id": hackathon.id,
-                "title": hackathon.title,
-            }
-    
-    return result
+    return _to_response(db, application)
 
 
 @router.post("/{application_id}/reject", response_model=ApplicationResponse)
@@ -221,63 +144,6 @@ def reject_application(
         current_user: User = Depends(get_current_user),
         db: Session = Depends(get_db)
 ):
-    from models.application import Application
-    application = db.query(Application).filter(Application.id == application_id).first()
-    if not application:
-        raise HTTPException(status_code=404, detail="Application not found")
-
-    # Check authorization based on application type
-    if application.type == "project":
-        project = db.query(Project).filter(Project.id == application.target_id).first()
-        if not project or project.created_by != current_user.id:
-            raise HTTPException(status_code=403, detail="Not authorized")
-    elif application.type == "hackathon":
-        from models.hackathon import Hackathon
-        hackathon = db.query(Hackathon).filter(Hackathon.id == application.target_id).first()
-        if not hackathon or hackathon.created_by != current_user.id:
-            raise HTTPException(status_code=403, detail="Not authorized")
-
+    _check_target_owner(db, application_id, current_user.id)
     application = ApplicationService.reject(db, application_id)
-    
-    # Convert to response format
-    result = {
-        "id": application.id,
-        "type": application.type,
-        "target_id": application.target_id,
-        "applicant_id": application.applicant_id,
-        "message": application.message,
-        "status": application.status,
-        "created_at": application.created_at,
-        "updated_at": application.updated_at,
-    }
-    
-    # Load applicant data if available
-    if application.applicant:
-        result["applicant"] = {
-            "id": application.applicant.id,
-            "name": application.applicant.name,
-            "email": application.applicant.email,
-            "role": application.applicant.role,
-            "skills": application.applicant.skills or [],
-            "avatar_url": application.applicant.avatar_url,
-        }
-    
-    # Load project/hackathon data if available
-    if application.type == "project":
-        project = db.query(Project).filter(Project.id == application.target_id).first()
-        if project:
-            result["project"] = {
-                "id": project.id,
-                "title": project.title,
-                "created_by": project.created_by,
-            }
-    elif application.type == "hackathon":
-        from models.hackathon import Hackathon
-        hackathon = db.query(Hackathon).filter(Hackathon.id == application.target_id).first()
-        if hackathon:
-            result["hackathon"] = {
-                "id": hackathon.id,
-                "title": hackathon.title,
-            }
-    
-    return result
\ No newline at end of file
+    return _to_response(db, application)
@@ -1,10 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError
 from db.session import get_db
 from schemas.user import UserCreate
-from schemas.auth import LoginRequest, TokenResponse, RefreshRequest
+from schemas.auth import LoginRequest, TokenResponse, RefreshRequest, LogoutRequest
 from services.auth_service import AuthService
+from api.deps import get_access_claims
 import structlog
 
 logger = structlog.get_logger()
@@ -12,9 +14,9 @@ logger = structlog.get_logger()
 router = APIRouter(prefix="/auth", tags=["auth"])
 
 @router.post("/register", response_model=TokenResponse)
-def register(user_data: UserCreate, db: Session = Depends(get_db)):
+def register(user_data: UserCreate, request: Request, db: Session = Depends(get_db)):
     try:
-        return AuthService.register(db, user_data)
+        return AuthService.register(db, user_data, request.client.host if request.client else None)
     except HTTPException:
         # Re-raise HTTP exceptions (like email already exists)
         raise
@@ -44,9 +46,20 @@ def register(user_data: UserCreate, db: Session = Depends(get_db)):
         )
 
 @router.post("/login", response_model=TokenResponse)
-def login(login_data: LoginRequest, db: Session = Depends(get_db)):
-    return AuthService.login(db, login_data.email, login_data.password)
+def login(login_data: LoginRequest, request: Request, db: Session = Depends(get_db)):
+    return AuthService.login(
+        db, login_data.email, login_data.password, request.client.host if request.client else None
+    )
 
 @router.post("/refresh", response_model=TokenResponse)
 def refresh(refresh_data: RefreshRequest, db: Session = Depends(get_db)):
-    return AuthService.refresh(db, refresh_data.refresh_token)
\ No newline at end of file
+    return AuthService.refresh(db, refresh_data.refresh_token)
+
+@router.post("/logout", status_code=204)
+def logout(
+        logout_data: Optional[LogoutRequest] = None,
+        claims: dict = Depends(get_access_claims),
+        db: Session = Depends(get_db)
+):
+    """Revoke the current access token (and the refresh token, if sent)"""
+    AuthService.logout(db, claims, logout_data.refresh_token if logout_data else None)
@@ -1,12 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from datetime import datetime
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+from core.pubsub import NOTIFY_MAX_BYTES
 from db.session import get_db
 from api.deps import get_current_user, require_project_creation_permission
 from models.user import User
 from models.hackathon import Hackathon
+from models.hackathon_participant import HackathonParticipant
+from services.notification_service import NotificationService
 
 router = APIRouter(prefix="/hackathons", tags=["hackathons"])
 
@@ -35,6 +38,15 @@ class HackathonResponse(BaseModel):
         from_attributes = True
 
 
+# Half a NOTIFY payload: a plain-text announcement travels inline with room
+# for the recipient ids; longer frames (escaped non-ASCII) go by reference
+ANNOUNCEMENT_MAX_CHARS = NOTIFY_MAX_BYTES // 2
+
+
+class HackathonAnnouncement(BaseModel):
+    message: str = Field(..., max_length=ANNOUNCEMENT_MAX_CHARS)
+
+
 @router.post("", response_model=HackathonResponse, status_code=201)
 def create_hackathon(
         hackathon_data: HackathonCreate,
@@ -134,4 +146,41 @@ def delete_hackathon(
     raise HTTPException(
         status_code=403, 
         detail=f"Not authorized. Your role: '{current_user.role}'"
-    )
\ No newline at end of file
+    )
+
+
+@router.post("/{hackathon_id}/announce", status_code=202)
+def announce_to_participants(
+        hackathon_id: int,
+        announcement: HackathonAnnouncement,
+        background_tasks: BackgroundTasks,
+        current_user: User = Depends(get_current_user),
+        db: Session = Depends(get_db)
+):
+    """Notify every participant, live over WebSocket (admin or hackathon creator)"""
+    hackathon = db.query(Hackathon).filter(Hackathon.id == hackathon_id).first()
+    if not hackathon:
+        raise HTTPException(status_code=404, detail="Hackathon not found")
+    if hackathon.created_by != current_user.id and current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Only the hackathon creator or an admin can announce")
+
+    user_ids = db.query(HackathonParticipant.user_id).filter(
+        HackathonParticipant.hackathon_id == hackathon_id
+    ).distinct().all()
+    user_ids = [user_id for (user_id,) in user_ids]
+
+    # Stored like any notification (listed, replayed on reconnect): one
+    # INSERT for all participants and one batched WebSocket dispatch
+    NotificationService.create_many(
+        db=db,
+        user_ids=user_ids,
+        type="hackathon_announcement",
+        payload={
+            "hackathon_id": hackathon.id,
+            "hackathon_title": hackathon.title,
+            "message": announcement.message,
+            "from_user_id": current_user.id
+        },
+        background_tasks=background_tasks
+    )
+    return {"hackathon_id": hackathon.id, "recipients": len(user_ids)}
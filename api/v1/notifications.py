@@ -1,21 +1,67 @@
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, BackgroundTasks, Depends, Header, Query, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from db.session import get_db
-from api.deps import get_current_user
+from api.deps import get_current_user, get_stream_claims
+from core.config import settings
 from models.user import User
-from schemas.notification import NotificationResponse
+from schemas.notification import (
+    NotificationResponse, UnreadCountResponse, MarkReadRequest, MarkAllReadRequest, MarkReadResponse
+)
 from services.notification_service import NotificationService
+from ws.streams import sse_events, long_poll
 
 router = APIRouter(prefix="/notifications", tags=["notifications"])
 
 @router.get("", response_model=List[NotificationResponse])
 def list_notifications(
+    response: Response,
     unread_only: bool = Query(False),
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page"),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    return NotificationService.list_by_user(db, current_user.id, unread_only)
+    """Newest first, one page at a time; X-Next-Cursor is absent on the last page"""
+    notifications, next_cursor = NotificationService.list_page(
+        db, current_user.id, unread_only, limit, cursor
+    )
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return notifications
+
+@router.get("/unread-count", response_model=UnreadCountResponse)
+def unread_count(
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    return {"unread": NotificationService.unread_count(db, current_user.id)}
+
+@router.get("/stream")
+async def stream_notifications(
+    after_id: Optional[int] = Query(None, ge=0, description="Replay notifications after this id first"),
+    last_event_id: Optional[int] = Header(None, ge=0, description="Sent by EventSource when it reconnects"),
+    claims: dict = Depends(get_stream_claims)
+):
+    """Server-Sent Events: the same frames a WebSocket gets, notifications with `id:`"""
+    if last_event_id is not None:
+        after_id = last_event_id
+    return StreamingResponse(
+        sse_events(int(claims["sub"]), after_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.get("/poll")
+async def poll_notifications(
+    after_id: int = Query(..., ge=0, description="Last notification id the client has"),
+    timeout: Optional[float] = Query(None, gt=0, le=60, description="Seconds to wait (LONG_POLL_TIMEOUT_SEC)"),
+    claims: dict = Depends(get_stream_claims)
+):
+    """Long-poll: answers once there is something after `after_id`, or empty at the timeout"""
+    body = await long_poll(int(claims["sub"]), after_id, timeout or settings.LONG_POLL_TIMEOUT_SEC)
+    return Response(content=body, media_type="application/json", headers={"Cache-Control": "no-cache"})
 
 @router.patch("/{notification_id}/read", response_model=NotificationResponse)
 def mark_notification_read(
@@ -24,3 +70,29 @@ def mark_notification_read(
     db: Session = Depends(get_db)
 ):
     return NotificationService.mark_as_read(db, notification_id, current_user.id)
+
+@router.post("/read", response_model=MarkReadResponse)
+def mark_notifications_read(
+    data: MarkReadRequest,
+    background_tasks: BackgroundTasks,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Mark the given notifications read (ids of other users are ignored)"""
+    updated, unread = NotificationService.mark_read(
+        db, current_user.id, ids=data.ids, background_tasks=background_tasks
+    )
+    return {"updated": updated, "unread": unread}
+
+@router.post("/read-all", response_model=MarkReadResponse)
+def mark_all_notifications_read(
+    background_tasks: BackgroundTasks,
+    data: Optional[MarkAllReadRequest] = None,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    data = data or MarkAllReadRequest()
+    updated, unread = NotificationService.mark_read(
+        db, current_user.id, type=data.type, before_id=data.before_id, background_tasks=background_tasks
+    )
+    return {"updated": updated, "unread": unread}
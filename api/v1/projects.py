@@ -1,10 +1,11 @@
 from fastapi import APIRouter, Depends, Query, HTTPException, BackgroundTasks
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import List, Literal, Optional
 from db.session import get_db
+from db.sqlite_writer import run_write
 from api.deps import get_current_user, require_project_creation_permission
 from models.user import User
-from schemas.project import ProjectCreate, ProjectUpdate, ProjectResponse
+from schemas.project import ProjectCreate, ProjectUpdate, ProjectResponse, TechTagCount
 from schemas.membership import MembershipInviteIn
 from schemas.project_roles import RoleRequirementCreate
 from services.project_service import ProjectService
@@ -25,11 +26,22 @@ def create_project(
 def list_projects(
         status: Optional[str] = Query(None),
         tech_stack: Optional[List[str]] = Query(None),
+        tech_match: Literal["all", "any"] = Query("all", description="Projects with all of the tech_stack tags, or any of them"),
         skip: int = 0,
         limit: int = 100,
         db: Session = Depends(get_db)
 ):
-    return ProjectService.list_projects(db, status, tech_stack, skip, limit)
+    return ProjectService.list_projects(db, status, tech_stack, skip, limit, tech_match)
+
+
+@router.get("/tech-tags", response_model=List[TechTagCount])
+def list_tech_tags(
+        limit: int = Query(100, ge=1, le=1000),
+        db: Session = Depends(get_db)
+):
+    """Tech tags with the number of projects using each, most used first"""
+    rows = ProjectService.tech_tag_counts(db, limit)
+    return [TechTagCount(tag=tag, projects=projects) for tag, projects in rows]
 
 
 @router.get("/{project_id}", response_model=ProjectResponse)
@@ -120,28 +132,32 @@ def invite_user(
     if existing:
         raise HTTPException(status_code=400, detail="User is already a member")
 
-    # Create membership with status='invited'
-    membership = Membership(
-        project_id=project_id,
-        user_id=user_id,
-        role_in_team=role_in_team,
-        status="invited",
-        invited_by=current_user.id
-    )
-    db.add(membership)
-    db.commit()
-    db.refresh(membership)
-
-    # Send notification
-    NotificationService.create(
-        db=db,
-        user_id=user_id,
-        type="invite",
-        payload={"project_id": project_id, "project_title": project.title, "membership_id": membership.id},
-        background_tasks=background_tasks
-    )
-
-    return {"id": membership.id, "status": "invited"}
+    def invite(session: Session) -> int:
+        # Create membership with status='invited'
+        membership = Membership(
+            project_id=project_id,
+            user_id=user_id,
+            role_in_team=role_in_team,
+            status="invited",
+            invited_by=current_user.id
+        )
+        session.add(membership)
+        session.flush()
+
+        # Send notification - committed together with the membership
+        NotificationService.create_many(
+            db=session,
+            user_ids=[user_id],
+            type="invite",
+            payload={"project_id": project_id, "project_title": project.title, "membership_id": membership.id},
+            background_tasks=background_tasks,
+            commit=False
+        )
+        return membership.id
+
+    membership_id = run_write(db, invite)
+
+    return {"id": membership_id, "status": "invited"}
 
 
 @router.post("/{project_id}/required-roles", status_code=201)
@@ -1,9 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlalchemy.orm import Session
-from db.session import get_db
-from api.deps import get_current_user
+from sqlalchemy.ext.asyncio import AsyncSession
+from db.session import get_db, get_async_db
+from api.deps import get_current_user, get_current_user_async
 from models.user import User
 from schemas.user import UserResponse, UserUpdate
+from schemas.auth import PasswordChangeRequest, TokenResponse
+from services.auth_service import AsyncAuthService
 
 router = APIRouter(prefix="/users", tags=["users"])
 
@@ -28,6 +31,23 @@ def update_profile(
     return current_user
 
 
+@router.post("/me/password", response_model=TokenResponse)
+async def change_password(
+        password_data: PasswordChangeRequest,
+        request: Request,
+        current_user: User = Depends(get_current_user_async),
+        db: AsyncSession = Depends(get_async_db)
+):
+    """Change password; every previously issued token is revoked, a new pair is returned"""
+    return await AsyncAuthService.change_password(
+        db,
+        current_user,
+        password_data.current_password,
+        password_data.new_password,
+        request.client.host if request.client else None
+    )
+
+
 @router.get("/{user_id}", response_model=UserResponse)
 def get_user_by_id(user_id: int, db: Session = Depends(get_db)):
     user = db.query(User).filter(User.id == user_id).first()
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""Benchmark of the sync (threadpool + Session) and async (AsyncSession) paths.
+
+Serves the same project listing and task creation twice, once as sync `def`
+routes on get_db and once as `async def` routes on get_async_db, and drives
+each with N concurrent clients through an in-process ASGI transport (80%
+reads, 20% writes). Rows are written to the database; use a throwaway one.
+
+`latency_ms` (PostgreSQL only) adds a `pg_sleep` round trip to every
+request, standing in for a database that is further away or busier. That is
+where the async path can pay off: a sync request holds a threadpool worker
+(40 by default) for the whole wait, an async one only a pooled connection,
+so with a pool larger than the threadpool more requests wait in parallel.
+Without it the requests are CPU-bound and the sync path is faster.
+
+Throwaway SQLite database by default, or the database in DB_URL (migrated):
+
+    JWT_SECRET=x python bench_async.py [clients] [requests_per_client] [latency_ms]
+    JWT_SECRET=x SQLITE_SINGLE_WRITER=true python bench_async.py 500 20
+    JWT_SECRET=x DB_URL=postgresql+psycopg://... python bench_async.py 500 20
+    JWT_SECRET=x DB_URL=postgresql+psycopg://... DB_POOL_SIZE=100 python bench_async.py 200 10 50
+"""
+import asyncio
+import logging
+import os
+import sys
+import tempfile
+import time
+
+if not os.environ.get("DB_URL"):
+    os.environ.setdefault("SQLITE_DB_PATH", os.path.join(tempfile.mkdtemp(), "bench_async.db"))
+    os.environ["DB_URL"] = ""
+
+import httpx
+import structlog
+from fastapi import Depends, FastAPI
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from db import session as db_session
+from db.sqlite_writer import run_write
+from models.project import Project
+from models.user import User
+from schemas.task import TaskCreate
+from services.project_service import AsyncProjectService, ProjectService
+from services.task_service import AsyncTaskService, TaskService
+
+# Pool-wait warnings at this concurrency would cost more CPU than the requests
+structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.ERROR))
+
+app = FastAPI()
+latency_sec = 0.0
+
+
+def _latency():
+    return select(func.pg_sleep(latency_sec))
+
+
+@app.get("/sync/projects")
+def sync_projects(db: Session = Depends(db_session.get_db)):
+    if latency_sec:
+        db.execute(_latency())
+    return len(ProjectService.list_projects(db, limit=20))
+
+
+@app.post("/sync/tasks")
+def sync_create_task(task: TaskCreate, db: Session = Depends(db_session.get_db)):
+    if latency_sec:
+        db.execute(_latency())
+    return TaskService.create(db, task).id
+
+
+@app.get("/async/projects")
+async def async_projects(db: AsyncSession = Depends(db_session.get_async_db)):
+    if latency_sec:
+        await db.execute(_latency())
+    return len(await AsyncProjectService.list_projects(db, limit=20))
+
+
+@app.post("/async/tasks")
+async def async_create_task(task: TaskCreate, db: AsyncSession = Depends(db_session.get_async_db)):
+    if latency_sec:
+        await db.execute(_latency())
+    return (await AsyncTaskService.create(db, task)).id
+
+
+def _seed() -> int:
+    def seed(db: Session) -> int:
+        user = User(email=f"bench-async-{time.time_ns()}@example.com", password_hash="x", name="Bench", skills=[])
+        db.add(user)
+        db.flush()
+        projects = [
+            Project(title=f"bench {i}", description="-", created_by=user.id, status="recruiting", tech_stack=["python"])
+            for i in range(50)
+        ]
+        db.add_all(projects)
+        db.flush()
+        return projects[0].id
+
+    db = db_session.SessionLocal()
+    try:
+        return run_write(db, seed)
+    finally:
+        db.close()
+
+
+async def _run(client: httpx.AsyncClient, prefix: str, project_id: int, clients: int, per_client: int) -> dict:
+    latencies, errors = [], 0
+
+    async def one_client(n: int):
+        nonlocal errors
+        for i in range(per_client):
+            started = time.perf_counter()
+            if i % 5 == 4:
+                response = await client.post(f"{prefix}/tasks", json={"project_id": project_id, "title": f"t{n}-{i}"})
+            else:
+                response = await client.get(f"{prefix}/projects")
+            latencies.append(time.perf_counter() - started)
+            errors += response.status_code >= 400
+
+    started = time.perf_counter()
+    await asyncio.gather(*[one_client(n) for n in range(clients)])
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": len(latencies) / elapsed,
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99)] * 1000,
+    }
+
+
+async def main(clients: int, per_client: int, latency_ms: float):
+    global latency_sec
+    db_session.init_engine()
+    if latency_ms and db_session.get_engine().dialect.name != "postgresql":
+        sys.exit("latency_ms needs DB_URL to point at PostgreSQL (pg_sleep)")
+    latency_sec = latency_ms / 1000
+    project_id = _seed()
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)  # 500s count as errors
+    limits = httpx.Limits(max_connections=None)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", limits=limits, timeout=120) as client:
+        print(
+            f"{clients} clients x {per_client} requests on {db_session.get_engine().dialect.name}"
+            f" (+{latency_ms:g} ms per request)"
+        )
+        for prefix in ("/sync", "/async"):
+            await _run(client, prefix, project_id, 10, 5)  # warm up pools and caches
+            result = await _run(client, prefix, project_id, clients, per_client)
+            print(
+                f"{prefix:<7} {result['requests']:>6} requests  {result['errors']:>4} errors  "
+                f"{result['rps']:8.1f} req/s  p50 {result['p50_ms']:8.1f} ms  p99 {result['p99_ms']:8.1f} ms"
+            )
+    await db_session.shutdown_engine()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 500,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 20,
+        float(sys.argv[3]) if len(sys.argv) > 3 else 0.0,
+    ))
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""Microbenchmark of the auth dependency chain (decode_token + get_current_user).
+
+Runs against a throwaway SQLite database:
+
+    JWT_SECRET=x python bench_auth.py [iterations]
+"""
+import os
+import sys
+import tempfile
+import timeit
+
+os.environ.setdefault("SQLITE_DB_PATH", os.path.join(tempfile.mkdtemp(), "bench_auth.db"))
+os.environ["DB_URL"] = ""
+
+from fastapi.security import HTTPAuthorizationCredentials
+
+from core.config import settings
+from core.security import create_access_token, decode_token, token_cache
+from db import session as db_session
+from models.user import User
+from services.user_cache import user_cache
+from api.deps import get_current_user
+
+
+def _per_call_us(fn, iterations: int) -> float:
+    fn()  # warm up
+    return timeit.timeit(fn, number=iterations) / iterations * 1_000_000
+
+
+def main(iterations: int):
+    db_session.init_engine()
+    db = db_session.SessionLocal()
+    user = User(email="bench@example.com", password_hash="x", name="Bench", role="student", skills=[])
+    db.add(user)
+    db.commit()
+    token = create_access_token(user.id)
+    credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+
+    def current_user():
+        db.expunge_all()  # a request starts with an empty identity map
+        get_current_user(credentials, db)
+
+    results = {}
+    max_size = settings.TOKEN_CACHE_MAX_SIZE
+    settings.TOKEN_CACHE_MAX_SIZE = 0
+    results["decode_token (jose, no cache)"] = _per_call_us(lambda: decode_token(token), iterations)
+    settings.TOKEN_CACHE_MAX_SIZE = max_size
+    results["decode_token (cached)"] = _per_call_us(lambda: decode_token(token), iterations)
+
+    settings.TOKEN_CACHE_MAX_SIZE, settings.USER_CACHE_ENABLED = 0, False
+    results["get_current_user (no caches)"] = _per_call_us(current_user, iterations)
+    settings.TOKEN_CACHE_MAX_SIZE, settings.USER_CACHE_ENABLED = max_size, True
+    results["get_current_user (token + user cache)"] = _per_call_us(current_user, iterations)
+
+    db.close()
+    width = max(len(name) for name in results)
+    for name, us in results.items():
+        print(f"{name:<{width}}  {us:9.1f} us/call")
+    print(f"token cache: {token_cache.stats()}")
+    print(f"user cache:  {user_cache.stats()}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5000)
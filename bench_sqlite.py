@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""Benchmark of the SQLite fallback under a mixed read/write load.
+
+Runs the whole app (lifespan included) on a throwaway SQLite file and drives
+it with N threads through the TestClient: a third each of PATCH /users/me
+(read, then write), POST /tasks and GET /projects. Failed requests are
+counted; under write contention those are "database is locked" errors.
+
+    JWT_SECRET=x python bench_sqlite.py [clients] [requests_per_client]
+    JWT_SECRET=x SQLITE_SINGLE_WRITER=true python bench_sqlite.py 40 25
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+
+os.environ.setdefault("SQLITE_DB_PATH", os.path.join(tempfile.mkdtemp(), "bench_sqlite.db"))
+os.environ["DB_URL"] = ""
+os.environ["DATABASE_URL"] = ""
+
+
+def main(clients: int, per_client: int):
+    import logging
+
+    import structlog
+    from fastapi.testclient import TestClient
+
+    import main as app_module
+
+    # Per-request logging would cost more than the requests
+    structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.CRITICAL))
+
+    with TestClient(app_module.app) as client:
+        response = client.post("/api/v1/auth/register", json={
+            "email": f"bench-{time.time_ns()}@example.com", "password": "password1", "name": "Bench", "role": "mentor"
+        })
+        headers = {"Authorization": "Bearer " + response.json()["access_token"]}
+        user_id = client.get("/api/v1/users/me", headers=headers).json()["id"]
+        project_id = client.post("/api/v1/projects", headers=headers, json={
+            "title": "Bench project", "description": "-", "tech_stack": ["python"]
+        }).json()["id"]
+
+        latencies, errors = [], {}
+        lock = threading.Lock()
+
+        def one_client(n: int):
+            for i in range(per_client):
+                started = time.perf_counter()
+                if i % 3 == 0:
+                    response = client.patch("/api/v1/users/me", headers=headers, json={"bio": f"{n}-{i}"})
+                elif i % 3 == 1:
+                    response = client.post("/api/v1/tasks", headers=headers, json={
+                        "project_id": project_id, "title": f"t{n}-{i}", "assignee_id": user_id
+                    })
+                else:
+                    response = client.get("/api/v1/projects")
+                elapsed = time.perf_counter() - started
+                with lock:
+                    latencies.append(elapsed)
+                    if response.status_code >= 400:
+                        errors[response.status_code] = errors.get(response.status_code, 0) + 1
+
+        threads = [threading.Thread(target=one_client, args=(n,)) for n in range(clients)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    print(f"{clients} clients x {per_client} requests, single writer: {os.environ.get('SQLITE_SINGLE_WRITER', 'false')}")
+    print(
+        f"{len(latencies)} requests  errors {sum(errors.values())} {errors or ''}  {len(latencies) / elapsed:.1f} req/s  "
+        f"p50 {latencies[len(latencies) // 2] * 1000:.1f} ms  p99 {latencies[int(len(latencies) * 0.99)] * 1000:.1f} ms"
+    )
+
+
+if __name__ == "__main__":
+    # Guarded: the bcrypt process pool re-imports this module in its workers
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 40,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 25,
+    )
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""Benchmark of tech-tag project filtering and per-tag counts.
+
+Seeds N projects with a skewed tag popularity inside a transaction, times
+ProjectService.list_projects / tech_tag_counts and rolls everything back.
+Throwaway SQLite database by default, or the database in DB_URL (migrated):
+
+    JWT_SECRET=x python bench_tech_tags.py [projects]
+    JWT_SECRET=x DB_URL=postgresql+psycopg://... python bench_tech_tags.py [projects]
+"""
+import os
+import random
+import sys
+import tempfile
+import timeit
+
+if not os.environ.get("DB_URL"):
+    os.environ.setdefault("SQLITE_DB_PATH", os.path.join(tempfile.mkdtemp(), "bench_tech_tags.db"))
+    os.environ["DB_URL"] = ""
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from db import session as db_session
+from db.tech_tags import normalize_tags
+from models.project import Project
+from models.user import User
+from services.project_service import ProjectService
+
+TAGS = ["Python", "React", "TypeScript", "PostgreSQL", "Docker", "Go", "Rust", "Kotlin", "Swift", "Vue"] + [
+    f"lib{i}" for i in range(90)
+]
+QUERIES = [
+    ("3 popular, all", ["python", "react", "docker"], "all"),
+    ("3 mid, all", ["lib10", "lib20", "lib30"], "all"),
+    ("popular + rare, all", ["Python", "React", "lib89"], "all"),
+    ("3 rare, any", ["lib70", "lib80", "lib89"], "any"),
+    ("3 popular, any", ["python", "react", "docker"], "any"),
+]
+
+
+def _per_call_ms(fn, iterations: int) -> float:
+    fn()  # warm up
+    return timeit.timeit(fn, number=iterations) / iterations * 1000
+
+
+def _seed(db: Session, count: int):
+    rng = random.Random(1)
+    weights = [1 / (rank + 1) for rank in range(len(TAGS))]
+    user_id = db.scalar(insert(User).returning(User.id).values(
+        email="bench-tags@example.com", password_hash="x", name="Bench", skills=[]
+    ))
+    for start in range(0, count, 10_000):
+        rows = []
+        for _ in range(start, min(start + 10_000, count)):
+            stack = rng.choices(TAGS, weights=weights, k=rng.randint(2, 6))
+            rows.append({"title": "bench", "description": "-", "created_by": user_id, "status": "recruiting",
+                         "tech_stack": stack, "tech_tags": normalize_tags(stack)})
+        # RETURNING makes this multi-row INSERTs (like journal replay), not one statement per row
+        db.execute(insert(Project).returning(Project.id), rows)
+
+
+def main(count: int):
+    db_session.init_engine()
+    with db_session.get_engine().connect() as connection:
+        transaction = connection.begin()
+        db = Session(bind=connection, join_transaction_mode="create_savepoint")
+        try:
+            _seed(db, count)
+            if connection.dialect.name == "postgresql":
+                # Move the seeded rows out of the GIN pending list, as autovacuum would
+                connection.exec_driver_sql("SELECT gin_clean_pending_list('ix_projects_tech_tags')")
+            connection.exec_driver_sql("ANALYZE")
+
+            print(f"{count} projects on {connection.dialect.name}")
+            results = {}
+            for label, tags, match in QUERIES:
+                found = len(ProjectService.list_projects(db, tech_stack=tags, tech_match=match))
+                results[f"{label} ({found} of limit 100)"] = _per_call_ms(
+                    lambda: ProjectService.list_projects(db, tech_stack=tags, tech_match=match), 20
+                )
+            results["tech_tag_counts"] = _per_call_ms(lambda: ProjectService.tech_tag_counts(db), 20)
+
+            width = max(len(name) for name in results)
+            for name, ms in results.items():
+                print(f"{name:<{width}}  {ms:8.2f} ms/call")
+        finally:
+            db.close()
+            transaction.rollback()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
@@ -7,6 +7,65 @@ class Settings(BaseSettings):
     DB_URL: str = ""
     DATABASE_URL: str = ""  # Render provides this
     SQLITE_DB_PATH: str = "teamup_backup.db"  # SQLite fallback database
+    # SQLite fallback performance profile (applied to every new connection)
+    SQLITE_JOURNAL_MODE: str = "WAL"  # readers no longer block the writer
+    SQLITE_SYNCHRONOUS: str = "NORMAL"  # safe with WAL, fsync only at checkpoints
+    SQLITE_MMAP_SIZE: int = 268435456  # 256 MB memory-mapped reads
+    SQLITE_CACHE_SIZE_KB: int = 16384  # page cache per connection
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000  # wait for the write lock instead of failing with "database is locked"
+    SQLITE_TEMP_STORE: str = "MEMORY"
+    SQLITE_POOL_SIZE: int = 10
+    SQLITE_MAX_OVERFLOW: int = 20
+    SQLITE_SINGLE_WRITER: bool = False  # funnel sync-session writes through one writer thread
+    SQLITE_WRITER_QUEUE_SIZE: int = 256
+    SQLITE_WRITER_BATCH_SIZE: int = 32  # jobs committed together (group commit)
+    SQLITE_WRITER_SUBMIT_TIMEOUT_SEC: float = 2.0  # full queue -> 503 after this wait
+    SQLITE_WRITER_JOB_TIMEOUT_SEC: float = 30.0  # queued job not committed by then -> 503
+    # PostgreSQL connection pool
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0  # seconds to wait for a free connection
+    DB_POOL_RECYCLE: int = 300  # seconds before a connection is replaced
+    DB_POOL_USE_LIFO: bool = False  # LIFO keeps fewer connections warm, FIFO spreads use evenly
+    DB_POOL_SLOW_CHECKOUT_MS: float = 100.0  # checkout waits above this are logged
+    DB_POOL_PREFILL: int = 5  # connections opened at startup (capped at pool size)
+    # Read replicas (comma-separated URLs); GET requests read from them
+    DB_REPLICA_URLS: str = ""
+    DB_READ_YOUR_WRITES_SEC: float = 5.0  # reads stay on the primary this long after a write (> replica lag)
+    DB_REPLICA_RETRY_SEC: float = 30.0  # a failed replica is skipped for this long
+    # Background PostgreSQL prober used while running on the SQLite fallback
+    DB_PROBE_BASE_DELAY_SEC: float = 1.0
+    DB_PROBE_MAX_DELAY_SEC: float = 60.0
+    DB_PROBE_CONNECT_TIMEOUT_SEC: int = 3
+    DB_MIGRATION_LOCK_TIMEOUT_SEC: int = 600  # how long a booting instance waits for another one's migration
+    DB_FAILBACK_DRAIN_TIMEOUT_SEC: float = 30.0  # after failback, keep replaying while SQLite sessions finish
+    DB_JOURNAL_REPLAY_BATCH_SIZE: int = 500  # rows per multi-row INSERT/UPDATE/DELETE when replaying the fallback journal
+    # Cross-worker pub/sub: "auto" (postgres when DB_URL is PostgreSQL), "postgres" or "memory"
+    PUBSUB_BACKEND: str = "auto"
+    # WebSocket delivery: per-connection outbound queue drained by a writer task
+    WS_SEND_QUEUE_SIZE: int = 100  # frames buffered per connection
+    WS_SLOW_CONSUMER_POLICY: str = "drop_oldest"  # drop_oldest, drop_newest or disconnect when the queue is full
+    WS_SEND_TIMEOUT_SEC: float = 5.0  # a send that takes longer closes the connection
+    WS_PING_INTERVAL_SEC: float = 25.0  # server ping after this much client silence; 0 disables heartbeats
+    WS_PING_TIMEOUT_SEC: float = 20.0  # close if still silent this long after the ping
+    WS_REPLAY_LIMIT: int = 500  # max missed notifications replayed on reconnect (last_seen_id)
+    SSE_HEARTBEAT_SEC: float = 15.0  # comment line on an idle SSE stream (keeps proxies from closing it)
+    LONG_POLL_TIMEOUT_SEC: float = 25.0  # default wait of GET /notifications/poll (max 60)
+    # Authenticated-user cache (per process, invalidated across workers via pub/sub)
+    USER_CACHE_ENABLED: bool = True
+    USER_CACHE_MAX_SIZE: int = 10000
+    USER_CACHE_TTL_SEC: float = 60.0  # upper bound on staleness if an invalidation is missed
+    # Password hashing process pool (bcrypt off the event loop)
+    PASSWORD_POOL_WORKERS: int = 0  # 0 = min(CPU count, 4)
+    PASSWORD_POOL_MAX_PENDING: int = 32  # running + queued hash/verify jobs before 503
+    PASSWORD_MAX_CONCURRENT_PER_EMAIL: int = 2  # before 429
+    PASSWORD_MAX_CONCURRENT_PER_IP: int = 8  # before 429
+    PASSWORD_HASH_TARGET_MS: int = 250  # startup calibration target for one hash
+    PASSWORD_BCRYPT_ROUNDS: int = 0  # 0 = calibrate at startup; set to pin the cost
+    PASSWORD_BCRYPT_MIN_ROUNDS: int = 10
+    PASSWORD_BCRYPT_MAX_ROUNDS: int = 14
+    TOKEN_CACHE_MAX_SIZE: int = 10000  # verified JWTs cached until exp; 0 disables
+    TOKEN_REVOCATION_RESYNC_SEC: float = 60.0  # re-read token_revocations this often (missed broadcasts); 0 disables
     JWT_SECRET: str
     JWT_ALG: str = "HS256"
     ACCESS_TTL_MIN: int = 30
@@ -29,6 +88,19 @@ class Settings(BaseSettings):
         """Get SQLite database URL"""
         return f"sqlite:///{self.SQLITE_DB_PATH}"
 
+    @property
+    def replica_urls_list(self) -> List[str]:
+        urls = [url.strip() for url in self.DB_REPLICA_URLS.split(",") if url.strip()]
+        return [
+            url.replace("postgresql://", "postgresql+psycopg://", 1) if url.startswith("postgresql://") else url
+            for url in urls
+        ]
+
+    @property
+    def sqlite_readonly_url(self) -> str:
+        """SQLite URL opening the same file read-only (single-writer mode readers)"""
+        return f"sqlite:///file:{self.SQLITE_DB_PATH}?mode=ro&uri=true"
+
     @property
     def cors_origins_list(self) -> List[str]:
         origins = [origin.strip() for origin in self.CORS_ORIGINS.split(",") if origin.strip()]
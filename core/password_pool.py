@@ -0,0 +1,198 @@
+"""Password hashing off the event loop, in a dedicated process pool.
+
+bcrypt is deliberately slow CPU work. Running it inline blocks the event
+loop (async routes) or a threadpool worker, so a login burst stalls every
+other endpoint. Here it runs in a small ProcessPoolExecutor with admission
+control in front of it:
+
+* at most PASSWORD_POOL_MAX_PENDING hash/verify jobs running or queued;
+  beyond that requests fail fast with 503 + Retry-After
+* at most PASSWORD_MAX_CONCURRENT_PER_EMAIL / _PER_IP jobs per account and
+  per client address; beyond that 429
+
+The bcrypt cost is calibrated once at startup so a hash takes about
+PASSWORD_HASH_TARGET_MS on this host, clamped to the configured min/max
+rounds (or pinned with PASSWORD_BCRYPT_ROUNDS). Verification always uses
+the cost stored in the hash, so hashes made with another cost keep working.
+
+Admission counters are only touched from the event loop thread; sync
+routes reach the pool through ``hash_from_thread``/``verify_from_thread``.
+"""
+import asyncio
+import multiprocessing
+import os
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+import anyio.from_thread
+from fastapi import HTTPException, status
+from passlib.hash import bcrypt_sha256
+from starlette.concurrency import run_in_threadpool
+import structlog
+
+from core.config import settings
+
+logger = structlog.get_logger()
+
+CALIBRATION_ROUNDS = 10
+
+
+# Executed in the worker processes (must stay importable module-level functions)
+
+def _hash(password: str, rounds: int) -> str:
+    return bcrypt_sha256.using(rounds=rounds).hash(password)
+
+
+def _verify(plain: str, hashed: str) -> bool:
+    return bcrypt_sha256.verify(plain, hashed)
+
+
+def _time_hash(rounds: int) -> float:
+    started = time.perf_counter()
+    _hash("calibration-password", rounds)
+    return (time.perf_counter() - started) * 1000
+
+
+def _noop() -> int:
+    return os.getpid()
+
+
+class PasswordPool:
+    def __init__(self):
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self.workers = 0
+        self.rounds = settings.PASSWORD_BCRYPT_ROUNDS or 12  # passlib's default until calibrated
+        self.calibration_ms: Optional[float] = None
+        self.in_flight = 0
+        self._per_email: Counter = Counter()
+        self._per_ip: Counter = Counter()
+        self.completed = 0
+        self.rejected_saturated = 0
+        self.rejected_per_email = 0
+        self.rejected_per_ip = 0
+
+    @property
+    def started(self) -> bool:
+        return self._executor is not None
+
+    async def start(self):
+        """Spawn the workers and calibrate the bcrypt cost"""
+        if self._executor is not None:
+            return
+        self.workers = settings.PASSWORD_POOL_WORKERS or min(os.cpu_count() or 1, 4)
+        # spawn: forking a process that already runs threads (DB prober,
+        # pub/sub listener, SQLite writer) is unsafe
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+        )
+        loop = asyncio.get_running_loop()
+        # Start every worker now instead of on the first logins
+        await asyncio.gather(*(loop.run_in_executor(self._executor, _noop) for _ in range(self.workers)))
+
+        if settings.PASSWORD_BCRYPT_ROUNDS:
+            self.rounds = settings.PASSWORD_BCRYPT_ROUNDS
+        else:
+            # Each extra round doubles the cost: measure once, extrapolate
+            self.calibration_ms = await loop.run_in_executor(self._executor, _time_hash, CALIBRATION_ROUNDS)
+            rounds = CALIBRATION_ROUNDS
+            while self.calibration_ms * 2 ** (rounds + 1 - CALIBRATION_ROUNDS) <= settings.PASSWORD_HASH_TARGET_MS:
+                rounds += 1
+            self.rounds = max(settings.PASSWORD_BCRYPT_MIN_ROUNDS, min(rounds, settings.PASSWORD_BCRYPT_MAX_ROUNDS))
+        logger.info(
+            "password_pool_started",
+            workers=self.workers,
+            rounds=self.rounds,
+            calibration_ms=self.calibration_ms
+        )
+
+    def stop(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    def _acquire(self, email: Optional[str], client_ip: Optional[str]):
+        if self.in_flight >= settings.PASSWORD_POOL_MAX_PENDING:
+            self.rejected_saturated += 1
+            logger.warning("password_pool_saturated", in_flight=self.in_flight)
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many sign-in attempts right now, please retry shortly",
+                headers={"Retry-After": "1"}
+            )
+        if email and self._per_email[email] >= settings.PASSWORD_MAX_CONCURRENT_PER_EMAIL:
+            self.rejected_per_email += 1
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many concurrent attempts for this account",
+                headers={"Retry-After": "1"}
+            )
+        if client_ip and self._per_ip[client_ip] >= settings.PASSWORD_MAX_CONCURRENT_PER_IP:
+            self.rejected_per_ip += 1
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many concurrent attempts from this address",
+                headers={"Retry-After": "1"}
+            )
+        self.in_flight += 1
+        if email:
+            self._per_email[email] += 1
+        if client_ip:
+            self._per_ip[client_ip] += 1
+
+    def _release(self, email: Optional[str], client_ip: Optional[str]):
+        self.in_flight -= 1
+        self.completed += 1
+        for counter, key in ((self._per_email, email), (self._per_ip, client_ip)):
+            if key:
+                counter[key] -= 1
+                if counter[key] <= 0:
+                    del counter[key]
+
+    async def _run(self, email: Optional[str], client_ip: Optional[str], fn, *args):
+        email = email.lower() if email else None
+        self._acquire(email, client_ip)
+        try:
+            if self._executor is None:
+                # Lifespan not started (scripts): still keep it off the event loop
+                future = asyncio.ensure_future(run_in_threadpool(fn, *args))
+            else:
+                future = asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+        except BaseException:
+            self._release(email, client_ip)
+            raise
+        # Free the slot when the job ends, not when the request does: a client
+        # that disconnects mid-hash still occupies a worker until it finishes
+        future.add_done_callback(lambda _: self._release(email, client_ip))
+        return await asyncio.shield(future)
+
+    async def hash(self, password: str, email: Optional[str] = None, client_ip: Optional[str] = None) -> str:
+        return await self._run(email, client_ip, _hash, password, self.rounds)
+
+    async def verify(self, plain: str, hashed: str, email: Optional[str] = None, client_ip: Optional[str] = None) -> bool:
+        return await self._run(email, client_ip, _verify, plain, hashed)
+
+    def hash_from_thread(self, password: str, email: Optional[str] = None, client_ip: Optional[str] = None) -> str:
+        """``hash`` for sync routes: runs it on the event loop from a threadpool worker"""
+        return anyio.from_thread.run(self.hash, password, email, client_ip)
+
+    def verify_from_thread(self, plain: str, hashed: str, email: Optional[str] = None, client_ip: Optional[str] = None) -> bool:
+        return anyio.from_thread.run(self.verify, plain, hashed, email, client_ip)
+
+    def stats(self) -> dict:
+        return {
+            "started": self.started,
+            "workers": self.workers,
+            "bcrypt_rounds": self.rounds,
+            "calibration_ms": self.calibration_ms,
+            "in_flight": self.in_flight,
+            "max_in_flight": settings.PASSWORD_POOL_MAX_PENDING,
+            "completed": self.completed,
+            "rejected_saturated": self.rejected_saturated,
+            "rejected_per_email": self.rejected_per_email,
+            "rejected_per_ip": self.rejected_per_ip,
+        }
+
+
+password_pool = PasswordPool()
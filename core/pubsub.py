@@ -0,0 +1,234 @@
+"""Cross-worker pub/sub for cache invalidation and similar broadcasts.
+
+Backends:
+* ``postgres``: LISTEN/NOTIFY on the primary database. A daemon thread holds
+  one autocommit connection that LISTENs on every subscribed channel and
+  reconnects with backoff; a second thread drains a bounded outbox with
+  ``pg_notify`` so publishing never blocks a request. Payloads are JSON
+  and must stay under PostgreSQL's 8000 byte NOTIFY limit.
+* ``memory``: in-process only (single worker, SQLite-only setups, scripts).
+
+Callbacks run on the listener thread (memory backend: on the publisher's
+thread) and must be quick; async consumers hand off with
+``loop.call_soon_threadsafe``. Messages published by this process are
+delivered locally right away and skipped when they come back over NOTIFY.
+
+NOTIFY is fire-and-forget: whatever was published while the listener was
+disconnected is lost. Subscribers that keep state register an
+``on_reconnect`` hook to reload it once LISTEN is back.
+"""
+import json
+import queue
+import threading
+import uuid
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy.engine import make_url
+import structlog
+
+from core.config import settings
+
+logger = structlog.get_logger()
+
+Callback = Callable[[dict], None]
+
+NOTIFY_MAX_BYTES = 7999  # PostgreSQL rejects larger NOTIFY payloads
+
+
+class MemoryBroker:
+    name = "memory"
+
+    def __init__(self):
+        self.origin = uuid.uuid4().hex
+        self._subscribers: Dict[str, List[Callback]] = defaultdict(list)
+        self._reconnect_hooks: List[Callable[[], None]] = []
+        self.published = 0
+        self.received = 0
+
+    def subscribe(self, channel: str, callback: Callback):
+        self._subscribers[channel].append(callback)
+
+    def on_reconnect(self, hook: Callable[[], None]):
+        """Run ``hook`` after the listener reconnects (never for the memory backend)"""
+        self._reconnect_hooks.append(hook)
+
+    def publish(self, channel: str, message: dict):
+        self.published += 1
+        self._deliver(channel, message)
+
+    def _deliver(self, channel: str, message: dict):
+        for callback in list(self._subscribers.get(channel, ())):
+            try:
+                callback(message)
+            except Exception as e:
+                logger.error("pubsub_callback_failed", channel=channel, error=str(e))
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+    def stats(self) -> dict:
+        return {
+            "backend": self.name,
+            "channels": sorted(self._subscribers),
+            "published": self.published,
+            "received": self.received,
+        }
+
+
+class PostgresBroker(MemoryBroker):
+    name = "postgres"
+
+    def __init__(self, db_url: str):
+        super().__init__()
+        self._dsn = make_url(db_url).set(drivername="postgresql").render_as_string(hide_password=False)
+        self._publish_conn = None
+        self._outbox: "queue.Queue[Optional[tuple]]" = queue.Queue(maxsize=10000)
+        self._thread: Optional[threading.Thread] = None
+        self._publisher: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._new_channels: set = set()
+        self.connected = False
+        self.reconnects = 0
+        self.publish_failures = 0
+        self.dropped = 0
+
+    def subscribe(self, channel: str, callback: Callback):
+        if channel not in self._subscribers:
+            self._new_channels.add(channel)  # the listener thread LISTENs within a second
+        super().subscribe(channel, callback)
+
+    def publish(self, channel: str, message: dict):
+        self.published += 1
+        self._deliver(channel, message)
+        if not self.connected:
+            return  # PostgreSQL unreachable: other workers rely on their TTLs
+        payload = json.dumps({"origin": self.origin, "message": message}, separators=(",", ":"), default=str)
+        if len(payload.encode()) > NOTIFY_MAX_BYTES:
+            self.dropped += 1
+            logger.warning("pubsub_payload_too_large", channel=channel, bytes=len(payload.encode()))
+            return
+        try:
+            self._outbox.put_nowait((channel, payload))
+        except queue.Full:
+            self.dropped += 1
+
+    def _run_publisher(self):
+        while True:
+            item = self._outbox.get()
+            if item is None:
+                break
+            channel, payload = item
+            try:
+                if self._publish_conn is None or self._publish_conn.closed:
+                    self._publish_conn = self._connect()
+                self._publish_conn.execute("SELECT pg_notify(%s, %s)", (channel, payload))
+            except Exception as e:
+                self.publish_failures += 1
+                self._close_publish_conn()
+                logger.warning("pubsub_publish_failed", channel=channel, error=str(e))
+        self._close_publish_conn()
+
+    def _connect(self):
+        import psycopg
+        return psycopg.connect(
+            self._dsn, autocommit=True, connect_timeout=settings.DB_PROBE_CONNECT_TIMEOUT_SEC
+        )
+
+    def _close_publish_conn(self):
+        if self._publish_conn is not None:
+            try:
+                self._publish_conn.close()
+            except Exception:
+                pass
+            self._publish_conn = None
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="pubsub-listener", daemon=True)
+        self._thread.start()
+        self._publisher = threading.Thread(target=self._run_publisher, name="pubsub-publisher", daemon=True)
+        self._publisher.start()
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        if self._publisher is not None:
+            self._outbox.put(None)
+            self._publisher.join(timeout)
+            self._publisher = None
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        delay = settings.DB_PROBE_BASE_DELAY_SEC
+        listened = False
+        while not self._stop.is_set():
+            try:
+                with self._connect() as conn:
+                    self._new_channels.clear()
+                    for channel in list(self._subscribers):
+                        conn.execute(f'LISTEN "{channel}"')
+                    self.connected = True
+                    delay = settings.DB_PROBE_BASE_DELAY_SEC
+                    logger.info("pubsub_listening", channels=sorted(self._subscribers))
+                    if listened:
+                        # After LISTEN: anything published from here on is queued on conn
+                        self.reconnects += 1
+                        self._run_reconnect_hooks()
+                    listened = True
+                    while not self._stop.is_set():
+                        while self._new_channels:
+                            conn.execute(f'LISTEN "{self._new_channels.pop()}"')
+                        for notify in conn.notifies(timeout=1.0):
+                            self._on_notify(notify.channel, notify.payload)
+            except Exception as e:
+                logger.warning("pubsub_listener_disconnected", error=str(e), retry_in_sec=delay)
+            self.connected = False
+            self._stop.wait(delay)
+            delay = min(delay * 2, settings.DB_PROBE_MAX_DELAY_SEC)
+
+    def _run_reconnect_hooks(self):
+        for hook in list(self._reconnect_hooks):
+            try:
+                hook()
+            except Exception as e:
+                logger.error("pubsub_reconnect_hook_failed", hook=getattr(hook, "__name__", repr(hook)), error=str(e))
+
+    def _on_notify(self, channel: str, payload: str):
+        try:
+            envelope = json.loads(payload)
+        except ValueError:
+            return
+        if envelope.get("origin") == self.origin:
+            return  # already delivered locally by publish()
+        self.received += 1
+        self._deliver(channel, envelope.get("message") or {})
+
+    def stats(self) -> dict:
+        return {
+            **super().stats(),
+            "connected": self.connected,
+            "reconnects": self.reconnects,
+            "outbox": self._outbox.qsize(),
+            "dropped": self.dropped,
+            "publish_failures": self.publish_failures,
+        }
+
+
+def _create_broker():
+    backend = settings.PUBSUB_BACKEND
+    if backend == "auto":
+        postgres = settings.DB_URL and settings.DB_URL.startswith(("postgresql", "postgres"))
+        backend = "postgres" if postgres else "memory"
+    if backend == "postgres":
+        return PostgresBroker(settings.DB_URL)
+    return MemoryBroker()
+
+
+broker = _create_broker()
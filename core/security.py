@@ -1,3 +1,8 @@
+import hashlib
+import threading
+import time
+import uuid
+from collections import OrderedDict
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
@@ -17,7 +22,9 @@ def verify_password(plain: str, hashed: str) -> bool:
 def create_token(data: dict, expires_delta: timedelta) -> str:
     to_encode = data.copy()
     expire = datetime.utcnow() + expires_delta
-    to_encode.update({"exp": expire})
+    # jti identifies the token for revocation; iat (ms precision) lets a
+    # password change revoke every token issued before it
+    to_encode.update({"exp": expire, "iat": round(time.time(), 3), "jti": uuid.uuid4().hex})
     return jwt.encode(to_encode, settings.JWT_SECRET, algorithm=settings.JWT_ALG)
 
 def create_access_token(user_id: int) -> str:
@@ -32,8 +39,85 @@ def create_refresh_token(user_id: int) -> str:
         timedelta(days=settings.REFRESH_TTL_DAYS)
     )
 
+class TokenCache:
+    """Verified JWT claims keyed by the token's SHA-256, kept until ``exp``.
+
+    Clients reuse an access token for ACCESS_TTL_MIN minutes, so after the
+    first request the signature check and claim parsing are a dict lookup.
+    Only successfully verified tokens are stored; failures are never cached.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries: "OrderedDict[bytes, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: bytes) -> Optional[dict]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry[0] <= time.time():
+                del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return dict(entry[1])
+
+    def put(self, key: bytes, claims: dict):
+        exp = claims.get("exp")
+        if not isinstance(exp, (int, float)):
+            return
+        with self._lock:
+            self._entries[key] = (exp, dict(claims))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def discard(self, token: str):
+        with self._lock:
+            self._entries.pop(token_digest(token), None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            "evictions": self.evictions,
+        }
+
+token_cache = TokenCache(settings.TOKEN_CACHE_MAX_SIZE)
+
+def token_digest(token: str) -> bytes:
+    return hashlib.sha256(token.encode()).digest()
+
 def decode_token(token: str) -> Optional[dict]:
+    if settings.TOKEN_CACHE_MAX_SIZE <= 0:
+        try:
+            return jwt.decode(token, settings.JWT_SECRET, algorithms=[settings.JWT_ALG])
+        except JWTError:
+            return None
+
+    key = token_digest(token)
+    claims = token_cache.get(key)
+    if claims is not None:
+        return claims
     try:
-        return jwt.decode(token, settings.JWT_SECRET, algorithms=[settings.JWT_ALG])
+        claims = jwt.decode(token, settings.JWT_SECRET, algorithms=[settings.JWT_ALG])
     except JWTError:
-        return None
\ No newline at end of file
+        return None
+    token_cache.put(key, claims)
+    return claims
\ No newline at end of file
@@ -1,30 +1,121 @@
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy import types as sa_types
-from sqlalchemy.dialects.postgresql import ARRAY as PG_ARRAY
-from sqlalchemy.dialects import sqlite
+from sqlalchemy import types as sa_types, String, and_, bindparam, cast, false, or_, true
+from sqlalchemy.dialects.postgresql import ARRAY as PG_ARRAY, JSONB as PG_JSONB
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ColumnElement, Grouping
+from sqlalchemy.sql.visitors import InternalTraversal
+import json
 
 Base = declarative_base()
 
-def get_array_type():
+
+class StringArray(sa_types.TypeDecorator):
+    """List of strings: native ARRAY on PostgreSQL, JSON everywhere else.
+
+    The concrete type is picked from the dialect at bind/compile time, so
+    declaring a column with it never needs a live database connection.
+    """
+    impl = sa_types.JSON
+    cache_ok = True
+
+    def __init__(self, length=None):
+        super().__init__()
+        self.length = length
+
+    def load_dialect_impl(self, dialect):
+        if dialect.name == "postgresql":
+            return dialect.type_descriptor(PG_ARRAY(String(self.length)))
+        return dialect.type_descriptor(sa_types.JSON())
+
+    class comparator_factory(sa_types.TypeDecorator.Comparator):
+        def contains(self, other, **kwargs):
+            """Column holds every element of ``other``"""
+            return ArrayContains(self.expr, list(other))
+
+        def overlap(self, other):
+            """Column holds at least one element of ``other``"""
+            return ArrayOverlap(self.expr, list(other))
+
+
+class JSONDocument(sa_types.TypeDecorator):
+    """JSON document: JSONB on PostgreSQL, JSON everywhere else"""
+    impl = sa_types.JSON
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect):
+        if dialect.name == "postgresql":
+            return dialect.type_descriptor(PG_JSONB())
+        return dialect.type_descriptor(sa_types.JSON())
+
+
+class ArrayContains(ColumnElement):
+    """``column @> ARRAY[...]`` on PostgreSQL, JSON text match elsewhere"""
+    type = sa_types.Boolean()
+    inherit_cache = True
+    _traverse_internals = [
+        ("column", InternalTraversal.dp_clauseelement),
+        ("array_value", InternalTraversal.dp_clauseelement),
+        ("patterns", InternalTraversal.dp_clauseelement_list),
+    ]
+
+    def __init__(self, column, values):
+        self.column = column
+        self.array_value = bindparam(None, values, type_=PG_ARRAY(String))
+        # json.dumps mirrors how the JSON column serializes each element
+        self.patterns = [
+            bindparam(None, "%" + _escape_like(json.dumps(v)) + "%", type_=String)
+            for v in values
+        ]
+
+    def self_group(self, against=None):
+        return Grouping(self)
+
+
+class ArrayOverlap(ArrayContains):
+    """``column && ARRAY[...]`` on PostgreSQL, JSON text match elsewhere"""
+    inherit_cache = True
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("/", "//").replace("%", "/%").replace("_", "/_")
+
+
+@compiles(ArrayContains, "postgresql")
+def _compile_array_contains_pg(element, compiler, **kw):
+    return "%s @> %s" % (
+        compiler.process(element.column, **kw),
+        compiler.process(element.array_value, **kw),
+    )
+
+
+@compiles(ArrayContains)
+def _compile_array_contains_default(element, compiler, **kw):
+    if not element.patterns:
+        return compiler.process(true(), **kw)
+    text_value = cast(element.column, String)
+    return compiler.process(
+        and_(*[text_value.like(p, escape="/") for p in element.patterns]), **kw
+    )
+
+
+@compiles(ArrayOverlap, "postgresql")
+def _compile_array_overlap_pg(element, compiler, **kw):
+    return "%s && %s" % (
+        compiler.process(element.column, **kw),
+        compiler.process(element.array_value, **kw),
+    )
+
+
+@compiles(ArrayOverlap)
+def _compile_array_overlap_default(element, compiler, **kw):
+    if not element.patterns:
+        return compiler.process(false(), **kw)
+    text_value = cast(element.column, String)
+    return compiler.process(
+        or_(*[text_value.like(p, escape="/") for p in element.patterns]), **kw
+    )
+
+
+def get_array_type(length=None):
     """Get ARRAY type compatible with current database"""
-    # This will be called at runtime when creating tables
-    # For now, return a type that works with both
-    # We'll handle conversion in the session initialization
-    try:
-        from core.config import settings
-        from sqlalchemy import create_engine, text, inspect
-        
-        # Check which database we're using
-        if settings.DB_URL and settings.DB_URL.startswith(("postgresql", "postgres")):
-            try:
-                engine = create_engine(settings.DB_URL, connect_args={"connect_timeout": 2})
-                with engine.connect() as conn:
-                    conn.execute(text("SELECT 1"))
-                return PG_ARRAY(sa_types.String)
-            except:
-                return sa_types.JSON()
-        else:
-            return sa_types.JSON()
-    except:
-        # Default to JSON for safety
-        return sa_types.JSON()
\ No newline at end of file
+    return StringArray(length)
@@ -0,0 +1,205 @@
+"""Background PostgreSQL health prober with a circuit breaker.
+
+While the app runs on the SQLite fallback a single daemon thread probes
+PostgreSQL with exponential backoff. Requests never probe or block on
+reconnects; the prober owns switching back (failback) via a callback.
+"""
+import threading
+import time
+from typing import Callable, Optional
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import NullPool
+import structlog
+
+from core.config import settings
+
+logger = structlog.get_logger()
+
+
+class CircuitBreaker:
+    """closed: PostgreSQL in use; open: failing, wait out backoff; half_open: one probe allowed"""
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, base_delay: float, max_delay: float):
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.state = self.CLOSED
+        self.failures = 0
+        self.next_attempt_at = 0.0
+        self._lock = threading.Lock()
+
+    def trip(self):
+        """Open the circuit right after a failover; first probe after base_delay"""
+        with self._lock:
+            self.state = self.OPEN
+            self.failures = 0
+            self.next_attempt_at = time.monotonic() + self.base_delay
+
+    def seconds_until_probe(self) -> float:
+        with self._lock:
+            return max(self.next_attempt_at - time.monotonic(), 0.0)
+
+    def try_half_open(self) -> bool:
+        with self._lock:
+            if self.state == self.OPEN and time.monotonic() >= self.next_attempt_at:
+                self.state = self.HALF_OPEN
+                return True
+            return False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            delay = min(self.base_delay * (2 ** self.failures), self.max_delay)
+            self.state = self.OPEN
+            self.next_attempt_at = time.monotonic() + delay
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self.next_attempt_at = 0.0
+
+
+class FailoverMetrics:
+    """Failover/failback counters and timings"""
+
+    def __init__(self):
+        self.failovers = 0
+        self.failbacks = 0
+        self.probes = 0
+        self.probe_failures = 0
+        self.last_failover_at: Optional[float] = None
+        self.last_failback_at: Optional[float] = None
+        self.last_failover_ms: Optional[float] = None  # error detected -> SQLite serving
+        self.last_failback_ms: Optional[float] = None  # probe succeeded -> PostgreSQL serving
+        self.last_outage_seconds: Optional[float] = None  # time spent on SQLite
+        self.last_replay: Optional[dict] = None  # journal replay counts of the last failback
+        self._outage_started: Optional[float] = None
+
+    def failover(self, started: float):
+        now = time.monotonic()
+        self.failovers += 1
+        self.last_failover_at = time.time()
+        self.last_failover_ms = round((now - started) * 1000, 1)
+        self._outage_started = now
+
+    def failback(self, started: float):
+        now = time.monotonic()
+        self.failbacks += 1
+        self.last_failback_at = time.time()
+        self.last_failback_ms = round((now - started) * 1000, 1)
+        if self._outage_started is not None:
+            self.last_outage_seconds = round(now - self._outage_started, 1)
+            self._outage_started = None
+
+    def snapshot(self) -> dict:
+        return {
+            "failovers": self.failovers,
+            "failbacks": self.failbacks,
+            "probes": self.probes,
+            "probe_failures": self.probe_failures,
+            "last_failover_at": self.last_failover_at,
+            "last_failback_at": self.last_failback_at,
+            "last_failover_ms": self.last_failover_ms,
+            "last_failback_ms": self.last_failback_ms,
+            "last_outage_seconds": self.last_outage_seconds,
+            "last_replay": self.last_replay,
+        }
+
+
+breaker = CircuitBreaker(settings.DB_PROBE_BASE_DELAY_SEC, settings.DB_PROBE_MAX_DELAY_SEC)
+metrics = FailoverMetrics()
+
+
+class PostgresProber:
+    """Single daemon thread that probes PostgreSQL until failback succeeds"""
+
+    def __init__(self):
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._probe_engine = None
+
+    def start(self, on_recovered: Callable[[], bool]):
+        """Start probing; ``on_recovered`` switches engines and returns False if that failed"""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._run, args=(on_recovered,), name="postgres-prober", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout)
+        self._dispose_probe_engine()
+
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def _probe(self) -> bool:
+        if self._probe_engine is None:
+            # NullPool: a failed probe leaves no pooled sockets behind
+            self._probe_engine = create_engine(
+                settings.DB_URL,
+                poolclass=NullPool,
+                connect_args={"connect_timeout": settings.DB_PROBE_CONNECT_TIMEOUT_SEC}
+            )
+        try:
+            with self._probe_engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+            return True
+        except Exception as e:
+            logger.debug("postgresql_probe_failed", error=str(e))
+            return False
+
+    def _dispose_probe_engine(self):
+        if self._probe_engine is not None:
+            self._probe_engine.dispose()
+            self._probe_engine = None
+
+    def _run(self, on_recovered: Callable[[], bool]):
+        logger.info("postgresql_prober_started")
+        while not self._stop.is_set():
+            if not breaker.try_half_open():
+                self._stop.wait(max(breaker.seconds_until_probe(), 0.05))
+                continue
+
+            metrics.probes += 1
+            started = time.monotonic()
+            if self._probe() and on_recovered():
+                breaker.record_success()
+                metrics.failback(started)
+                logger.info("postgresql_failback_complete", **metrics.snapshot())
+                break
+
+            metrics.probe_failures += 1
+            breaker.record_failure()
+            logger.info(
+                "postgresql_probe_unsuccessful",
+                failures=breaker.failures,
+                retry_in_sec=round(breaker.seconds_until_probe(), 1)
+            )
+
+        self._dispose_probe_engine()
+        logger.info("postgresql_prober_stopped")
+
+
+prober = PostgresProber()
+
+
+def status() -> dict:
+    return {
+        "circuit": breaker.state,
+        "consecutive_probe_failures": breaker.failures,
+        "next_probe_in_sec": round(breaker.seconds_until_probe(), 1) if breaker.state != CircuitBreaker.CLOSED else None,
+        "prober_running": prober.is_running(),
+        **metrics.snapshot(),
+    }
@@ -0,0 +1,517 @@
+"""Change journal for the SQLite fallback and its replay into PostgreSQL.
+
+While PostgreSQL is configured but the app runs on SQLite, every ORM flush
+appends (table, op, row id) entries to ``change_journal`` in the same
+transaction as the change itself. Row values are not copied: replay reads
+the final state of each row from SQLite, so a row touched many times during
+an outage is written to PostgreSQL once.
+
+Replay (on failback) works table by table in foreign-key order:
+
+* rows created during the outage are inserted in batches with multi-row
+  ``INSERT ... RETURNING id``; the new PostgreSQL ids are kept in
+  ``change_journal_ids`` and used to remap foreign keys of later rows;
+* updated rows are written with executemany, skipping rows whose
+  ``updated_at`` in PostgreSQL moved past the version the change was based on;
+* deleted rows are removed with one ``DELETE ... WHERE id IN`` per batch.
+
+A local id is only trusted to name a PostgreSQL row when it is in
+``change_journal_ids``, or - for updates and foreign keys - when the
+PostgreSQL row with that id has the same ``created_at`` as the local one.
+Ids are not shared between the two databases otherwise, so a row that was
+never replayed may well have a different (or someone else's) id there.
+
+Replay is idempotent across a crash between the two commits (PostgreSQL,
+then the SQLite trim). Each pass writes a marker to ``change_journal_replays``
+in SQLite before touching PostgreSQL, and the same marker - with the new
+ids - to PostgreSQL inside its transaction. A marker left in SQLite is
+settled first on the next pass: found in PostgreSQL means applied, so the
+trim is finished from the stored ids; missing means rolled back, so the
+entries are simply replayed again.
+
+Conflicts (unique collisions, stale updates, rows whose parent was skipped,
+rows whose PostgreSQL id is unknown, batches PostgreSQL rejects) are skipped
+and logged; the data stays in the SQLite file for manual review.
+
+Bulk ``update()``/``delete()`` statements bypass the ORM flush; code that
+runs them against the fallback must call ``record()`` itself.
+
+Derived tables are not journaled: when a replay touches notifications, the
+unread counters in ``notification_counters`` are recounted in PostgreSQL.
+"""
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import (
+    JSON, Column, DateTime, Integer, MetaData, String, Table, UniqueConstraint, bindparam,
+    delete, event, func, insert, inspect, select, tuple_, update,
+)
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+import structlog
+
+from core.config import settings
+
+logger = structlog.get_logger()
+
+# Journal tables live in the SQLite file, outside Base.metadata; only
+# change_journal_replays also exists in PostgreSQL (alembic)
+journal_metadata = MetaData()
+
+change_journal = Table(
+    "change_journal", journal_metadata,
+    Column("id", Integer, primary_key=True),
+    Column("table_name", String(64), nullable=False),
+    Column("op", String(8), nullable=False),  # insert, update, delete
+    Column("row_id", Integer, nullable=False),
+    Column("columns", JSON, nullable=True),  # changed columns of an update
+    Column("base_updated_at", DateTime(timezone=True), nullable=True),  # updated_at the change was based on
+    Column("created_at", DateTime(timezone=True), server_default=func.now()),
+)
+
+journal_ids = Table(
+    "change_journal_ids", journal_metadata,
+    Column("table_name", String(64), primary_key=True),
+    Column("local_id", Integer, primary_key=True),
+    Column("remote_id", Integer, nullable=False),
+)
+
+# A replay pass in flight (SQLite) / applied (PostgreSQL, via alembic)
+change_journal_replays = Table(
+    "change_journal_replays", journal_metadata,
+    Column("replay_id", String(36), primary_key=True),
+    Column("last_entry_id", Integer, nullable=False),  # entries up to this id belong to the pass
+    Column("new_ids", JSON, nullable=True),  # change_journal_ids rows of the pass (PostgreSQL only)
+    Column("created_at", DateTime(timezone=True), server_default=func.now()),
+)
+
+# Set by db.session: journal only when there is a PostgreSQL to replay into
+enabled = False
+
+
+def _should_record(session: Session) -> bool:
+    return enabled and session.get_bind().dialect.name == "sqlite"
+
+
+def record(connection, table_name: str, op: str, row_ids: Iterable[int], columns: Optional[List[str]] = None):
+    """Journal rows changed by a bulk statement (the ORM flush hooks do not see those)"""
+    if not enabled or connection.dialect.name != "sqlite":
+        return
+    rows = [
+        {"table_name": table_name, "op": op, "row_id": row_id, "columns": columns, "base_updated_at": None}
+        for row_id in row_ids
+    ]
+    if rows:
+        connection.execute(insert(change_journal), rows)
+
+
+@event.listens_for(Session, "before_flush")
+def _remember_base_versions(session, flush_context, instances):
+    """updated_at as loaded, before the flush bumps it - used for conflict detection"""
+    if not _should_record(session):
+        return
+    bases = session.info.setdefault("journal_bases", {})
+    for obj in session.dirty:
+        state = inspect(obj)
+        if "updated_at" in state.mapper.local_table.c:
+            bases[state.key] = state.committed_state.get("updated_at", state.dict.get("updated_at"))
+
+
+@event.listens_for(Session, "after_flush")
+def _journal_flush(session, flush_context):
+    if not _should_record(session):
+        return
+    bases = session.info.pop("journal_bases", {})
+    entries = []
+    for obj in session.new:
+        state = inspect(obj)
+        entries.append(_entry(state, "insert"))
+    for obj in session.dirty:
+        if not session.is_modified(obj, include_collections=False):
+            continue
+        state = inspect(obj)
+        columns = [
+            prop.columns[0].name
+            for prop in state.mapper.column_attrs
+            if state.attrs[prop.key].history.has_changes()
+        ]
+        entries.append(_entry(state, "update", columns, bases.get(state.key)))
+    for obj in session.deleted:
+        entries.append(_entry(inspect(obj), "delete"))
+    if entries:
+        session.connection().execute(insert(change_journal), entries)
+
+
+def _entry(state, op: str, columns=None, base_updated_at=None) -> dict:
+    return {
+        "table_name": state.mapper.local_table.name,
+        "op": op,
+        # identity is not assigned to pending objects until the flush finishes
+        "row_id": state.mapper.primary_key_from_instance(state.obj())[0],
+        "columns": columns,
+        "base_updated_at": base_updated_at,
+    }
+
+
+# ==================== REPLAY ====================
+
+class _Plan:
+    """Net effect of the journal per row"""
+
+    def __init__(self):
+        self.inserts: Dict[str, Set[int]] = defaultdict(set)
+        self.updates: Dict[str, Dict[int, Tuple[Set[str], Optional[datetime]]]] = defaultdict(dict)
+        self.deletes: Dict[str, Set[int]] = defaultdict(set)
+
+    def add(self, entry):
+        table, row_id = entry.table_name, entry.row_id
+        if entry.op == "insert":
+            # SQLite may reuse the id of a deleted row; the delete still applies
+            self.inserts[table].add(row_id)
+        elif entry.op == "update":
+            if row_id in self.inserts[table]:
+                return  # final values go out with the insert
+            columns, base = self.updates[table].get(row_id, (set(), entry.base_updated_at))
+            columns.update(entry.columns or [])
+            self.updates[table][row_id] = (columns, base)
+        elif entry.op == "delete":
+            if row_id in self.inserts[table]:
+                self.inserts[table].discard(row_id)  # created and removed during the outage
+                return
+            self.updates[table].pop(row_id, None)
+            self.deletes[table].add(row_id)
+
+
+class _Replay:
+    def __init__(self, local, remote, id_map: Dict[Tuple[str, int], int]):
+        self.local = local
+        self.remote = remote
+        self.id_map = id_map
+        self.verified: Dict[Tuple[str, int], Optional[int]] = {}
+        self.new_ids: List[dict] = []
+        self.skipped: Set[Tuple[str, int]] = set()
+        self.stats = {"inserted": 0, "updated": 0, "deleted": 0, "conflicts": 0}
+        self.batch_size = settings.DB_JOURNAL_REPLAY_BATCH_SIZE
+
+    def remote_id(self, table_name: str, local_id: int) -> Optional[int]:
+        """PostgreSQL id of a local row; None unless mapped or verified by ``resolve``"""
+        key = (table_name, local_id)
+        if key in self.id_map:
+            return self.id_map[key]
+        return self.verified.get(key)
+
+    def resolve(self, table, local_ids: Iterable[int]):
+        """Check unmapped ids against PostgreSQL: same id and same created_at is the same row"""
+        unknown = {
+            local_id for local_id in local_ids
+            if (table.name, local_id) not in self.id_map and (table.name, local_id) not in self.verified
+        }
+        if not unknown:
+            return
+        if "created_at" not in table.c:
+            self.verified.update({(table.name, local_id): None for local_id in unknown})
+            return
+        for chunk in self._chunks(unknown):
+            query = select(table.c.id, table.c.created_at).where(table.c.id.in_(chunk))
+            local = dict(self.local.execute(query).all())
+            remote = dict(self.remote.execute(query).all())
+            for local_id in chunk:
+                same = _same_instant(local.get(local_id), remote.get(local_id))
+                self.verified[(table.name, local_id)] = local_id if same else None
+
+    def conflict(self, table_name: str, local_id: int, reason: str):
+        self.skipped.add((table_name, local_id))
+        self.stats["conflicts"] += 1
+        logger.warning("journal_replay_conflict", table=table_name, local_id=local_id, reason=reason)
+
+    def _chunks(self, ids):
+        ids = sorted(ids)
+        for i in range(0, len(ids), self.batch_size):
+            yield ids[i:i + self.batch_size]
+
+    def _local_rows(self, table, ids) -> List[dict]:
+        result = self.local.execute(select(table).where(table.c.id.in_(ids)).order_by(table.c.id))
+        return [dict(row._mapping) for row in result]
+
+    def _resolve_parents(self, table, rows: List[dict]):
+        for fk in table.foreign_keys:
+            ids = {row[fk.parent.name] for row in rows if row.get(fk.parent.name) is not None}
+            self.resolve(fk.column.table, ids)
+
+    def _remap(self, table, row: dict, columns=None) -> Optional[str]:
+        """Point foreign keys at PostgreSQL ids; the conflict reason if a parent cannot be"""
+        for fk in table.foreign_keys:
+            name = fk.parent.name
+            if (columns is not None and name not in columns) or row.get(name) is None:
+                continue
+            parent = fk.column.table.name
+            if (parent, row[name]) in self.skipped:
+                return "parent_skipped"
+            remote_id = self.remote_id(parent, row[name])
+            if remote_id is None:
+                return "parent_unmapped"
+            row[name] = remote_id
+        return None
+
+    def _unique_conflicts(self, table, rows: List[dict]) -> Dict[int, str]:
+        """Local ids of rows that would violate a unique constraint in PostgreSQL"""
+        conflicts = {}
+        unique_sets = [[c] for c in table.columns if c.unique]
+        unique_sets += [
+            list(constraint.columns) for constraint in table.constraints
+            if isinstance(constraint, UniqueConstraint)
+        ]
+        for columns in unique_sets:
+            values = {tuple(row[c.name] for c in columns): row["id"] for row in rows}
+            existing = self.remote.execute(
+                select(*columns).where(tuple_(*columns).in_(list(values)))
+            ).all()
+            for key in existing:
+                conflicts[values[tuple(key)]] = "unique:" + ",".join(c.name for c in columns)
+        return conflicts
+
+    def apply_inserts(self, table, ids: Set[int]):
+        for chunk in self._chunks(ids):
+            rows = []
+            local_rows = self._local_rows(table, chunk)
+            self._resolve_parents(table, local_rows)
+            for row in local_rows:
+                reason = self._remap(table, row)
+                if reason:
+                    self.conflict(table.name, row["id"], reason)
+                    continue
+                rows.append(row)
+            conflicts = self._unique_conflicts(table, rows) if rows else {}
+            for local_id, reason in conflicts.items():
+                self.conflict(table.name, local_id, reason)
+            rows = [row for row in rows if row["id"] not in conflicts]
+            if not rows:
+                continue
+
+            local_ids = [row.pop("id") for row in rows]
+            try:
+                with self.remote.begin_nested():
+                    result = self.remote.execute(
+                        insert(table).returning(table.c.id, sort_by_parameter_order=True), rows
+                    )
+                    remote_ids = result.scalars().all()
+            except DBAPIError as e:
+                for local_id in local_ids:
+                    self.conflict(table.name, local_id, f"rejected: {e.orig}")
+                continue
+            for local_id, remote_id in zip(local_ids, remote_ids):
+                self.id_map[(table.name, local_id)] = remote_id
+                self.new_ids.append({"table_name": table.name, "local_id": local_id, "remote_id": remote_id})
+            self.stats["inserted"] += len(rows)
+
+    def apply_updates(self, table, changes: Dict[int, Tuple[Set[str], Optional[datetime]]]):
+        has_version = "updated_at" in table.c
+        for chunk in self._chunks(changes):
+            self.resolve(table, chunk)
+            remote_ids = {}
+            for local_id in chunk:
+                rid = self.remote_id(table.name, local_id)
+                if rid is None:
+                    self.conflict(table.name, local_id, "unmapped_row")
+                else:
+                    remote_ids[local_id] = rid
+            if not remote_ids:
+                continue
+            remote_versions = {}
+            if has_version:
+                remote_versions = dict(self.remote.execute(
+                    select(table.c.id, table.c.updated_at).where(table.c.id.in_(list(remote_ids.values())))
+                ).all())
+
+            local_rows = self._local_rows(table, list(remote_ids))
+            self._resolve_parents(table, local_rows)
+            groups: Dict[Tuple[str, ...], List[Tuple[int, dict]]] = defaultdict(list)
+            for row in local_rows:
+                local_id = row["id"]
+                columns, base = changes[local_id]
+                columns = set(columns)
+                rid = remote_ids[local_id]
+                if has_version:
+                    if _is_newer(remote_versions.get(rid), base):
+                        self.conflict(table.name, local_id, "stale_update")
+                        continue
+                    columns.add("updated_at")
+                reason = self._remap(table, row, columns)
+                if reason:
+                    self.conflict(table.name, local_id, reason)
+                    continue
+                columns.discard("id")
+                if not columns:
+                    continue
+                values = {name: row[name] for name in columns}
+                values["_rid"] = rid
+                groups[tuple(sorted(columns))].append((local_id, values))
+
+            for columns, group in groups.items():
+                stmt = (
+                    update(table)
+                    .where(table.c.id == bindparam("_rid"))
+                    .values({name: bindparam(name) for name in columns})
+                )
+                try:
+                    with self.remote.begin_nested():
+                        self.remote.execute(stmt, [values for _, values in group])
+                except DBAPIError as e:
+                    for local_id, _ in group:
+                        self.conflict(table.name, local_id, f"rejected: {e.orig}")
+                    continue
+                self.stats["updated"] += len(group)
+
+    def apply_deletes(self, table, remote_ids: List[int]):
+        for chunk in self._chunks(remote_ids):
+            try:
+                with self.remote.begin_nested():
+                    result = self.remote.execute(delete(table).where(table.c.id.in_(chunk)))
+            except DBAPIError as e:
+                self.stats["conflicts"] += len(chunk)
+                logger.warning("journal_replay_conflict", table=table.name, remote_ids=chunk, reason=f"rejected: {e.orig}")
+                continue
+            self.stats["deleted"] += result.rowcount
+
+
+def _is_newer(remote: Optional[datetime], base: Optional[datetime]) -> bool:
+    """PostgreSQL row changed after the version the local update started from"""
+    if remote is None:
+        return False
+    if base is None:
+        return True
+    return _utc(remote) > _utc(base)
+
+
+def _same_instant(local: Optional[datetime], remote: Optional[datetime]) -> bool:
+    # SQLite's CURRENT_TIMESTAMP keeps whole seconds
+    if local is None or remote is None:
+        return False
+    return _utc(local).replace(microsecond=0) == _utc(remote).replace(microsecond=0)
+
+
+def _utc(value: datetime) -> datetime:
+    # SQLite hands back naive timestamps written by CURRENT_TIMESTAMP (UTC)
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+
+def pending(sqlite_engine) -> int:
+    with sqlite_engine.connect() as conn:
+        return conn.execute(select(func.count()).select_from(change_journal)).scalar()
+
+
+def _trim(local, replay_id: str, last_entry_id: int, new_ids: List[dict]):
+    """Record the new ids, drop the replayed entries and the pass marker, in one local transaction"""
+    local.commit()
+    with local.begin():
+        if new_ids:
+            local.execute(insert(journal_ids), new_ids)
+        local.execute(delete(change_journal).where(change_journal.c.id <= last_entry_id))
+        local.execute(delete(change_journal_replays).where(change_journal_replays.c.replay_id == replay_id))
+
+
+def _forget(postgres_engine, replay_id: str):
+    """The PostgreSQL marker is only needed until the local trim commits"""
+    try:
+        with postgres_engine.begin() as remote:
+            remote.execute(delete(change_journal_replays).where(change_journal_replays.c.replay_id == replay_id))
+    except DBAPIError as e:
+        logger.warning("journal_replay_marker_cleanup_failed", replay_id=replay_id, error=str(e))
+
+
+def _settle_interrupted(local, postgres_engine):
+    """Finish or discard passes that stopped between the PostgreSQL commit and the trim"""
+    markers = local.execute(select(change_journal_replays)).all()
+    for marker in markers:
+        with postgres_engine.connect() as remote:
+            applied = remote.execute(
+                select(change_journal_replays.c.new_ids)
+                .where(change_journal_replays.c.replay_id == marker.replay_id)
+            ).first()
+        if applied is None:
+            # PostgreSQL never committed it: the entries are still to be replayed
+            local.commit()
+            with local.begin():
+                local.execute(
+                    delete(change_journal_replays).where(change_journal_replays.c.replay_id == marker.replay_id)
+                )
+            logger.warning("journal_replay_discarded", replay_id=marker.replay_id)
+        else:
+            _trim(local, marker.replay_id, marker.last_entry_id, applied.new_ids or [])
+            _forget(postgres_engine, marker.replay_id)
+            logger.warning("journal_replay_resumed", replay_id=marker.replay_id, last_entry_id=marker.last_entry_id)
+    local.commit()
+
+
+def replay(sqlite_engine, postgres_engine) -> dict:
+    """Apply the journal to PostgreSQL in one transaction, then trim it.
+
+    Raises if PostgreSQL fails mid-way; the journal is left untouched so the
+    next attempt starts over. Safe to run again after a crash at any point.
+    """
+    from db.base import Base
+    from models import user, project, task, application, membership, hackathon, notification, project_role_requirement, task_comment, hackathon_participant, token_revocation, notification_counter
+
+    started = time.perf_counter()
+    with sqlite_engine.connect() as local:
+        _settle_interrupted(local, postgres_engine)
+        entries = local.execute(select(change_journal).order_by(change_journal.c.id)).all()
+        if not entries:
+            return {"entries": 0}
+
+        plan = _Plan()
+        for entry in entries:
+            plan.add(entry)
+        id_map = {
+            (row.table_name, row.local_id): row.remote_id
+            for row in local.execute(select(journal_ids))
+        }
+
+        replay_id = str(uuid.uuid4())
+        last_entry_id = entries[-1].id
+        local.commit()
+        with local.begin():
+            local.execute(insert(change_journal_replays).values(replay_id=replay_id, last_entry_id=last_entry_id))
+
+        with postgres_engine.begin() as remote:
+            job = _Replay(local, remote, id_map)
+            tables = Base.metadata.sorted_tables
+            # Resolve delete targets first: a reused SQLite id may get a new mapping below.
+            # The local row is gone, so only a mapped id says which PostgreSQL row it was
+            delete_targets = defaultdict(list)
+            for name, ids in plan.deletes.items():
+                for local_id in ids:
+                    if (name, local_id) in id_map:
+                        delete_targets[name].append(id_map[(name, local_id)])
+                    else:
+                        # Not added to job.skipped: SQLite may have reused the id for a new row
+                        job.stats["conflicts"] += 1
+                        logger.warning("journal_replay_conflict", table=name, local_id=local_id, reason="unmapped_delete")
+            for table in tables:
+                if plan.inserts.get(table.name):
+                    job.apply_inserts(table, plan.inserts[table.name])
+            for table in tables:
+                if plan.updates.get(table.name):
+                    job.apply_updates(table, plan.updates[table.name])
+            for table in reversed(tables):
+                if table.name in delete_targets:
+                    job.apply_deletes(table, delete_targets[table.name])
+            if any(part.get("notifications") for part in (plan.inserts, plan.updates, plan.deletes)):
+                # Unread counters are derived data, maintained outside the journal
+                from services.notification_service import rebuild_unread_counters
+                rebuild_unread_counters(remote)
+            # Commits with the changes: tells a later pass this one was applied
+            remote.execute(insert(change_journal_replays).values(
+                replay_id=replay_id, last_entry_id=last_entry_id, new_ids=job.new_ids
+            ))
+
+        # PostgreSQL has committed; record new ids and drop replayed entries
+        _trim(local, replay_id, last_entry_id, job.new_ids)
+    _forget(postgres_engine, replay_id)
+
+    stats = {"entries": len(entries), **job.stats, "ms": round((time.perf_counter() - started) * 1000, 1)}
+    logger.info("journal_replay_complete", **stats)
+    return stats
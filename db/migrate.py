@@ -0,0 +1,121 @@
+"""Startup migration gate: ``python -m db.migrate``.
+
+Compares ``alembic_version`` with the script head using a single query and
+exits without loading the alembic environment when they match. When an
+upgrade is needed on PostgreSQL, a session-level advisory lock makes sure
+only one instance migrates; the others wait, re-check and usually find the
+schema already at head.
+"""
+import os
+import sys
+import time
+
+from alembic import command
+from alembic.config import Config
+from alembic.script import ScriptDirectory
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError, ProgrammingError
+from sqlalchemy.pool import NullPool
+import structlog
+
+from core.config import settings
+
+logger = structlog.get_logger()
+
+# Arbitrary app-wide key for pg_advisory_lock
+MIGRATION_LOCK_ID = 7_316_482_001
+ALEMBIC_INI = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "alembic.ini")
+
+
+def _alembic_config() -> Config:
+    config = Config(ALEMBIC_INI)
+    config.set_main_option("script_location", os.path.join(os.path.dirname(ALEMBIC_INI), "alembic"))
+    return config
+
+
+def script_heads(config: Config) -> set:
+    """Head revision(s) from the migration scripts (no database, no env.py)"""
+    return set(ScriptDirectory.from_config(config).get_heads())
+
+
+def database_heads(connection) -> set:
+    """Revision(s) recorded in alembic_version; empty for a fresh database"""
+    try:
+        revisions = connection.execute(text("SELECT version_num FROM alembic_version")).scalars().all()
+        connection.commit()
+        return set(revisions)
+    except ProgrammingError:
+        connection.rollback()
+        return set()
+
+
+def _upgrade(config: Config, connection):
+    # env.py reuses this connection instead of opening (and testing) its own
+    config.attributes["connection"] = connection
+    command.upgrade(config, "head")
+
+
+def run() -> int:
+    started = time.perf_counter()
+    if not (settings.DB_URL and settings.DB_URL.startswith(("postgresql", "postgres"))):
+        # The SQLite fallback schema comes from the models (create_all at startup)
+        logger.info("migrations_skipped_sqlite")
+        return 0
+
+    config = _alembic_config()
+    heads = script_heads(config)
+    engine = create_engine(
+        settings.DB_URL,
+        poolclass=NullPool,
+        connect_args={"connect_timeout": settings.DB_PROBE_CONNECT_TIMEOUT_SEC}
+    )
+    try:
+        connection = engine.connect()
+    except OperationalError as e:
+        # App starts on the SQLite fallback; the next boot migrates
+        logger.warning("migrations_skipped_postgresql_unreachable", error=str(e))
+        engine.dispose()
+        return 0
+
+    try:
+        with connection:
+            current = database_heads(connection)
+            if current == heads:
+                logger.info("migrations_up_to_date", revision=sorted(heads), ms=round((time.perf_counter() - started) * 1000, 1))
+                return 0
+
+            logger.info("migrations_waiting_for_lock", current=sorted(current), head=sorted(heads))
+            # SET LOCAL: the timeout bounds only this wait and ends with the
+            # commit, so the migrations (and their DDL) don't inherit it.
+            # The advisory lock itself is session-level and outlives the commit.
+            connection.execute(text(f"SET LOCAL lock_timeout = '{int(settings.DB_MIGRATION_LOCK_TIMEOUT_SEC)}s'"))
+            connection.execute(text("SELECT pg_advisory_lock(:id)"), {"id": MIGRATION_LOCK_ID})
+            connection.commit()
+            try:
+                # Another instance may have migrated while we waited
+                current = database_heads(connection)
+                if current == heads:
+                    logger.info("migrations_applied_by_another_instance", revision=sorted(heads))
+                    return 0
+                _upgrade(config, connection)
+                connection.commit()
+                logger.info(
+                    "migrations_applied",
+                    previous=sorted(current),
+                    revision=sorted(heads),
+                    ms=round((time.perf_counter() - started) * 1000, 1)
+                )
+            finally:
+                connection.rollback()
+                connection.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": MIGRATION_LOCK_ID})
+                connection.commit()
+        return 0
+    except Exception as e:
+        logger.error("migrations_failed", error=str(e))
+        return 1
+    finally:
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    sys.exit(run())
@@ -0,0 +1,162 @@
+"""Connection pool instrumentation: live counts and checkout wait-time histograms"""
+import threading
+import time
+from typing import Dict
+
+from sqlalchemy import exc as sa_exc
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+import structlog
+
+from core.config import settings
+
+logger = structlog.get_logger()
+
+# Upper bounds (ms) of the checkout wait histogram buckets
+WAIT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+_registry: Dict[str, "PoolStats"] = {}
+
+
+class PoolStats:
+    """Counters for one logical pool, kept across engine.dispose()"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.pool = None
+        self._lock = threading.Lock()
+        self.waiting = 0
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total_ms = 0.0
+        self.wait_max_ms = 0.0
+        self.buckets = [0] * (len(WAIT_BUCKETS_MS) + 1)
+
+    def _enter(self):
+        with self._lock:
+            self.waiting += 1
+
+    def _exit(self, wait_ms: float, timed_out: bool = False):
+        with self._lock:
+            self.waiting -= 1
+            if timed_out:
+                self.timeouts += 1
+                return
+            self.checkouts += 1
+            self.wait_total_ms += wait_ms
+            self.wait_max_ms = max(self.wait_max_ms, wait_ms)
+            for i, bound in enumerate(WAIT_BUCKETS_MS):
+                if wait_ms <= bound:
+                    self.buckets[i] += 1
+                    break
+            else:
+                self.buckets[-1] += 1
+
+    def counts(self) -> dict:
+        pool = self.pool
+        if pool is None:
+            return {"size": 0, "checked_in": 0, "checked_out": 0, "overflow": 0, "waiting": self.waiting}
+        return {
+            "size": pool.size(),
+            "checked_in": pool.checkedin(),
+            "checked_out": pool.checkedout(),
+            "overflow": max(pool.overflow(), 0),
+            "waiting": self.waiting,
+        }
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            histogram = {}
+            cumulative = 0
+            for bound, count in zip(WAIT_BUCKETS_MS, self.buckets):
+                cumulative += count
+                histogram[f"le_{bound}ms"] = cumulative
+            histogram["le_inf"] = cumulative + self.buckets[-1]
+            wait = {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "avg_ms": round(self.wait_total_ms / self.checkouts, 3) if self.checkouts else 0.0,
+                "max_ms": round(self.wait_max_ms, 3),
+                "histogram": histogram,
+            }
+        return {"name": self.name, **self.counts(), "checkout_wait": wait}
+
+
+class _InstrumentedPoolMixin:
+    stats: PoolStats = None
+
+    def _do_get(self):
+        stats = self.stats
+        if stats is None:
+            return super()._do_get()
+
+        stats._enter()
+        start = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except sa_exc.TimeoutError:
+            stats._exit(0.0, timed_out=True)
+            logger.error("db_pool_checkout_timeout", pool=stats.name, **stats.counts())
+            raise
+        except BaseException:
+            stats._exit((time.perf_counter() - start) * 1000)
+            raise
+
+        wait_ms = (time.perf_counter() - start) * 1000
+        stats._exit(wait_ms)
+        if wait_ms >= settings.DB_POOL_SLOW_CHECKOUT_MS:
+            logger.warning("db_pool_checkout_slow", pool=stats.name, wait_ms=round(wait_ms, 1), **stats.counts())
+        return conn
+
+    def recreate(self):
+        # engine.dispose() swaps in a fresh pool; keep the counters attached
+        new_pool = super().recreate()
+        if self.stats is not None:
+            new_pool.stats = self.stats
+            self.stats.pool = new_pool
+        return new_pool
+
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def pool_options() -> dict:
+    """create_engine()/create_async_engine() kwargs built from settings"""
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_use_lifo": settings.DB_POOL_USE_LIFO,
+    }
+
+
+def sqlite_pool_options() -> dict:
+    """Pool kwargs for the SQLite fallback: connections are cheap, no recycling needed"""
+    return {
+        "pool_size": settings.SQLITE_POOL_SIZE,
+        "max_overflow": settings.SQLITE_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_use_lifo": True,  # keep the warmest page caches in use
+    }
+
+
+def instrument(engine, name: str):
+    """Attach (or re-attach) named stats to an engine built with an instrumented pool"""
+    pool = getattr(engine, "sync_engine", engine).pool
+    if not isinstance(pool, _InstrumentedPoolMixin):
+        return engine
+    stats = _registry.get(name)
+    if stats is None:
+        stats = _registry[name] = PoolStats(name)
+    pool.stats = stats
+    stats.pool = pool
+    return engine
+
+
+def snapshot_all() -> Dict[str, dict]:
+    return {name: stats.snapshot() for name, stats in _registry.items()}
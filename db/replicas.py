@@ -0,0 +1,210 @@
+"""Read-replica routing for PostgreSQL.
+
+Sessions opened for safe (GET/HEAD) requests read from a replica picked
+round-robin; writes, flushes and everything else go to the primary. After a
+request commits a write, the client gets a short-lived "primary until" token
+(cookie + response header) so its next reads stay on the primary until the
+replicas have caught up (read-your-writes).
+
+The token alone is not enough for a cross-origin SPA: a ``fetch`` without
+``credentials: "include"`` sends no cookie, and the header only comes back
+if the frontend reads and echoes it. So the write also pins the
+authenticated user (the bearer token's ``sub``, which such clients do send)
+to the primary for the same window. Pins live in memory and are broadcast
+on the ``db_primary_pins`` pub/sub channel so every worker honours them.
+Anonymous clients still depend on the cookie or header.
+"""
+import itertools
+import math
+import threading
+import time
+from typing import Dict, List, Optional
+
+from fastapi import Request, Response
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+import structlog
+
+from core.config import settings
+from core.pubsub import broker
+from core.security import decode_token
+
+logger = structlog.get_logger()
+
+PRIMARY_TOKEN_COOKIE = "db_primary_until"
+PRIMARY_TOKEN_HEADER = "X-DB-Primary-Until"
+READ_METHODS = ("GET", "HEAD", "OPTIONS")
+PINS_CHANNEL = "db_primary_pins"
+
+
+class ReplicaSet:
+    """Round-robin over replica engines, skipping ones that recently failed"""
+
+    def __init__(self, engines: list):
+        self.engines = engines
+        self._cycle = itertools.cycle(range(len(engines))) if engines else None
+        self._failed_until = {}
+        self._lock = threading.Lock()
+
+    def __bool__(self):
+        return bool(self.engines)
+
+    def pick(self):
+        """Next healthy replica engine, or None to fall back to the primary"""
+        if not self.engines:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            for _ in range(len(self.engines)):
+                engine = self.engines[next(self._cycle)]
+                if self._failed_until.get(engine, 0.0) <= now:
+                    return engine
+        return None
+
+    def mark_failed(self, engine):
+        with self._lock:
+            self._failed_until[engine] = time.monotonic() + settings.DB_REPLICA_RETRY_SEC
+        logger.warning("db_replica_marked_failed", replica=repr(engine.url), retry_in_sec=settings.DB_REPLICA_RETRY_SEC)
+
+    def dispose(self):
+        for engine in self.engines:
+            engine.dispose()
+
+
+class RoutingSession(Session):
+    """Session that sends reads of a read-only request to a replica.
+
+    ``use_primary`` starts True; ``get_db`` clears it for read requests that
+    carry no valid primary token. Once the session flushes it stays on the
+    primary.
+    """
+
+    def __init__(self, *args, replicas: Optional[ReplicaSet] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.replicas = replicas
+        self.use_primary = True
+        self.on_write = None
+        self._replica = None
+
+    def route_reads_to_replica(self):
+        if self.replicas:
+            self._replica = self.replicas.pick()
+            self.use_primary = self._replica is None
+
+    @property
+    def replica(self):
+        """Replica engine serving this session's reads, None when on the primary"""
+        return None if self.use_primary else self._replica
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if self.use_primary or self._flushing or getattr(clause, "is_dml", False):
+            return super().get_bind(mapper=mapper, clause=clause, **kw)
+        if getattr(clause, "_for_update_arg", None) is not None:
+            return super().get_bind(mapper=mapper, clause=clause, **kw)
+        return self._replica
+
+
+@event.listens_for(RoutingSession, "after_flush")
+def _stick_to_primary(session, flush_context):
+    session.use_primary = True
+    session.info["wrote"] = True
+
+
+@event.listens_for(RoutingSession, "after_commit")
+def _issue_primary_token(session):
+    if session.info.pop("wrote", False) and session.on_write is not None:
+        session.on_write()
+
+
+@event.listens_for(RoutingSession, "after_rollback")
+def _forget_write(session):
+    session.info.pop("wrote", None)
+
+
+class PrimaryPins:
+    """Per-user "primary until" times (epoch seconds) from recent writes"""
+
+    def __init__(self):
+        self._until: Dict[int, float] = {}
+        self._lock = threading.Lock()
+        self._next_purge = 0.0
+
+    def pin(self, user_id: int, until: float):
+        now = time.time()
+        with self._lock:
+            if self._until.get(user_id, 0.0) < until:
+                self._until[user_id] = until
+            if now >= self._next_purge:
+                self._until = {uid: t for uid, t in self._until.items() if t > now}
+                self._next_purge = now + 60
+
+    def until(self, user_id: Optional[int]) -> float:
+        return self._until.get(user_id, 0.0) if user_id is not None else 0.0
+
+
+pins = PrimaryPins()
+
+
+def _on_remote_pin(message: dict):
+    if message.get("origin") == broker.origin:
+        return  # pinned locally in pin_to_primary
+    try:
+        pins.pin(int(message["user_id"]), float(message["until"]))
+    except (KeyError, TypeError, ValueError):
+        pass
+
+
+broker.subscribe(PINS_CHANNEL, _on_remote_pin)
+
+
+def _token_from(request: Request) -> float:
+    raw = request.headers.get(PRIMARY_TOKEN_HEADER) or request.cookies.get(PRIMARY_TOKEN_COOKIE)
+    try:
+        return float(raw) if raw else 0.0
+    except ValueError:
+        return 0.0
+
+
+def _user_id_from(request: Request) -> Optional[int]:
+    """Subject of the request's bearer access token (verification is cached)"""
+    scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    claims = decode_token(token)
+    if not claims or claims.get("type") != "access":
+        return None
+    try:
+        return int(claims.get("sub"))
+    except (TypeError, ValueError):
+        return None
+
+
+def reads_may_use_replica(request: Request, user_id: Optional[int] = None) -> bool:
+    """Safe method, and neither the client nor the user wrote within the lag window"""
+    if request.method not in READ_METHODS:
+        return False
+    return max(_token_from(request), pins.until(user_id)) <= time.time()
+
+
+def pin_to_primary(response: Response, user_id: Optional[int] = None):
+    """Keep the client (and the user, on every worker) reading from the primary for the lag window"""
+    window = settings.DB_READ_YOUR_WRITES_SEC
+    until = time.time() + window
+    response.headers[PRIMARY_TOKEN_HEADER] = f"{until:.3f}"
+    response.set_cookie(
+        PRIMARY_TOKEN_COOKIE, f"{until:.3f}", max_age=math.ceil(window), httponly=True, samesite="lax"
+    )
+    if user_id is not None:
+        pins.pin(user_id, until)
+        broker.publish(PINS_CHANNEL, {"origin": broker.origin, "user_id": user_id, "until": until})
+
+
+def route_session(db, request: Request, response: Response):
+    """Configure a (sync or async) session for the current request"""
+    session = getattr(db, "sync_session", db)
+    if not isinstance(session, RoutingSession) or not session.replicas:
+        return
+    user_id = _user_id_from(request)
+    session.on_write = lambda: pin_to_primary(response, user_id)
+    if reads_may_use_replica(request, user_id):
+        session.route_reads_to_replica()
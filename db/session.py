@@ -1,8 +1,19 @@
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine, event, text
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.exc import OperationalError, DisconnectionError
+from fastapi import Request, Response
 from core.config import settings
+from db.pool_stats import InstrumentedQueuePool, InstrumentedAsyncQueuePool, instrument, pool_options, sqlite_pool_options
+from db import failover, journal, tech_tags
+from db.sqlite_writer import SQLiteWriter, SingleWriterSession, SingleWriterAsyncSession
+from db.replicas import ReplicaSet, RoutingSession, route_session
+from concurrent.futures import ThreadPoolExecutor
 import structlog
+import asyncio
+import threading
+import time
 import os
 
 logger = structlog.get_logger()
@@ -12,6 +23,20 @@ _engine = None
 _SessionLocal = None
 _using_sqlite = False
 _postgres_available = True
+_switch_lock = threading.RLock()
+_replicas = ReplicaSet([])
+
+# SQLite single-writer mode: writer thread + read-only engine for sessions
+_writer = None
+_writer_engine = None
+_read_engine = None
+
+# Async engine mirrors whichever database the sync engine currently uses
+_async_engine = None
+_AsyncSessionLocal = None
+_async_engine_url = None
+_async_writer = None
+_async_replica_engines = []
 
 
 def _test_connection(engine) -> bool:
@@ -25,49 +50,207 @@ def _test_connection(engine) -> bool:
         return False
 
 
+def _create_postgres_engine(url: str = None, name: str = "postgresql"):
+    """Create a PostgreSQL engine with the pool configured in settings"""
+    engine = create_engine(
+        url or settings.DB_URL,
+        poolclass=InstrumentedQueuePool,
+        pool_pre_ping=True,
+        connect_args={"connect_timeout": 5},
+        **pool_options()
+    )
+    return instrument(engine, name)
+
+
+def _create_replicas() -> ReplicaSet:
+    """Engines for the configured read replicas; unreachable ones are left out"""
+    engines = []
+    for i, url in enumerate(settings.replica_urls_list):
+        engine = _create_postgres_engine(url, f"replica_{i}")
+        if _test_connection(engine):
+            engines.append(engine)
+        else:
+            logger.warning("db_replica_unavailable", replica=i)
+            engine.dispose()
+    if engines:
+        logger.info("db_replicas_enabled", count=len(engines))
+    return ReplicaSet(engines)
+
+
+def _use_postgres(engine):
+    """Make ``engine`` the primary; reads of GET requests may go to replicas"""
+    global _engine, _SessionLocal, _using_sqlite, _postgres_available, _replicas
+
+    old_replicas = _replicas
+    _engine = engine
+    _replicas = _create_replicas()
+    _SessionLocal = sessionmaker(
+        class_=RoutingSession, autocommit=False, autoflush=False, bind=_engine, replicas=_replicas
+    )
+    _using_sqlite = False
+    _postgres_available = True
+    old_replicas.dispose()
+
+
+def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+    """SQLite performance profile, run on every new pooled connection"""
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT_MS)}")
+    cursor.execute(f"PRAGMA journal_mode={settings.SQLITE_JOURNAL_MODE}")
+    cursor.execute(f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}")
+    cursor.execute(f"PRAGMA mmap_size={int(settings.SQLITE_MMAP_SIZE)}")
+    # Negative cache_size is in KiB rather than pages
+    cursor.execute(f"PRAGMA cache_size=-{int(settings.SQLITE_CACHE_SIZE_KB)}")
+    cursor.execute(f"PRAGMA temp_store={settings.SQLITE_TEMP_STORE}")
+    cursor.close()
+
+
+# The driver opens a transaction right before the first INSERT/UPDATE/DELETE
+# (reads before it run outside one, so they never pin a WAL snapshot). Its
+# default BEGIN is DEFERRED; IMMEDIATE takes the write lock at BEGIN, where
+# busy_timeout applies, rather than upgrading a reader mid-transaction.
+SQLITE_DRIVER_BEGIN = "IMMEDIATE"
+
+
+def _create_sqlite_engine(name: str = "sqlite"):
+    """Create the SQLite fallback engine with the performance profile"""
+    engine = create_engine(
+        settings.sqlite_url,
+        poolclass=InstrumentedQueuePool,
+        connect_args={
+            "check_same_thread": False,  # SQLite requires this
+            "timeout": settings.SQLITE_BUSY_TIMEOUT_MS / 1000,
+            "isolation_level": SQLITE_DRIVER_BEGIN,
+        },
+        **sqlite_pool_options()
+    )
+    event.listen(engine, "connect", _apply_sqlite_pragmas)
+    return instrument(engine, name)
+
+
+def _create_sqlite_writer_engine():
+    """Engine of the writer thread: every batch starts with BEGIN IMMEDIATE.
+
+    The driver would only BEGIN at the first write, after the jobs' reads (and
+    a SAVEPOINT opens a deferred transaction by itself); a batch that read
+    first and then wrote would fail with SQLITE_BUSY_SNAPSHOT whenever another
+    process committed in between. So SQLAlchemy emits BEGIN instead.
+    """
+    engine = _create_sqlite_engine("sqlite_writer")
+
+    @event.listens_for(engine, "connect")
+    def _driver_autocommit(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine, "begin")
+    def _begin_immediate(conn):
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+
+    return engine
+
+
+def _create_sqlite_readonly_engine():
+    """Read-only connections to the fallback file, used next to the writer thread"""
+    engine = create_engine(
+        settings.sqlite_readonly_url,
+        poolclass=InstrumentedQueuePool,
+        connect_args={
+            "check_same_thread": False,
+            "timeout": settings.SQLITE_BUSY_TIMEOUT_MS / 1000,
+        },
+        **sqlite_pool_options()
+    )
+    event.listen(engine, "connect", _apply_sqlite_pragmas)
+    return instrument(engine, "sqlite_readonly")
+
+
+def _start_single_writer():
+    """Route session writes through one writer thread; reads use a read-only pool.
+
+    The async engine picks the writer up in ``_ensure_async_engine``.
+    """
+    global _SessionLocal, _writer, _writer_engine, _read_engine
+
+    _writer_engine = _create_sqlite_writer_engine()
+    _writer = SQLiteWriter(
+        _writer_engine,
+        queue_size=settings.SQLITE_WRITER_QUEUE_SIZE,
+        batch_size=settings.SQLITE_WRITER_BATCH_SIZE
+    )
+    _writer.start()
+    _read_engine = _create_sqlite_readonly_engine()
+    _SessionLocal = sessionmaker(
+        class_=SingleWriterSession, autocommit=False, autoflush=False, bind=_read_engine, writer=_writer
+    )
+
+
+def _stop_single_writer():
+    global _writer, _writer_engine, _read_engine
+
+    if _writer is not None:
+        _writer.stop()
+        _writer = None
+    if _writer_engine is not None:
+        _writer_engine.dispose()
+        _writer_engine = None
+    if _read_engine is not None:
+        _read_engine.dispose()
+        _read_engine = None
+
+
+def _postgres_configured() -> bool:
+    return bool(settings.DB_URL) and settings.DB_URL.startswith(("postgresql", "postgres"))
+
+
 def _init_engine():
     """Initialize database engine with PostgreSQL fallback to SQLite"""
     global _engine, _SessionLocal, _using_sqlite, _postgres_available
-    
+
+    started = time.monotonic()
+    # Writes made on SQLite are journaled only if there is a PostgreSQL to replay them into
+    journal.enabled = _postgres_configured()
     # Try PostgreSQL first if DB_URL is set
-    if settings.DB_URL and settings.DB_URL.startswith(("postgresql", "postgres")):
+    if _postgres_configured():
+        postgres_engine = None
         try:
             logger.info("attempting_postgresql_connection")
-            postgres_engine = create_engine(
-                settings.DB_URL,
-                pool_pre_ping=True,
-                pool_recycle=300,
-                connect_args={"connect_timeout": 5}
-            )
+            postgres_engine = _create_postgres_engine()
             
             # Test connection
             if _test_connection(postgres_engine):
-                _engine = postgres_engine
-                _SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=_engine)
-                _using_sqlite = False
-                _postgres_available = True
+                _use_postgres(postgres_engine)
                 logger.info("postgresql_connection_successful", db_url=settings.DB_URL[:50] + "...")
                 return
             else:
                 logger.warning("postgresql_connection_test_failed_fallback_to_sqlite")
         except Exception as e:
             logger.error("postgresql_connection_error", error=str(e), fallback="sqlite")
-    
+        if postgres_engine is not None:
+            postgres_engine.dispose()
+
+    _init_sqlite()
+    if _postgres_configured():
+        failover.metrics.failover(started)
+        failover.breaker.trip()
+        failover.prober.start(_failback_to_postgres)
+
+
+def _init_sqlite():
+    """Switch the active engine to the SQLite fallback database"""
+    global _engine, _SessionLocal, _using_sqlite, _postgres_available, _replicas
+
     # Fallback to SQLite
     _postgres_available = False
-    sqlite_url = settings.sqlite_url
-    
+    # Replicas lag behind writes that now land in SQLite - stop reading from them
+    _replicas.dispose()
+    _replicas = ReplicaSet([])
     # Ensure directory exists for SQLite file
     sqlite_path = settings.SQLITE_DB_PATH
     if "/" in sqlite_path or "\\" in sqlite_path:
         os.makedirs(os.path.dirname(sqlite_path), exist_ok=True)
     
     logger.info("using_sqlite_fallback", path=sqlite_path)
-    _engine = create_engine(
-        sqlite_url,
-        connect_args={"check_same_thread": False},  # SQLite requires this
-        pool_pre_ping=True
-    )
+    _engine = _create_sqlite_engine()
     _SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=_engine)
     _using_sqlite = True
     
@@ -87,7 +270,7 @@ def _init_engine():
             logger.info("creating_tables_from_models_for_sqlite")
             from db.base import Base
             # Import all models to register them
-            from models import user, project, task, application, membership, hackathon, notification, project_role_requirement, task_comment, hackathon_participant
+            from models import user, project, task, application, membership, hackathon, notification, project_role_requirement, task_comment, hackathon_participant, token_revocation, notification_counter
             Base.metadata.create_all(bind=_engine)
             logger.info("sqlite_tables_created", tables=list(Base.metadata.tables.keys()))
         else:
@@ -106,19 +289,44 @@ def _init_engine():
                     
                     # Drop and recreate tables with correct schema
                     from db.base import Base
-                    from models import user, project, task, application, membership, hackathon, notification, project_role_requirement, task_comment, hackathon_participant
+                    from models import user, project, task, application, membership, hackathon, notification, project_role_requirement, task_comment, hackathon_participant, token_revocation, notification_counter
                     
                     # Drop all tables
                     Base.metadata.drop_all(bind=_engine)
                     # Recreate with correct schema
                     Base.metadata.create_all(bind=_engine)
                     logger.info("sqlite_tables_recreated", tables=list(Base.metadata.tables.keys()))
+                else:
+                    # Schema is fine; still create tables added since the file was made
+                    from db.base import Base
+                    from models import user, project, task, application, membership, hackathon, notification, project_role_requirement, task_comment, hackathon_participant, token_revocation, notification_counter
+                    # ...nullable columns added to existing tables (create_all skips those)
+                    with _engine.begin() as connection:
+                        for table in Base.metadata.sorted_tables:
+                            if table.name not in existing_tables:
+                                continue
+                            present = {col['name'] for col in inspector.get_columns(table.name)}
+                            for column in table.columns:
+                                if column.name not in present and column.nullable:
+                                    connection.exec_driver_sql(
+                                        f"ALTER TABLE {table.name} ADD COLUMN {column.name} "
+                                        f"{column.type.compile(dialect=_engine.dialect)}"
+                                    )
+                                    logger.info("sqlite_column_added", table=table.name, column=column.name)
+                    Base.metadata.create_all(bind=_engine)
+                    # ...and indexes added to existing tables (create_all skips those)
+                    for table in Base.metadata.sorted_tables:
+                        for index in table.indexes:
+                            try:
+                                index.create(bind=_engine, checkfirst=True)
+                            except Exception as index_error:
+                                logger.warning("sqlite_index_create_failed", index=index.name, error=str(index_error))
             except Exception as schema_check_error:
                 logger.warning("schema_check_failed", error=str(schema_check_error))
                 # If schema check fails, try to recreate tables
                 try:
                     from db.base import Base
-                    from models import user, project, task, application, membership, hackathon, notification, project_role_requirement, task_comment, hackathon_participant
+                    from models import user, project, task, application, membership, hackathon, notification, project_role_requirement, task_comment, hackathon_participant, token_revocation, notification_counter
                     Base.metadata.drop_all(bind=_engine)
                     Base.metadata.create_all(bind=_engine)
                     logger.info("sqlite_tables_recreated_after_check_failure")
@@ -127,61 +335,188 @@ def _init_engine():
     except Exception as e:
         logger.warning("failed_to_create_sqlite_tables", error=str(e))
 
+    journal.journal_metadata.create_all(bind=_engine)
+    tech_tags.ensure_sqlite_tables(_engine)
 
-def _try_reconnect_postgres():
-    """Try to reconnect to PostgreSQL if we're using SQLite"""
-    global _engine, _SessionLocal, _using_sqlite, _postgres_available
-    
-    if _using_sqlite and settings.DB_URL and settings.DB_URL.startswith(("postgresql", "postgres")):
+    if settings.SQLITE_SINGLE_WRITER:
+        _start_single_writer()
+
+
+def _failback_to_postgres() -> bool:
+    """Called by the prober once PostgreSQL answers again; swaps engines"""
+    postgres_engine = _create_postgres_engine()
+    if not _test_connection(postgres_engine):
+        postgres_engine.dispose()
+        return False
+
+    sqlite_engine = _engine
+    # Without the single writer, async sessions write through their own SQLite engine
+    async_sqlite_engine = _async_engine if _async_engine_url == settings.sqlite_url else None
+    try:
+        # Bulk of the outage is replayed while SQLite keeps serving
+        replayed = journal.replay(sqlite_engine, postgres_engine)
+        with _switch_lock:
+            # Short tail written during the first pass, then switch
+            tail = journal.replay(sqlite_engine, postgres_engine)
+            old_engine = _engine
+            _use_postgres(postgres_engine)
+    except Exception as e:
+        # Stay on SQLite; the prober retries with backoff and replay starts over
+        logger.error("journal_replay_failed", error=str(e))
+        postgres_engine.dispose()
+        return False
+
+    # The writer fails what is still queued; its current batch commits
+    _stop_single_writer()
+    stragglers = _replay_stragglers(sqlite_engine, postgres_engine, async_sqlite_engine)
+    failover.metrics.last_replay = {
+        key: sum(part.get(key, 0) for part in (replayed, tail, stragglers))
+        for key in ("entries", "inserted", "updated", "deleted", "conflicts", "ms")
+    }
+    if old_engine is not None:
+        old_engine.dispose()
+    logger.info("postgresql_reconnection_successful")
+    return True
+
+
+def _sqlite_sessions_open(sqlite_engine, async_sqlite_engine) -> int:
+    busy = sqlite_engine.pool.checkedout()
+    if async_sqlite_engine is not None:
+        busy += async_sqlite_engine.sync_engine.pool.checkedout()
+    return busy
+
+
+def _replay_stragglers(sqlite_engine, postgres_engine, async_sqlite_engine) -> dict:
+    """Replay what sessions handed out before the switch still commit to SQLite.
+
+    Repeats until none of them holds a SQLite connection and the journal is
+    empty, or DB_FAILBACK_DRAIN_TIMEOUT_SEC passes.
+    """
+    deadline = time.monotonic() + settings.DB_FAILBACK_DRAIN_TIMEOUT_SEC
+    totals = {}
+    while True:
+        # Counted before the pass, so whatever they commit meanwhile gets another one
+        open_sessions = _sqlite_sessions_open(sqlite_engine, async_sqlite_engine)
         try:
-            logger.info("attempting_postgresql_reconnect")
-            postgres_engine = create_engine(
-                settings.DB_URL,
-                pool_pre_ping=True,
-                pool_recycle=300,
-                connect_args={"connect_timeout": 5}
-            )
-            
-            if _test_connection(postgres_engine):
-                _engine = postgres_engine
-                _SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=_engine)
-                _using_sqlite = False
-                _postgres_available = True
-                logger.info("postgresql_reconnection_successful")
-                return True
+            part = journal.replay(sqlite_engine, postgres_engine)
+            for key, value in part.items():
+                totals[key] = totals.get(key, 0) + value
+            pending = journal.pending(sqlite_engine)
         except Exception as e:
-            logger.debug("postgresql_reconnect_failed", error=str(e))
-    
-    return False
+            logger.error("journal_replay_stragglers_failed", error=str(e))
+            pending = None
+        if not open_sessions and pending == 0:
+            return totals
+        if time.monotonic() >= deadline:
+            logger.error("journal_replay_stragglers_timeout", open_sessions=open_sessions, pending=pending)
+            return totals
+        time.sleep(0.2)
 
 
-# Initialize on import
-_init_engine()
+def _failover_to_sqlite():
+    """Move from a failing PostgreSQL engine to SQLite and start the prober"""
+    started = time.monotonic()
+    with _switch_lock:
+        if _using_sqlite:
+            return
+        old_engine = _engine
+        logger.warning("postgresql_connection_lost_switching_to_sqlite")
+        _init_sqlite()
 
+    if old_engine is not None:
+        old_engine.dispose()
+    failover.metrics.failover(started)
+    failover.breaker.trip()
+    failover.prober.start(_failback_to_postgres)
+    logger.info("sqlite_failover_complete", failover_ms=failover.metrics.last_failover_ms)
 
-def get_db():
-    """Get database session with automatic fallback handling"""
-    global _engine, _SessionLocal, _using_sqlite
-    
-    # If using SQLite, try to reconnect to PostgreSQL periodically
-    if _using_sqlite:
-        _try_reconnect_postgres()
-    
+
+def _handle_connection_error():
+    """Fail over only if PostgreSQL itself is unreachable, not on a single bad statement"""
+    if not _using_sqlite and not _test_connection(_engine):
+        _failover_to_sqlite()
+
+
+def init_engine():
+    """Connect once (PostgreSQL or the SQLite fallback); called from the app lifespan"""
+    with _switch_lock:
+        if _engine is None:
+            _init_engine()
+
+
+def prefill_pool(count: int) -> int:
+    """Open up to ``count`` pooled connections now so first requests skip the handshake"""
+    count = min(count, _engine.pool.size())
+    if count <= 0:
+        return 0
+    with ThreadPoolExecutor(max_workers=count) as executor:
+        connections = list(executor.map(lambda _: _engine.raw_connection(), range(count)))
+    for connection in connections:
+        connection.close()  # back into the pool, still open
+    return len(connections)
+
+
+async def prefill_async_pool(count: int) -> int:
+    """Create the async engine and open up to ``count`` connections"""
+    await _ensure_async_engine()
+    count = min(count, _async_engine.sync_engine.pool.size())
+    if count <= 0:
+        return 0
+    connections = await asyncio.gather(*[_async_engine.connect() for _ in range(count)])
+    for connection in connections:
+        await connection.close()
+    return len(connections)
+
+
+async def shutdown_engine():
+    """Stop background threads and close every pool"""
+    global _engine, _async_engine, _async_engine_url, _async_writer, _replicas, _async_replica_engines
+
+    failover.prober.stop()
+    await run_in_threadpool(_stop_single_writer)
+    _replicas.dispose()
+    _replicas = ReplicaSet([])
+    if _engine is not None:
+        _engine.dispose()
+        _engine = None
+    for engine in [_async_engine, *_async_replica_engines]:
+        if engine is not None:
+            await engine.dispose()
+    _async_engine = None
+    _async_engine_url = None
+    _async_writer = None
+    _async_replica_engines = []
+    logger.info("database_engines_closed")
+
+
+def SessionLocal():
+    """Plain session for scripts (seed_data etc.) that run outside the app"""
+    init_engine()
+    return _SessionLocal()
+
+
+def _handle_session_error(db):
+    """A failing replica is skipped for a while; anything else may mean failover"""
+    session = getattr(db, "sync_session", db)
+    replica = getattr(session, "replica", None)
+    if replica is not None:
+        session.replicas.mark_failed(replica)
+    else:
+        _handle_connection_error()
+
+
+def get_db(request: Request = None, response: Response = None):
+    """Get database session; engine switching is owned by the failover prober"""
     db = _SessionLocal()
+    if request is not None:
+        route_session(db, request, response)
     try:
         yield db
     except (OperationalError, DisconnectionError) as e:
         logger.error("database_session_error", error=str(e))
         db.close()
-        
-        # Try to reinitialize if connection lost
-        if not _using_sqlite:
-            logger.warning("postgresql_connection_lost_switching_to_sqlite")
-            _init_engine()
-            db = _SessionLocal()
-            yield db
-        else:
-            raise
+        _handle_session_error(db)
+        raise
     finally:
         db.close()
 
@@ -193,4 +528,107 @@ def is_using_sqlite() -> bool:
 
 def get_engine():
     """Get the current database engine"""
-    return _engine
\ No newline at end of file
+    return _engine
+
+
+def get_writer_stats():
+    """Single-writer queue statistics, None when the mode is off"""
+    return _writer.stats() if _writer is not None else None
+
+
+def _async_url(url: str) -> str:
+    """Map a sync database URL to its asyncio driver"""
+    if url.startswith("sqlite:"):
+        return url.replace("sqlite:", "sqlite+aiosqlite:", 1)
+    # postgresql+psycopg:// already selects psycopg3's async driver under create_async_engine
+    return url
+
+
+async def _ensure_async_engine():
+    """(Re)create the async engine when the active database changes"""
+    global _async_engine, _AsyncSessionLocal, _async_engine_url, _async_writer, _async_replica_engines
+
+    writer = _writer
+    if writer is not None:
+        # Single-writer mode: read-only connections, writes go to the writer thread
+        url = settings.sqlite_readonly_url
+    else:
+        url = settings.sqlite_url if _using_sqlite else settings.DB_URL
+    if _async_engine is not None and _async_engine_url == url and _async_writer is writer:
+        return
+
+    old_engine = _async_engine
+    old_replicas = _async_replica_engines
+    _async_replica_engines = []
+    if url.startswith("sqlite"):
+        readonly = {}
+        connect_args = {"timeout": settings.SQLITE_BUSY_TIMEOUT_MS / 1000, "isolation_level": SQLITE_DRIVER_BEGIN}
+        if writer is not None:
+            # Ending a read transaction must never need the event loop: it may
+            # happen on the writer thread when a flush there fails
+            readonly = {"isolation_level": "AUTOCOMMIT", "skip_autocommit_rollback": True}
+            del connect_args["isolation_level"]
+        _async_engine = instrument(create_async_engine(
+            _async_url(url),
+            poolclass=InstrumentedAsyncQueuePool,
+            connect_args=connect_args,
+            **readonly,
+            **sqlite_pool_options()
+        ), "sqlite_readonly_async" if writer is not None else "sqlite_async")
+        event.listen(_async_engine.sync_engine, "connect", _apply_sqlite_pragmas)
+    else:
+        _async_engine = instrument(create_async_engine(
+            _async_url(url),
+            poolclass=InstrumentedAsyncQueuePool,
+            pool_pre_ping=True,
+            connect_args={"connect_timeout": 5},
+            **pool_options()
+        ), "postgresql_async")
+        _async_replica_engines = [
+            instrument(create_async_engine(
+                _async_url(replica_url),
+                poolclass=InstrumentedAsyncQueuePool,
+                pool_pre_ping=True,
+                connect_args={"connect_timeout": 5},
+                **pool_options()
+            ), f"replica_{i}_async")
+            for i, replica_url in enumerate(settings.replica_urls_list)
+        ]
+    if writer is not None:
+        _AsyncSessionLocal = async_sessionmaker(
+            _async_engine, class_=SingleWriterAsyncSession, sync_session_class=SingleWriterSession,
+            writer=writer, join_transaction_mode="rollback_only",
+            autoflush=False, expire_on_commit=False
+        )
+    else:
+        # RoutingSession binds the sync facade of each async engine
+        _AsyncSessionLocal = async_sessionmaker(
+            _async_engine, class_=AsyncSession, sync_session_class=RoutingSession,
+            replicas=ReplicaSet([engine.sync_engine for engine in _async_replica_engines]),
+            autoflush=False, expire_on_commit=False
+        )
+    _async_engine_url = url
+    _async_writer = writer
+    logger.info("async_engine_initialized", sqlite=_using_sqlite, single_writer=writer is not None)
+
+    if old_engine is not None:
+        await old_engine.dispose()
+    for engine in old_replicas:
+        await engine.dispose()
+
+
+async def get_async_db(request: Request = None, response: Response = None):
+    """Get async database session for `async def` routes"""
+    await _ensure_async_engine()
+
+    async with _AsyncSessionLocal() as db:
+        if request is not None:
+            route_session(db, request, response)
+        try:
+            yield db
+        except (OperationalError, DisconnectionError) as e:
+            logger.error("async_database_session_error", error=str(e))
+            # The connection test blocks - keep it off the event loop
+            await run_in_threadpool(_handle_session_error, db)
+            raise
+
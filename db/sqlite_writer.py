@@ -0,0 +1,388 @@
+"""Single-writer mode for the SQLite fallback.
+
+SQLite allows one writer at a time, so instead of letting every threadpool
+worker fight for the lock, write transactions are handed to one dedicated
+thread. It owns the only read-write connection, drains a bounded queue and
+commits several jobs in one transaction (group commit); each job runs in its
+own SAVEPOINT so a failing job does not take the rest of the batch with it.
+Reads go through a pool of read-only connections.
+
+Once the writer is stopped, or its thread dies, queued jobs fail and new
+ones are refused with 503 straight away; a job that is not committed within
+SQLITE_WRITER_JOB_TIMEOUT_SEC fails too, so no request waits forever.
+
+Both session flavours write through the writer: ``SingleWriterSession``
+(``get_db``) and ``SingleWriterAsyncSession`` (``get_async_db``). Work that
+must land atomically - several statements, or a flush plus bulk DML - goes
+through ``run_write``/``run_write_async`` as one writer job.
+"""
+import queue
+import threading
+import time
+from typing import Any, Callable, List, Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy.engine import FrozenResult, Result
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+import structlog
+
+from core.config import settings
+
+logger = structlog.get_logger()
+
+
+class _WriteJob:
+    __slots__ = ("fn", "done", "result", "error", "abandoned")
+
+    def __init__(self, fn: Callable):
+        self.fn = fn
+        self.done = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+        self.abandoned = False  # the caller gave up waiting; skip it if it has not started
+
+
+def _unavailable(detail: str) -> HTTPException:
+    return HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=detail)
+
+
+class SQLiteWriter:
+    """Dedicated writer thread with a bounded queue and group commit"""
+
+    def __init__(self, engine, queue_size: int, batch_size: int):
+        self.engine = engine
+        self.batch_size = batch_size
+        self.connection = None
+        self._queue: "queue.Queue[Optional[_WriteJob]]" = queue.Queue(maxsize=queue_size)
+        self._thread: Optional[threading.Thread] = None
+        self._ready = threading.Event()
+        self._stopped = False
+        self.commits = 0
+        self.jobs = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.max_batch = 0
+
+    @property
+    def stopped(self) -> bool:
+        return self._stopped
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="sqlite-writer", daemon=True)
+        self._thread.start()
+        self._ready.wait(5)
+        if self._stopped:
+            logger.error("sqlite_writer_start_failed")
+            return
+        logger.info("sqlite_writer_started", queue_size=self._queue.maxsize, batch_size=self.batch_size)
+
+    def stop(self, timeout: float = 5.0):
+        """Refuse new jobs, fail the queued ones and let the current batch finish"""
+        if self._thread is None or self._stopped:
+            self._stopped = True
+            return
+        self._stopped = True
+        self._fail_pending()
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            pass  # refilled by racing submits; the writer sees _stopped after its batch
+        # _thread stays set: if the join times out, the batch still running
+        # keeps recognising its own thread
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            logger.warning("sqlite_writer_stop_timeout", timeout=timeout)
+        logger.info("sqlite_writer_stopped", commits=self.commits, jobs=self.jobs)
+
+    def _fail_pending(self):
+        """Fail every job still in the queue; they never ran"""
+        failed = 0
+        while True:
+            try:
+                job = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if job is not None:
+                job.error = _unavailable("Database writer is stopped, please retry")
+                job.done.set()
+                failed += 1
+        if failed:
+            logger.warning("sqlite_writer_jobs_failed", jobs=failed)
+
+    def on_writer_thread(self) -> bool:
+        return threading.current_thread() is self._thread
+
+    def submit(self, fn: Callable[[Any], Any]) -> Any:
+        """Run ``fn(connection)`` on the writer thread and wait for its batch to commit"""
+        if self.on_writer_thread():
+            return fn(self.connection)
+        if self._stopped:
+            raise _unavailable("Database writer is stopped, please retry")
+
+        job = _WriteJob(fn)
+        try:
+            self._queue.put(job, timeout=settings.SQLITE_WRITER_SUBMIT_TIMEOUT_SEC)
+        except queue.Full:
+            self.rejected += 1
+            logger.warning("sqlite_writer_queue_full", depth=self._queue.qsize())
+            raise _unavailable("Database is busy, please retry")
+        if self._stopped:
+            # Stopped between the check and the put: nobody else will drain it
+            self._fail_pending()
+        if not job.done.wait(settings.SQLITE_WRITER_JOB_TIMEOUT_SEC):
+            job.abandoned = True
+            self.timed_out += 1
+            logger.error("sqlite_writer_job_timeout", timeout=settings.SQLITE_WRITER_JOB_TIMEOUT_SEC)
+            raise _unavailable("Database write timed out, please retry")
+        if job.error is not None:
+            raise job.error
+        return job.result
+
+    def _drain(self, first: _WriteJob) -> List[Optional[_WriteJob]]:
+        batch = [first]
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        try:
+            with self.engine.connect() as conn:
+                self.connection = conn
+                self._ready.set()
+                running = True
+                while running:
+                    batch = self._drain(self._queue.get())
+                    if None in batch or self._stopped:
+                        running = False
+                        batch = [job for job in batch if job is not None]
+                    if batch:
+                        self._commit_batch(conn, batch)
+        except BaseException as e:
+            logger.error("sqlite_writer_died", error=str(e), error_type=type(e).__name__)
+        finally:
+            # Whatever ended the thread, nothing queued behind it may wait forever
+            self._stopped = True
+            self.connection = None
+            self._ready.set()
+            self._fail_pending()
+
+    def _commit_batch(self, conn, batch: List[_WriteJob]):
+        started = time.perf_counter()
+        try:
+            with conn.begin():
+                for job in batch:
+                    if job.abandoned:
+                        job.error = _unavailable("Database write timed out, please retry")
+                        continue
+                    savepoint = conn.begin_nested()
+                    try:
+                        job.result = job.fn(conn)
+                        if savepoint.is_active:
+                            savepoint.commit()
+                    except BaseException as e:
+                        if savepoint.is_active:
+                            savepoint.rollback()
+                        job.error = e
+        except BaseException as e:
+            logger.error("sqlite_writer_commit_failed", error=str(e), batch=len(batch))
+            for job in batch:
+                if job.error is None:
+                    job.error = e
+        finally:
+            self.commits += 1
+            self.jobs += len(batch)
+            self.max_batch = max(self.max_batch, len(batch))
+            for job in batch:
+                job.done.set()
+        if len(batch) > 1:
+            logger.debug("sqlite_group_commit", batch=len(batch), ms=round((time.perf_counter() - started) * 1000, 2))
+
+    def stats(self) -> dict:
+        return {
+            "queue_depth": self._queue.qsize(),
+            "queue_size": self._queue.maxsize,
+            "commits": self.commits,
+            "jobs": self.jobs,
+            "avg_batch": round(self.jobs / self.commits, 2) if self.commits else 0.0,
+            "max_batch": self.max_batch,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "stopped": self._stopped,
+        }
+
+
+def _is_dml(statement) -> bool:
+    return getattr(statement, "is_dml", False)
+
+
+def _freeze(result):
+    """Results leave the writer thread frozen; ones without rows (UPDATE without RETURNING) as they are"""
+    if isinstance(result, Result) and getattr(result, "returns_rows", True):
+        return result.freeze()
+    return result
+
+
+def _thaw(result):
+    return result() if isinstance(result, FrozenResult) else result
+
+
+class SingleWriterSession(Session):
+    """Session that reads from the read-only pool and commits through the writer thread.
+
+    On the writer thread every statement goes to the writer's connection.
+    """
+
+    def __init__(self, *args, writer: Optional[SQLiteWriter] = None, **kwargs):
+        # The session works in its own SAVEPOINT on the writer connection and
+        # never commits the writer's batch transaction
+        kwargs.setdefault("join_transaction_mode", "create_savepoint")
+        super().__init__(*args, **kwargs)
+        self.writer = writer
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if self.writer is not None and self.writer.on_writer_thread():
+            return self.writer.connection
+        return super().get_bind(mapper=mapper, clause=clause, **kw)
+
+    def _off_writer(self) -> bool:
+        return self.writer is not None and not self.writer.on_writer_thread()
+
+    def commit(self):
+        if self.writer is None or not (self.new or self.dirty or self.deleted):
+            return super().commit()
+        # Flush and commit run on the writer thread inside the batch's SAVEPOINT
+        self.writer.submit(lambda conn: Session.commit(self))
+
+    # Bulk INSERT/UPDATE/DELETE cannot run on a read-only connection; the
+    # statement (and anything pending) commits with the writer's next batch
+
+    def execute(self, statement, *args, **kwargs):
+        if _is_dml(statement) and self._off_writer():
+            return self._submit_statement(statement, *args, **kwargs)
+        return super().execute(statement, *args, **kwargs)
+
+    def scalars(self, statement, *args, **kwargs):
+        if _is_dml(statement) and self._off_writer():
+            return self._submit_statement(statement, *args, **kwargs).scalars()
+        return super().scalars(statement, *args, **kwargs)
+
+    def scalar(self, statement, *args, **kwargs):
+        if _is_dml(statement) and self._off_writer():
+            return self._submit_statement(statement, *args, **kwargs).scalar()
+        return super().scalar(statement, *args, **kwargs)
+
+    def _submit_statement(self, statement, *args, **kwargs):
+        return _thaw(self.writer.submit(lambda conn: self._execute_and_commit(statement, *args, **kwargs)))
+
+    def _execute_and_commit(self, statement, *args, **kwargs):
+        result = _freeze(Session.execute(self, statement, *args, **kwargs))
+        Session.commit(self)
+        return result
+
+    def write(self, fn: Callable[[Session], Any]) -> Any:
+        """Run ``fn(self)`` and commit it as one writer job: all of it or none"""
+        return _thaw(self.writer.submit(lambda conn: self._run_and_commit(fn)))
+
+    def _run_and_commit(self, fn):
+        try:
+            result = fn(self)
+            result = _freeze(result)
+            Session.commit(self)
+            return result
+        except BaseException:
+            # Release this session's SAVEPOINT here, on the writer thread
+            Session.rollback(self)
+            raise
+
+
+class SingleWriterAsyncSession(AsyncSession):
+    """AsyncSession whose flushes and DML run on the writer thread.
+
+    Reads stay on aiosqlite connections to the read-only file. Their engine
+    runs in AUTOCOMMIT with skip_autocommit_rollback, so a rollback reaching
+    them from the writer thread (a failed flush) never calls into the driver,
+    which only works on the event loop. The sync session joins each writer
+    job's SAVEPOINT without owning it (``join_transaction_mode="rollback_only"``),
+    so the job commits with the batch and the rest of ``commit()`` - the read
+    connection - finishes back on the event loop.
+    """
+
+    @property
+    def writer(self) -> SQLiteWriter:
+        return self.sync_session.writer
+
+    def _pending(self) -> bool:
+        return bool(self.new or self.dirty or self.deleted)
+
+    async def _submit(self, fn: Callable[[Session], Any]) -> Any:
+        def job(conn):
+            try:
+                result = fn(self.sync_session)
+                result = _freeze(result)
+                Session.flush(self.sync_session)
+                return result
+            except BaseException:
+                # Release the joined SAVEPOINT here, before the writer closes it,
+                # and drop what the session thinks it wrote
+                Session.rollback(self.sync_session)
+                raise
+
+        return _thaw(await run_in_threadpool(self.writer.submit, job))
+
+    async def flush(self, objects=None):
+        if self._pending():
+            await self._submit(lambda session: Session.flush(session, objects))
+
+    async def commit(self):
+        if self._pending():
+            await self._submit(lambda session: None)
+        await super().commit()
+
+    async def execute(self, statement, *args, **kwargs):
+        if _is_dml(statement):
+            return await self._submit(lambda session: Session.execute(session, statement, *args, **kwargs))
+        return await super().execute(statement, *args, **kwargs)
+
+    async def scalars(self, statement, *args, **kwargs):
+        if _is_dml(statement):
+            return (await self.execute(statement, *args, **kwargs)).scalars()
+        return await super().scalars(statement, *args, **kwargs)
+
+    async def scalar(self, statement, *args, **kwargs):
+        if _is_dml(statement):
+            return (await self.execute(statement, *args, **kwargs)).scalar()
+        return await super().scalar(statement, *args, **kwargs)
+
+    async def write(self, fn: Callable[[Session], Any]) -> Any:
+        """Run ``fn(sync_session)`` as one writer job, then commit"""
+        result = await self._submit(fn)
+        await super().commit()
+        return result
+
+
+def run_write(db: Session, fn: Callable[[Session], Any]) -> Any:
+    """Run ``fn(db)`` and commit, as one unit.
+
+    In single-writer mode that is one writer job, so every statement ``fn``
+    sends (flushes, bulk DML, journal entries) commits together or not at
+    all; elsewhere it is ``fn(db)`` followed by ``db.commit()``.
+    """
+    if isinstance(db, SingleWriterSession) and db.writer is not None:
+        return db.write(fn)
+    result = fn(db)
+    db.commit()
+    return result
+
+
+async def run_write_async(db: AsyncSession, fn: Callable[[Session], Any]) -> Any:
+    """``run_write`` for an AsyncSession; ``fn`` gets the sync session, as with run_sync"""
+    if isinstance(db, SingleWriterAsyncSession):
+        return await db.write(fn)
+    result = await db.run_sync(fn)
+    await db.commit()
+    return result
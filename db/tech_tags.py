@@ -0,0 +1,119 @@
+"""Normalized tech tags of projects and their SQLite lookup tables.
+
+``Project.tech_tags`` is ``tech_stack`` trimmed, lowercased and
+de-duplicated, kept in step by the model whenever ``tech_stack`` is set.
+Filters and counts run on it, so "React" and "react " are one tag.
+
+PostgreSQL answers tag filters from a GIN index on the array (``@>`` for
+all-of, ``&&`` for any-of). SQLite can't index inside a JSON value, so
+triggers mirror every project's tags into ``project_tech_tags`` (tag,
+project_id).
+
+Both backends keep per-tag totals in ``project_tech_tag_counts`` with
+triggers on ``projects`` (the PostgreSQL ones come from the migration), so
+counts never scan projects and stay right for journal replays and bulk
+writes. Like the change journal, the SQLite tables sit outside
+Base.metadata: they are derived from ``projects`` and rebuilt from it
+whenever their triggers are missing (a file from before they existed, or
+tables recreated from models).
+"""
+import json
+from typing import Iterable, List, Optional
+
+from sqlalchemy import Column, Integer, MetaData, String, Table
+import structlog
+
+logger = structlog.get_logger()
+
+tag_metadata = MetaData()
+
+project_tech_tags = Table(
+    "project_tech_tags", tag_metadata,
+    Column("tag", String, primary_key=True),
+    Column("project_id", Integer, primary_key=True),
+    sqlite_with_rowid=False,
+)
+
+project_tech_tag_counts = Table(
+    "project_tech_tag_counts", tag_metadata,
+    Column("tag", String, primary_key=True),
+    Column("projects", Integer, nullable=False),
+    sqlite_with_rowid=False,
+)
+
+# Deletes go through the (tag, project_id) primary key: old.tech_tags lists the rows
+_TRIGGERS = {
+    "projects_tech_tags_insert": """
+        CREATE TRIGGER projects_tech_tags_insert AFTER INSERT ON projects BEGIN
+            INSERT OR IGNORE INTO project_tech_tags (tag, project_id)
+            SELECT value, new.id FROM json_each(new.tech_tags);
+        END""",
+    "projects_tech_tags_update": """
+        CREATE TRIGGER projects_tech_tags_update AFTER UPDATE OF tech_tags ON projects BEGIN
+            DELETE FROM project_tech_tags
+            WHERE project_id = old.id AND tag IN (SELECT value FROM json_each(old.tech_tags));
+            INSERT OR IGNORE INTO project_tech_tags (tag, project_id)
+            SELECT value, new.id FROM json_each(new.tech_tags);
+        END""",
+    "projects_tech_tags_delete": """
+        CREATE TRIGGER projects_tech_tags_delete AFTER DELETE ON projects BEGIN
+            DELETE FROM project_tech_tags
+            WHERE project_id = old.id AND tag IN (SELECT value FROM json_each(old.tech_tags));
+        END""",
+    "project_tech_tags_count_insert": """
+        CREATE TRIGGER project_tech_tags_count_insert AFTER INSERT ON project_tech_tags BEGIN
+            INSERT INTO project_tech_tag_counts (tag, projects) VALUES (new.tag, 1)
+            ON CONFLICT (tag) DO UPDATE SET projects = projects + 1;
+        END""",
+    "project_tech_tags_count_delete": """
+        CREATE TRIGGER project_tech_tags_count_delete AFTER DELETE ON project_tech_tags BEGIN
+            UPDATE project_tech_tag_counts SET projects = projects - 1 WHERE tag = old.tag;
+            DELETE FROM project_tech_tag_counts WHERE tag = old.tag AND projects <= 0;
+        END""",
+}
+
+
+def normalize_tags(values: Optional[Iterable[str]]) -> List[str]:
+    """Trimmed, lowercased, without blanks or repeats, in first-seen order"""
+    tags = []
+    for value in values or []:
+        tag = str(value).strip().lower()
+        if tag and tag not in tags:
+            tags.append(tag)
+    return tags
+
+
+def ensure_sqlite_tables(engine):
+    """Create the SQLite tag tables and triggers, rebuilding them if triggers are missing"""
+    tag_metadata.create_all(bind=engine)
+    with engine.begin() as connection:
+        present = set(connection.exec_driver_sql(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger'"
+        ).scalars())
+        if present >= set(_TRIGGERS):
+            return
+
+        for name in _TRIGGERS:
+            connection.exec_driver_sql(f"DROP TRIGGER IF EXISTS {name}")
+        connection.execute(project_tech_tags.delete())
+        connection.execute(project_tech_tag_counts.delete())
+
+        # Rows written before tech_tags existed: normalize the same way the model does
+        stale = connection.exec_driver_sql(
+            "SELECT id, tech_stack FROM projects WHERE tech_tags IS NULL"
+        ).all()
+        if stale:
+            connection.exec_driver_sql(
+                "UPDATE projects SET tech_tags = ? WHERE id = ?",
+                [(json.dumps(normalize_tags(json.loads(stack) if stack else [])), project_id)
+                 for project_id, stack in stale]
+            )
+
+        for ddl in _TRIGGERS.values():
+            connection.exec_driver_sql(ddl)
+        connection.exec_driver_sql(
+            "INSERT OR IGNORE INTO project_tech_tags (tag, project_id) "
+            "SELECT value, projects.id FROM projects, json_each(projects.tech_tags)"
+        )
+        tagged = connection.exec_driver_sql("SELECT count(*) FROM project_tech_tags").scalar()
+    logger.info("sqlite_tech_tags_rebuilt", backfilled=len(stale), tags=tagged)
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""Check that the hot service queries are answered from an index.
+
+Seeds a little data inside a transaction, runs the service calls behind the
+busiest endpoints, EXPLAINs every statement they send and rolls everything
+back. Exits 1 if a statement scans a whole table.
+
+Throwaway SQLite database by default, or the database in DB_URL (migrated):
+
+    JWT_SECRET=x python explain_queries.py
+    JWT_SECRET=x DB_URL=postgresql+psycopg://... python explain_queries.py
+"""
+import os
+import re
+import sys
+import tempfile
+from datetime import datetime, timedelta, timezone
+
+if not os.environ.get("DB_URL"):
+    os.environ.setdefault("SQLITE_DB_PATH", os.path.join(tempfile.mkdtemp(), "explain_queries.db"))
+    os.environ["DB_URL"] = ""
+
+from sqlalchemy import event, insert
+from sqlalchemy.orm import Session
+
+from db import session as db_session
+from models.application import Application
+from models.hackathon import Hackathon
+from models.hackathon_participant import HackathonParticipant
+from models.membership import Membership
+from models.notification import Notification
+from models.project import Project
+from models.task import Task
+from models.user import User
+from services.application_service import ApplicationService
+from services.notification_service import NotificationService, _mark_read_query
+from services.project_service import ProjectService
+from services.task_service import TaskService
+
+USERS = 50
+PROJECTS = 40
+
+
+def _seed(db: Session) -> dict:
+    now = datetime.now(timezone.utc)
+    user_ids = db.scalars(insert(User).returning(User.id), [
+        {"email": f"explain{i}@example.com", "password_hash": "x", "name": f"Explain {i}", "skills": []}
+        for i in range(USERS)
+    ]).all()
+    project_ids = db.scalars(insert(Project).returning(Project.id), [
+        {"title": f"P{i}", "description": "-", "created_by": user_ids[i % USERS],
+         "status": ("recruiting", "active", "completed")[i % 3], "tech_stack": []}
+        for i in range(PROJECTS)
+    ]).all()
+    hackathon_id = db.scalar(insert(Hackathon).returning(Hackathon.id).values(
+        title="H", start_at=now, end_at=now + timedelta(days=2), created_by=user_ids[0]
+    ))
+    db.execute(insert(Task), [
+        {"project_id": project_id, "title": f"T{n}"} for project_id in project_ids for n in range(5)
+    ])
+    db.execute(insert(Membership), [
+        {"project_id": project_ids[i % PROJECTS], "user_id": user_id, "role_in_team": "dev"}
+        for i, user_id in enumerate(user_ids)
+    ])
+    db.execute(insert(Application), [
+        {"type": "project", "target_id": project_ids[(i + n) % PROJECTS], "applicant_id": user_id, "status": "pending"}
+        for i, user_id in enumerate(user_ids) for n in range(3)
+    ])
+    db.execute(insert(HackathonParticipant), [{"hackathon_id": hackathon_id, "user_id": u} for u in user_ids])
+    db.execute(insert(Notification), [
+        {"user_id": user_id, "type": "invite", "payload": {}, "is_read": n % 4 != 0}
+        for user_id in user_ids for n in range(20)
+    ])
+    db.flush()
+    return {"user": user_ids[1], "project": project_ids[1], "hackathon": hackathon_id}
+
+
+def _calls(ids: dict):
+    user, project, hackathon = ids["user"], ids["project"], ids["hackathon"]
+    return [
+        ("tasks of a project", lambda db: TaskService.list_by_project(db, project)),
+        ("applications of a project", lambda db: ApplicationService.list_by_project(db, project)),
+        ("applications of a hackathon", lambda db: ApplicationService.list_by_hackathon(db, hackathon)),
+        ("applications of a user", lambda db: ApplicationService.list_by_user(db, user)),
+        ("membership check", lambda db: db.query(Membership).filter(
+            Membership.project_id == project, Membership.user_id == user).first()),
+        ("participant check", lambda db: db.query(HackathonParticipant).filter(
+            HackathonParticipant.hackathon_id == hackathon, HackathonParticipant.user_id == user).first()),
+        ("projects by status", lambda db: ProjectService.list_projects(db, status="active")),
+        ("notification feed", lambda db: NotificationService.list_page(db, user)),
+        ("unread feed", lambda db: NotificationService.list_page(db, user, unread_only=True)),
+        ("mark all read", lambda db: db.execute(_mark_read_query(user, None, None, None))),
+    ]
+
+
+def _explain(connection, statement: str, parameters) -> str:
+    if connection.dialect.name == "sqlite":
+        rows = connection.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters).all()
+        return "\n".join(row[-1] for row in rows)
+    return "\n".join(row[0] for row in connection.exec_driver_sql("EXPLAIN " + statement, parameters))
+
+
+def _full_scan(plan: str) -> bool:
+    # SQLite: "SCAN tasks" (vs "SEARCH tasks USING INDEX ..."); PostgreSQL: "Seq Scan on tasks"
+    return bool(re.search(r"^\s*SCAN \w+$|Seq Scan on", plan, re.MULTILINE))
+
+
+def main() -> int:
+    db_session.init_engine()
+    failures = 0
+    with db_session.get_engine().connect() as connection:
+        transaction = connection.begin()
+        db = Session(bind=connection, join_transaction_mode="create_savepoint")
+        try:
+            ids = _seed(db)
+            connection.exec_driver_sql("ANALYZE")
+            if connection.dialect.name == "postgresql":
+                # Seeded tables are tiny; make the planner show which index it would use
+                connection.exec_driver_sql("SET LOCAL enable_seqscan = off")
+
+            for label, call in _calls(ids):
+                statements = []
+
+                def capture(conn, cursor, statement, parameters, context, executemany):
+                    statements.append((statement, parameters))
+
+                event.listen(connection, "before_cursor_execute", capture)
+                try:
+                    call(db)
+                finally:
+                    event.remove(connection, "before_cursor_execute", capture)
+
+                for statement, parameters in statements:
+                    if statement.lstrip().upper().startswith(("SAVEPOINT", "RELEASE", "ROLLBACK")):
+                        continue
+                    plan = _explain(connection, statement, parameters)
+                    bad = _full_scan(plan)
+                    failures += bad
+                    indexes = sorted(set(re.findall(r"(?:INDEX|Index Scan(?: Backward)? using|Index Only Scan using|Bitmap Index Scan on) (\w+)", plan)))
+                    print(f"{'FULL SCAN' if bad else 'ok':<9}  {label:<28}  {', '.join(indexes) or '-'}")
+                    if bad:
+                        print("    " + plan.replace("\n", "\n    "))
+        finally:
+            db.close()
+            transaction.rollback()
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
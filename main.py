@@ -1,15 +1,26 @@
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Depends, Request
+import time
+_import_started = time.perf_counter()  # startup report: module imports phase
+
+from contextlib import asynccontextmanager, contextmanager
+from fastapi import FastAPI, APIRouter, WebSocket, WebSocketDisconnect, Depends, Request
+from starlette.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.exceptions import RequestValidationError
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import configure_mappers
 import structlog
 import uvicorn  # <-- add this
 from core.config import settings
 from db.session import get_db
+from db import session as db_session
 from api.v1 import auth, users, projects, tasks, applications, memberships, notifications, hackathons, admin
 from ws.manager import manager
+from ws.streams import replay_missed
+from core.pubsub import broker
 from core.security import decode_token
+from core.password_pool import password_pool
+from services.token_revocation import revocations, load_revocations, resync as revocation_resync
 from core.exceptions import (
     api_exception_handler,
     validation_exception_handler,
@@ -38,57 +49,118 @@ structlog.configure(
 
 logger = structlog.get_logger()
 
-app = FastAPI(
-    title="TeamUp API",
-    version="1.0.0",
-    description="Backend API for TeamUp - Team Formation Platform"
-)
+# Root, health and websocket routes; API routers are added in create_app()
+router = APIRouter()
 
-# Exception handlers
-app.add_exception_handler(RequestValidationError, validation_exception_handler)
-app.add_exception_handler(SQLAlchemyError, sqlalchemy_exception_handler)
-app.add_exception_handler(ValueError, general_exception_handler)  # Handle ValueError before general Exception
-app.add_exception_handler(Exception, general_exception_handler)
-
-# CORS
-# In development, allow all origins for easier local network testing
-if settings.APP_ENV == "dev":
-    app.add_middleware(
-        CORSMiddleware,
-        allow_origins=["*"],  # Allow all origins in dev mode
-        allow_credentials=True,
-        allow_methods=["GET", "POST", "PUT", "DELETE", "PATCH", "OPTIONS"],
-        allow_headers=["*"],
-        expose_headers=["*"],
-    )
-else:
-    app.add_middleware(
-        CORSMiddleware,
-        allow_origins=settings.cors_origins_list,
-        allow_credentials=True,
-        allow_methods=["GET", "POST", "PUT", "DELETE", "PATCH", "OPTIONS"],
-        allow_headers=["*"],
-        expose_headers=["*"],
+
+@contextmanager
+def _startup_phase(phases: dict, name: str):
+    """Time one startup phase for the startup report"""
+    started = time.perf_counter()
+    yield
+    phases[name] = round((time.perf_counter() - started) * 1000, 1)
+    logger.info("startup_phase", phase=name, ms=phases[name])
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    phases = {"import": round((time.perf_counter() - _import_started) * 1000, 1)}
+    started = time.perf_counter()
+
+    with _startup_phase(phases, "database_engine"):
+        await run_in_threadpool(db_session.init_engine)
+    with _startup_phase(phases, "pool_prefill"):
+        await run_in_threadpool(db_session.prefill_pool, settings.DB_POOL_PREFILL)
+    with _startup_phase(phases, "async_pool_prefill"):
+        await db_session.prefill_async_pool(settings.DB_POOL_PREFILL)
+    with _startup_phase(phases, "pubsub"):
+        # cross-worker cache invalidation, token revocation and WS fan-out
+        broker.start()
+        manager.start()
+    with _startup_phase(phases, "token_revocations"):
+        await run_in_threadpool(load_revocations)
+        revocation_resync.start()
+    # Pay first-request costs before the port reports ready
+    with _startup_phase(phases, "orm_mappers"):
+        configure_mappers()  # relationship setup otherwise runs on the first query
+    with _startup_phase(phases, "openapi_schemas"):
+        app.openapi()  # builds every Pydantic JSON schema; cached for /docs
+    with _startup_phase(phases, "password_pool"):
+        await password_pool.start()  # spawns bcrypt workers, calibrates the cost
+
+    app.state.startup_report = {
+        "phases_ms": phases,
+        "total_ms": round((time.perf_counter() - started) * 1000, 1),
+        "database": "sqlite" if db_session.is_using_sqlite() else "postgresql",
+    }
+    logger.info("startup_complete", **app.state.startup_report)
+
+    yield
+
+    manager.stop()
+    await run_in_threadpool(revocation_resync.stop)
+    await run_in_threadpool(password_pool.stop)
+    await run_in_threadpool(broker.stop)
+    await db_session.shutdown_engine()
+
+
+def create_app() -> FastAPI:
+    app = FastAPI(
+        title="TeamUp API",
+        version="1.0.0",
+        description="Backend API for TeamUp - Team Formation Platform",
+        lifespan=lifespan
     )
 
-# Include routers
-app.include_router(auth.router, prefix="/api/v1")
-app.include_router(users.router, prefix="/api/v1")
-app.include_router(projects.router, prefix="/api/v1")
-app.include_router(tasks.router, prefix="/api/v1")
-app.include_router(applications.router, prefix="/api/v1")
-app.include_router(memberships.router, prefix="/api/v1")
-app.include_router(notifications.router, prefix="/api/v1")
-app.include_router(hackathons.router, prefix="/api/v1")
-app.include_router(admin.router, prefix="/api/v1")
-
-@app.get("/")
+    # Exception handlers
+    app.add_exception_handler(RequestValidationError, validation_exception_handler)
+    app.add_exception_handler(SQLAlchemyError, sqlalchemy_exception_handler)
+    app.add_exception_handler(ValueError, general_exception_handler)  # Handle ValueError before general Exception
+    app.add_exception_handler(Exception, general_exception_handler)
+
+    # CORS
+    # In development, allow all origins for easier local network testing
+    if settings.APP_ENV == "dev":
+        app.add_middleware(
+            CORSMiddleware,
+            allow_origins=["*"],  # Allow all origins in dev mode
+            allow_credentials=True,
+            allow_methods=["GET", "POST", "PUT", "DELETE", "PATCH", "OPTIONS"],
+            allow_headers=["*"],
+            expose_headers=["*"],
+        )
+    else:
+        app.add_middleware(
+            CORSMiddleware,
+            allow_origins=settings.cors_origins_list,
+            allow_credentials=True,
+            allow_methods=["GET", "POST", "PUT", "DELETE", "PATCH", "OPTIONS"],
+            allow_headers=["*"],
+            expose_headers=["*"],
+        )
+
+    # Include routers
+    app.include_router(router)
+    app.include_router(auth.router, prefix="/api/v1")
+    app.include_router(users.router, prefix="/api/v1")
+    app.include_router(projects.router, prefix="/api/v1")
+    app.include_router(tasks.router, prefix="/api/v1")
+    app.include_router(applications.router, prefix="/api/v1")
+    app.include_router(memberships.router, prefix="/api/v1")
+    app.include_router(notifications.router, prefix="/api/v1")
+    app.include_router(hackathons.router, prefix="/api/v1")
+    app.include_router(admin.router, prefix="/api/v1")
+    return app
+
+
+@router.get("/")
 def read_root():
     return {"message": "TeamUp API", "version": "1.0.0"}
 
-@app.get("/health")
+@router.get("/health")
 def health_check():
     from db.session import is_using_sqlite, get_engine
+    from db import failover
     from sqlalchemy import text
     
     db_type = "sqlite" if is_using_sqlite() else "postgresql"
@@ -106,11 +178,12 @@ def health_check():
         "status": "healthy",
         "database": {
             "type": db_type,
-            "status": db_status
+            "status": db_status,
+            "circuit": failover.breaker.state
         }
     }
 
-@app.websocket("/ws/notifications/{user_id}")
+@router.websocket("/ws/notifications/{user_id}")
 async def websocket_endpoint(websocket: WebSocket, user_id: int):
     # Get token from query parameters
     token = websocket.query_params.get("token")
@@ -120,7 +193,7 @@ async def websocket_endpoint(websocket: WebSocket, user_id: int):
         return
     
     payload = decode_token(token)
-    if not payload or payload.get("type") != "access":
+    if not payload or payload.get("type") != "access" or revocations.is_revoked(payload):
         await websocket.close(code=4001, reason="Invalid token")
         return
     
@@ -129,17 +202,34 @@ async def websocket_endpoint(websocket: WebSocket, user_id: int):
         await websocket.close(code=4003, reason="User ID mismatch")
         return
 
-    await manager.connect(websocket, user_id)
-    logger.info("user_connected", user_id=user_id)
+    # Reconnect: replay notifications newer than the last id the client saw
+    last_seen_id = websocket.query_params.get("last_seen_id")
+    if last_seen_id is not None:
+        try:
+            last_seen_id = int(last_seen_id)
+        except ValueError:
+            await websocket.close(code=4002, reason="Invalid last_seen_id")
+            return
+
+    connection = await manager.connect(websocket, user_id, replay=last_seen_id is not None)
+    logger.info("user_connected", user_id=user_id, last_seen_id=last_seen_id)
+
+    if last_seen_id is not None:
+        await replay_missed(connection, user_id, last_seen_id)
 
     try:
         while True:
             data = await websocket.receive_text()
+            manager.touch(websocket)  # any frame, including "pong", counts as alive
             if data == "ping":
-                await websocket.send_text("pong")
+                manager.reply(websocket, "pong")
     except WebSocketDisconnect:
-        manager.disconnect(websocket, user_id)
         logger.info("user_disconnected", user_id=user_id)
+    finally:
+        # Also covers sockets closed by the server (heartbeat timeout, slow consumer)
+        manager.disconnect(websocket, user_id)
+
+app = create_app()
 
 # Run with python3 main.py
 if __name__ == "__main__":
@@ -8,6 +8,8 @@ from .application import Application  # noqa
 from .project_role_requirement import ProjectRoleRequirement  # noqa
 from .task_comment import TaskComment  # noqa
 from .hackathon_participant import HackathonParticipant  # noqa
+from .token_revocation import TokenRevocation  # noqa
+from .notification_counter import NotificationCounter  # noqa
 
 
 
@@ -20,4 +22,6 @@ __all__ = [
     "Hackathon",
     "Notification",
     "HackathonParticipant",
+    "TokenRevocation",
+    "NotificationCounter",
 ]
@@ -1,4 +1,4 @@
-from sqlalchemy import Integer, String, Text, DateTime, ForeignKey, func
+from sqlalchemy import Integer, String, Text, DateTime, ForeignKey, Index, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from db.base import Base
 
@@ -8,7 +8,7 @@ class Application(Base):
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     type: Mapped[str] = mapped_column(String, nullable=False)  # project | hackathon
     target_id: Mapped[int] = mapped_column(Integer, nullable=False)  # id проекта или хакатона
-    applicant_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    applicant_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
 
     message: Mapped[str | None] = mapped_column(Text, nullable=True)
     status: Mapped[str] = mapped_column(String, nullable=False, default="pending")  # pending|approved|rejected
@@ -17,3 +17,8 @@ class Application(Base):
     updated_at: Mapped["DateTime | None"] = mapped_column(DateTime(timezone=True), nullable=True, onupdate=func.now())
 
     applicant = relationship("User")
+
+    __table_args__ = (
+        # Applications of a project/hackathon by status, and the duplicate check
+        Index("ix_applications_type_target_id_status", "type", "target_id", "status"),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, func
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index, func
 from db.base import Base
 
 
@@ -11,4 +11,10 @@ class Membership(Base):
     role_in_team = Column(String, nullable=False)
     status = Column(String, nullable=False, default="active")  # active | invited
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    invited_by = Column(Integer, ForeignKey("users.id"), nullable=True)
\ No newline at end of file
+    invited_by = Column(Integer, ForeignKey("users.id"), nullable=True)
+
+    __table_args__ = (
+        Index("ix_memberships_project_status", "project_id", "status"),
+        # "my memberships" and the is-already-a-member check
+        Index("ix_memberships_user_id_project_id", "user_id", "project_id"),
+    )
\ No newline at end of file
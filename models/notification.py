@@ -1,26 +1,5 @@
-from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, ForeignKey, func
-from sqlalchemy import JSON
-from sqlalchemy.dialects.postgresql import JSONB as PG_JSONB
-
-def _get_json_type():
-    """Get JSON type compatible with database"""
-    try:
-        from core.config import settings
-        from sqlalchemy import create_engine, text
-        
-        if settings.DB_URL and settings.DB_URL.startswith(("postgresql", "postgres")):
-            try:
-                engine = create_engine(settings.DB_URL, connect_args={"connect_timeout": 2})
-                with engine.connect() as conn:
-                    conn.execute(text("SELECT 1"))
-                return PG_JSONB
-            except:
-                return JSON
-        else:
-            return JSON
-    except:
-        return JSON
-from db.base import Base
+from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, ForeignKey, Index, func, text
+from db.base import Base, JSONDocument
 
 
 class Notification(Base):
@@ -28,7 +7,19 @@ class Notification(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    type = Column(String, nullable=False)  # invite, application_status, task_done
-    payload = Column(_get_json_type(), nullable=True)
+    type = Column(String, nullable=False)  # invite, application_status, task_done, hackathon_announcement
+    payload = Column(JSONDocument(), nullable=True)
     is_read = Column(Boolean, default=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        # WebSocket reconnect replay: id > last_seen_id for one user, in id order
+        Index("ix_notifications_user_id_id", "user_id", "id"),
+        # Feed pages: keyset on (created_at, id), newest first
+        Index("ix_notifications_user_id_created_at_id", "user_id", "created_at", "id"),
+        # Unread badge, unread-only feed and mark-all-read: only unread rows
+        Index(
+            "ix_notifications_user_id_unread", "user_id", "created_at", "id",
+            postgresql_where=text("is_read = false"), sqlite_where=text("is_read = 0")
+        ),
+    )
@@ -0,0 +1,19 @@
+from sqlalchemy import Integer, ForeignKey
+from sqlalchemy.orm import Mapped, mapped_column
+
+from db.base import Base
+
+
+class NotificationCounter(Base):
+    """Per-user unread notification count, kept in step with ``notifications``.
+
+    Updated in the same transaction as the notifications it counts, so the
+    unread badge is a primary-key read instead of a COUNT(*). A user without
+    a row has nothing unread.
+    """
+    __tablename__ = "notification_counters"
+
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
+    )
+    unread: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
@@ -1,26 +1,7 @@
-from sqlalchemy import Column, Integer, String, Text, Float, DateTime, ForeignKey, func, JSON
-from sqlalchemy.dialects.postgresql import ARRAY as PG_ARRAY
-from sqlalchemy.orm import relationship
-from db.base import Base
-
-def _get_array_type():
-    """Get appropriate array type based on database"""
-    try:
-        from core.config import settings
-        from sqlalchemy import create_engine, text
-        
-        if settings.DB_URL and settings.DB_URL.startswith(("postgresql", "postgres")):
-            try:
-                engine = create_engine(settings.DB_URL, connect_args={"connect_timeout": 2})
-                with engine.connect() as conn:
-                    conn.execute(text("SELECT 1"))
-                return PG_ARRAY(String)
-            except:
-                return JSON()
-        else:
-            return JSON()
-    except:
-        return JSON()
+from sqlalchemy import Column, Integer, String, Text, Float, DateTime, ForeignKey, Index, func
+from sqlalchemy.orm import relationship, validates
+from db.base import Base, StringArray
+from db.tech_tags import normalize_tags
 
 
 class Project(Base):
@@ -31,7 +12,8 @@ class Project(Base):
     description = Column(Text, nullable=False)
     created_by = Column(Integer, ForeignKey("users.id"), nullable=False)
     status = Column(String, nullable=False, default="recruiting")  # recruiting, active, completed
-    tech_stack = Column(_get_array_type(), default=list)
+    tech_stack = Column(StringArray(), default=list)
+    tech_tags = Column(StringArray(), default=list)  # normalized tech_stack, filtered and counted
     progress_percent = Column(Float, default=0.0)
     prize = Column(Text, nullable=True)  # Prize information
     deadline = Column(DateTime(timezone=True), nullable=True)  # Application deadline
@@ -41,3 +23,15 @@ class Project(Base):
     hackathon_id = Column(Integer, ForeignKey("hackathons.id", ondelete="SET NULL"), nullable=True)
     hackathon = relationship("Hackathon")
     role_requirements = relationship("ProjectRoleRequirement", back_populates="project", cascade="all, delete-orphan")
+
+    __table_args__ = (
+        # Listing by status, newest first
+        Index("ix_projects_status_created_at", "status", "created_at"),
+        # All-of/any-of tag filters; SQLite uses the project_tech_tags table instead
+        Index("ix_projects_tech_tags", "tech_tags", postgresql_using="gin").ddl_if(dialect="postgresql"),
+    )
+
+    @validates("tech_stack")
+    def _sync_tech_tags(self, key, value):
+        self.tech_tags = normalize_tags(value)
+        return value
@@ -0,0 +1,28 @@
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import Integer, String, DateTime, Float, ForeignKey, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from db.base import Base
+
+
+class TokenRevocation(Base):
+    """Revoked JWTs: one token (jti) or every token of a user issued before a cutoff.
+
+    Rows are only needed until the newest token they cover would have
+    expired anyway (expires_at); workers keep them in memory.
+    """
+    __tablename__ = "token_revocations"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    jti: Mapped[Optional[str]] = mapped_column(String(64), unique=True, nullable=True)
+    user_id: Mapped[Optional[int]] = mapped_column(
+        ForeignKey("users.id", ondelete="CASCADE"), nullable=True, index=True
+    )
+    # user-wide revocation: tokens with iat before this (unix seconds) are revoked
+    issued_before: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, index=True)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
@@ -1,6 +1,6 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from datetime import datetime
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 
 
 class NotificationResponse(BaseModel):
@@ -12,4 +12,21 @@ class NotificationResponse(BaseModel):
     created_at: datetime
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+
+class UnreadCountResponse(BaseModel):
+    unread: int
+
+
+class MarkReadRequest(BaseModel):
+    ids: List[int] = Field(min_length=1, max_length=500)
+
+
+class MarkAllReadRequest(BaseModel):
+    type: Optional[str] = None  # only notifications of this type
+    before_id: Optional[int] = None  # only ids up to and including this one
+
+
+class MarkReadResponse(UnreadCountResponse):
+    updated: int
@@ -44,3 +44,8 @@ class ProjectResponse(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class TechTagCount(BaseModel):
+    tag: str
+    projects: int
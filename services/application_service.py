@@ -1,6 +1,9 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import HTTPException, status, BackgroundTasks
 from typing import Optional
+from db.sqlite_writer import run_write, run_write_async
 from models.application import Application
 from models.membership import Membership
 from schemas.application import ApplicationCreate
@@ -112,6 +115,14 @@ class ApplicationService:
                 detail="Application already processed"
             )
 
+        # Membership, status and notification commit as one unit
+        run_write(db, lambda session: ApplicationService._approve(session, application, background_tasks))
+        db.refresh(application)
+
+        return application
+
+    @staticmethod
+    def _approve(db: Session, application: Application, background_tasks: Optional[BackgroundTasks]):
         if application.type == "project":
             # Create membership with status='active'
             membership = Membership(
@@ -131,20 +142,18 @@ class ApplicationService:
             db.add(participant)
 
         application.status = "approved"
-        db.commit()
-        db.refresh(application)
+        db.flush()
 
-        # Notify user
-        NotificationService.create(
+        # Notify user - in the same transaction as the approval
+        NotificationService.create_many(
             db=db,
-            user_id=application.applicant_id,
+            user_ids=[application.applicant_id],
             type="application_status",
             payload={"application_id": application.id, "type": application.type, "target_id": application.target_id, "status": "approved"},
-            background_tasks=background_tasks
+            background_tasks=background_tasks,
+            commit=False
         )
 
-        return application
-
     @staticmethod
     def reject(db: Session, application_id: int) -> Application:
         application = db.query(Application).filter(Application.id == application_id).first()
@@ -164,18 +173,173 @@ class ApplicationService:
 
     @staticmethod
     def list_by_project(db: Session, project_id: int):
-        return db.query(Application).filter(
+        return db.query(Application).options(selectinload(Application.applicant)).filter(
             Application.type == "project",
             Application.target_id == project_id
         ).all()
 
     @staticmethod
     def list_by_hackathon(db: Session, hackathon_id: int):
-        return db.query(Application).filter(
+        return db.query(Application).options(selectinload(Application.applicant)).filter(
             Application.type == "hackathon",
             Application.target_id == hackathon_id
         ).all()
 
     @staticmethod
     def list_by_user(db: Session, user_id: int):
-        return db.query(Application).filter(Application.applicant_id == user_id).all()
\ No newline at end of file
+        return db.query(Application).options(selectinload(Application.applicant)).filter(
+            Application.applicant_id == user_id
+        ).all()
+
+
+class AsyncApplicationService:
+    """AsyncSession counterpart of ApplicationService.
+
+    Returned applications have ``applicant`` eagerly loaded, since lazy loads
+    are not available on an AsyncSession.
+    """
+
+    @staticmethod
+    async def _get_target_creator_id(db: AsyncSession, type: str, target_id: int) -> Optional[int]:
+        from models.project import Project
+        from models.hackathon import Hackathon
+
+        if type == "project":
+            return await db.scalar(select(Project.created_by).where(Project.id == target_id))
+        if type == "hackathon":
+            return await db.scalar(select(Hackathon.created_by).where(Hackathon.id == target_id))
+        return None
+
+    @staticmethod
+    async def _get(db: AsyncSession, application_id: int) -> Optional[Application]:
+        return await db.scalar(
+            select(Application)
+            .options(selectinload(Application.applicant))
+            .where(Application.id == application_id)
+            .execution_options(populate_existing=True)
+        )
+
+    @staticmethod
+    async def create(db: AsyncSession, app_data: ApplicationCreate, applicant_id: int) -> Application:
+        # Check if already applied to this specific target
+        existing = await db.scalar(select(Application.id).where(
+            Application.type == app_data.type,
+            Application.target_id == app_data.target_id,
+            Application.applicant_id == applicant_id,
+            Application.status == "pending"
+        ))
+
+        if existing:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Already applied to this target"
+            )
+
+        # Only ONE active application per client
+        target_creator_id = await AsyncApplicationService._get_target_creator_id(db, app_data.type, app_data.target_id)
+        if target_creator_id:
+            active_apps = (await db.execute(select(Application.type, Application.target_id).where(
+                Application.applicant_id == applicant_id,
+                Application.status == "pending"
+            ))).all()
+
+            for app_type, app_target_id in active_apps:
+                app_creator_id = await AsyncApplicationService._get_target_creator_id(db, app_type, app_target_id)
+                if app_creator_id == target_creator_id:
+                    raise HTTPException(
+                        status_code=status.HTTP_400_BAD_REQUEST,
+                        detail="You already have an active application to a project/hackathon by this creator. Only one active application per client is allowed."
+                    )
+
+        # Check if already a member (for projects)
+        if app_data.type == "project":
+            existing_member = await db.scalar(select(Membership.id).where(
+                Membership.project_id == app_data.target_id,
+                Membership.user_id == applicant_id
+            ))
+
+            if existing_member:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Already a member of this project"
+                )
+        elif app_data.type == "hackathon":
+            from models.hackathon_participant import HackathonParticipant
+            existing_participant = await db.scalar(select(HackathonParticipant.id).where(
+                HackathonParticipant.hackathon_id == app_data.target_id,
+                HackathonParticipant.user_id == applicant_id
+            ))
+
+            if existing_participant:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Already a participant of this hackathon"
+                )
+
+        application = Application(
+            type=app_data.type,
+            target_id=app_data.target_id,
+            applicant_id=applicant_id,
+            message=app_data.message
+        )
+        db.add(application)
+        await db.commit()
+        return await AsyncApplicationService._get(db, application.id)
+
+    @staticmethod
+    async def approve(db: AsyncSession, application_id: int, background_tasks: Optional[BackgroundTasks] = None) -> Application:
+        application = await AsyncApplicationService._get(db, application_id)
+        if not application:
+            raise HTTPException(status_code=404, detail="Application not found")
+
+        if application.status != "pending":
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Application already processed"
+            )
+
+        # Same unit as ApplicationService.approve, run on the sync session
+        await run_write_async(db, lambda session: ApplicationService._approve(session, application, background_tasks))
+        application = await AsyncApplicationService._get(db, application_id)
+
+        return application
+
+    @staticmethod
+    async def reject(db: AsyncSession, application_id: int) -> Application:
+        application = await AsyncApplicationService._get(db, application_id)
+        if not application:
+            raise HTTPException(status_code=404, detail="Application not found")
+
+        if application.status != "pending":
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Application already processed"
+            )
+
+        application.status = "rejected"
+        await db.commit()
+        application = await AsyncApplicationService._get(db, application_id)
+        return application
+
+    @staticmethod
+    async def list_by_project(db: AsyncSession, project_id: int):
+        result = await db.scalars(select(Application).options(selectinload(Application.applicant)).where(
+            Application.type == "project",
+            Application.target_id == project_id
+        ))
+        return result.all()
+
+    @staticmethod
+    async def list_by_hackathon(db: AsyncSession, hackathon_id: int):
+        result = await db.scalars(select(Application).options(selectinload(Application.applicant)).where(
+            Application.type == "hackathon",
+            Application.target_id == hackathon_id
+        ))
+        return result.all()
+
+    @staticmethod
+    async def list_by_user(db: AsyncSession, user_id: int):
+        result = await db.scalars(
+            select(Application).options(selectinload(Application.applicant)).where(Application.applicant_id == user_id)
+        )
+        return result.all()
@@ -1,23 +1,30 @@
+from typing import Optional
+from sqlalchemy import select
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import HTTPException, status
 from models.user import User
 from schemas.user import UserCreate
 from schemas.auth import TokenResponse
-from core.security import hash_password, verify_password, create_access_token, create_refresh_token, decode_token
+from core.security import create_access_token, create_refresh_token, decode_token
+from core.password_pool import password_pool
+from services.token_revocation import revocations, TokenRevocationService
 
 
 class AuthService:
     @staticmethod
-    def register(db: Session, user_data: UserCreate) -> TokenResponse:
-        existing = db.query(User).filter(User.email == user_data.email).first()
+    def register(db: Session, user_data: UserCreate, client_ip: Optional[str] = None) -> TokenResponse:
+        existing = db.query(User.id).filter(User.email == user_data.email).first()
         if existing:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Email already registered"
             )
+        # Return the connection to the pool while the password is hashed
+        db.rollback()
 
         try:
-            hashed = hash_password(user_data.password)
+            hashed = password_pool.hash_from_thread(user_data.password, user_data.email, client_ip)
         except ValueError as e:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -35,7 +42,6 @@ class AuthService:
         db.add(user)
         try:
             db.commit()
-            db.refresh(user)
         except Exception as e:
             db.rollback()
             # Re-raise to let SQLAlchemy exception handler catch it
@@ -47,23 +53,34 @@ class AuthService:
         )
 
     @staticmethod
-    def login(db: Session, email: str, password: str) -> TokenResponse:
-        user = db.query(User).filter(User.email == email).first()
-        if not user or not verify_password(password, user.password_hash):
+    def login(db: Session, email: str, password: str, client_ip: Optional[str] = None) -> TokenResponse:
+        row = db.query(User.id, User.password_hash).filter(User.email == email).first()
+        db.rollback()  # nothing else to read; free the connection before bcrypt
+        if not row or not password_pool.verify_from_thread(password, row.password_hash, email, client_ip):
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Incorrect email or password"
             )
 
         return TokenResponse(
-            access_token=create_access_token(user.id),
-            refresh_token=create_refresh_token(user.id)
+            access_token=create_access_token(row.id),
+            refresh_token=create_refresh_token(row.id)
         )
 
+    @staticmethod
+    def logout(db: Session, access_claims: dict, refresh_token: Optional[str] = None):
+        """Revoke the presented access token and, if given, the matching refresh token"""
+        TokenRevocationService.revoke_token(db, access_claims)
+        if refresh_token:
+            payload = decode_token(refresh_token)
+            if payload and payload.get("type") == "refresh" and payload.get("sub") == access_claims.get("sub"):
+                TokenRevocationService.revoke_token(db, payload)
+        db.commit()
+
     @staticmethod
     def refresh(db: Session, refresh_token: str) -> TokenResponse:
         payload = decode_token(refresh_token)
-        if not payload or payload.get("type") != "refresh":
+        if not payload or payload.get("type") != "refresh" or revocations.is_revoked(payload):
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid refresh token"
@@ -80,4 +97,118 @@ class AuthService:
         return TokenResponse(
             access_token=create_access_token(user.id),
             refresh_token=create_refresh_token(user.id)
-        )
\ No newline at end of file
+        )
+
+
+class AsyncAuthService:
+    """AsyncSession counterpart of AuthService"""
+
+    @staticmethod
+    async def register(db: AsyncSession, user_data: UserCreate, client_ip: Optional[str] = None) -> TokenResponse:
+        existing = await db.scalar(select(User.id).where(User.email == user_data.email))
+        if existing:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Email already registered"
+            )
+        # Return the connection to the pool while the password is hashed
+        await db.rollback()
+
+        try:
+            hashed = await password_pool.hash(user_data.password, user_data.email, client_ip)
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
+
+        user = User(
+            email=user_data.email,
+            password_hash=hashed,
+            name=user_data.name,
+            role=user_data.role,
+            skills=user_data.skills,
+            bio=user_data.bio
+        )
+        db.add(user)
+        try:
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            # Re-raise to let SQLAlchemy exception handler catch it
+            raise
+
+        return TokenResponse(
+            access_token=create_access_token(user.id),
+            refresh_token=create_refresh_token(user.id)
+        )
+
+    @staticmethod
+    async def login(db: AsyncSession, email: str, password: str, client_ip: Optional[str] = None) -> TokenResponse:
+        row = (await db.execute(select(User.id, User.password_hash).where(User.email == email))).first()
+        await db.rollback()  # nothing else to read; free the connection before bcrypt
+        if not row or not await password_pool.verify(password, row.password_hash, email, client_ip):
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Incorrect email or password"
+            )
+
+        return TokenResponse(
+            access_token=create_access_token(row.id),
+            refresh_token=create_refresh_token(row.id)
+        )
+
+    @staticmethod
+    async def logout(db: AsyncSession, access_claims: dict, refresh_token: Optional[str] = None):
+        """Revoke the presented access token and, if given, the matching refresh token"""
+        TokenRevocationService.revoke_token(db, access_claims)
+        if refresh_token:
+            payload = decode_token(refresh_token)
+            if payload and payload.get("type") == "refresh" and payload.get("sub") == access_claims.get("sub"):
+                TokenRevocationService.revoke_token(db, payload)
+        await db.commit()
+
+    @staticmethod
+    async def change_password(
+            db: AsyncSession,
+            user: User,
+            current_password: str,
+            new_password: str,
+            client_ip: Optional[str] = None
+    ) -> TokenResponse:
+        """Set a new password, revoke every existing token and issue a fresh pair"""
+        if not await password_pool.verify(current_password, user.password_hash, user.email, client_ip):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Current password is incorrect"
+            )
+        user.password_hash = await password_pool.hash(new_password, user.email, client_ip)
+        TokenRevocationService.revoke_user(db, user.id)
+        await db.commit()
+
+        # Issued after the cutoff, so these stay valid
+        return TokenResponse(
+            access_token=create_access_token(user.id),
+            refresh_token=create_refresh_token(user.id)
+        )
+
+    @staticmethod
+    async def refresh(db: AsyncSession, refresh_token: str) -> TokenResponse:
+        payload = decode_token(refresh_token)
+        if not payload or payload.get("type") != "refresh" or revocations.is_revoked(payload):
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid refresh token"
+            )
+
+        user_id = int(payload.get("sub"))
+        if not await db.scalar(select(User.id).where(User.id == user_id)):
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="User not found"
+            )
+
+        return TokenResponse(
+            access_token=create_access_token(user_id),
+            refresh_token=create_refresh_token(user_id)
+        )
@@ -1,8 +1,102 @@
+import base64
+import json
+from datetime import datetime
+from sqlalchemy import String, case, delete, func, insert, select, tuple_, type_coerce, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import Session
-from typing import List, Optional, Dict, Any
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Iterable, List, Optional, Dict, Any, Tuple
+from db import journal
+from db.sqlite_writer import run_write, run_write_async
 from models.notification import Notification
+from models.notification_counter import NotificationCounter
 from ws.manager import manager
-from fastapi import BackgroundTasks
+from fastapi import BackgroundTasks, HTTPException
+
+
+def _unread_increment(dialect_name: str, user_ids: List[int]):
+    """One upsert adding 1 to the unread counter of each (distinct) user"""
+    upsert = sqlite_insert if dialect_name == "sqlite" else pg_insert
+    stmt = upsert(NotificationCounter).values([{"user_id": user_id, "unread": 1} for user_id in user_ids])
+    return stmt.on_conflict_do_update(
+        index_elements=[NotificationCounter.user_id],
+        set_={"unread": NotificationCounter.unread + stmt.excluded.unread}
+    )
+
+
+def _unread_decrement(user_id: int, count: int):
+    return update(NotificationCounter).where(NotificationCounter.user_id == user_id).values(
+        unread=case((NotificationCounter.unread > count, NotificationCounter.unread - count), else_=0)
+    )
+
+
+def _mark_read_query(user_id: int, ids: Optional[List[int]], type: Optional[str], before_id: Optional[int]):
+    """One UPDATE over the user's unread notifications, returning the ids it changed"""
+    query = update(Notification).where(Notification.user_id == user_id, Notification.is_read == False)
+    if ids is not None:
+        query = query.where(Notification.id.in_(ids))
+    if type:
+        query = query.where(Notification.type == type)
+    if before_id is not None:
+        query = query.where(Notification.id <= before_id)
+    return (
+        query.values(is_read=True)
+        .returning(Notification.id)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def _push_unread_count(background_tasks: Optional[BackgroundTasks], user_id: int, unread: int):
+    if background_tasks:
+        background_tasks.add_task(manager.send_to_user, user_id, {"type": "unread_count", "unread": unread})
+
+
+def rebuild_unread_counters(connection):
+    """Recount every user's unread notifications (after a failover journal replay)"""
+    connection.execute(delete(NotificationCounter))
+    connection.execute(insert(NotificationCounter).from_select(
+        ["user_id", "unread"],
+        select(Notification.user_id, func.count())
+        .where(Notification.is_read == False)
+        .group_by(Notification.user_id)
+    ))
+
+
+def encode_cursor(notification: Notification) -> str:
+    raw = json.dumps([notification.created_at.isoformat(), notification.id])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, notification_id = json.loads(raw)
+        return datetime.fromisoformat(created_at), int(notification_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _page_query(dialect_name: str, user_id: int, unread_only: bool, limit: int, cursor: Optional[str]):
+    """Newest first, keyset on (created_at, id) - an index range read on any page"""
+    query = select(Notification).where(Notification.user_id == user_id)
+    if unread_only:
+        query = query.where(Notification.is_read == False)
+    if cursor:
+        created_at, notification_id = _decode_cursor(cursor)
+        bound = created_at
+        if dialect_name == "sqlite":
+            # SQLite keeps server-side now() as 'YYYY-MM-DD HH:MM:SS' text; compare with the same text
+            bound = type_coerce(str(created_at.replace(tzinfo=None)), String)
+        query = query.where(tuple_(Notification.created_at, Notification.id) < tuple_(bound, notification_id))
+    return query.order_by(Notification.created_at.desc(), Notification.id.desc()).limit(limit + 1)
+
+
+def _page(rows: List[Notification], limit: int) -> Tuple[List[Notification], Optional[str]]:
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return rows, encode_cursor(rows[-1])
+    return rows, None
 
 
 class NotificationService:
@@ -14,36 +108,104 @@ class NotificationService:
         payload: Optional[Dict[str, Any]] = None,
         background_tasks: Optional[BackgroundTasks] = None
     ) -> Notification:
-        notification = Notification(
-            user_id=user_id,
-            type=type,
-            payload=payload or {}
-        )
-        db.add(notification)
-        db.commit()
-        db.refresh(notification)
+        return NotificationService.create_many(db, [user_id], type, payload, background_tasks)[0]
+
+    @staticmethod
+    def create_many(
+        db: Session,
+        user_ids: Iterable[int],
+        type: str,
+        payload: Optional[Dict[str, Any]] = None,
+        background_tasks: Optional[BackgroundTasks] = None,
+        commit: bool = True
+    ) -> List[Notification]:
+        """Notify several users with one multi-row INSERT ... RETURNING.
+
+        The rows, the unread counters and the journal entry commit as one
+        unit (one writer job in SQLite single-writer mode). ``commit=False``
+        runs them in the caller's transaction instead, for callers that are
+        already inside a ``run_write`` unit. WebSocket delivery is one
+        background task for all recipients, so it runs only after the
+        response - and the commit.
+        """
+        rows = NotificationService._rows(user_ids, type, payload)
+        if not rows:
+            return []
+        if commit:
+            notifications, messages = run_write(db, lambda session: NotificationService._insert(session, rows))
+        else:
+            notifications, messages = NotificationService._insert(db, rows)
 
-        # Send WebSocket notification if user is connected
-        # This will be handled by background task if provided
+        # Send WebSocket notifications to whichever recipients are connected
         if background_tasks:
-            background_tasks.add_task(
-                NotificationService._send_websocket_notification,
-                user_id=user_id,
-                notification={
-                    "id": notification.id,
-                    "type": notification.type,
-                    "payload": notification.payload,
-                    "is_read": notification.is_read,
-                    "created_at": notification.created_at.isoformat() if notification.created_at else None
-                }
-            )
+            background_tasks.add_task(NotificationService._send_websocket_notifications, messages)
+
+        return notifications
+
+    @staticmethod
+    def _insert(db: Session, rows: List[dict]) -> Tuple[List[Notification], list]:
+        notifications = db.scalars(
+            insert(Notification).returning(Notification), rows
+        ).all()
+        db.execute(_unread_increment(db.get_bind().dialect.name, [n.user_id for n in notifications]))
+        # Bulk insert bypasses the flush hooks of the SQLite fallback journal
+        journal.record(db.connection(), Notification.__tablename__, "insert", [n.id for n in notifications])
+        return notifications, NotificationService._messages(notifications)
+
+    @staticmethod
+    def _rows(user_ids: Iterable[int], type: str, payload: Optional[Dict[str, Any]]) -> List[dict]:
+        return [
+            {"user_id": user_id, "type": type, "payload": payload or {}}
+            for user_id in dict.fromkeys(user_ids)
+        ]
+
+    @staticmethod
+    def _messages(notifications: List[Notification]) -> List[Tuple[dict, List[Tuple[int, int]]]]:
+        """``(body without id, [(user_id, id)])`` per distinct body, for ConnectionManager.send_shared.
 
-        return notification
+        Rows of one INSERT share type, payload and timestamp, so a fan-out
+        is one body, encoded once. Built before commit: expire_on_commit
+        would reload every row.
+        """
+        groups: Dict[Any, Tuple[dict, List[Tuple[int, int]]]] = {}
+        for n in notifications:
+            if n.created_at not in groups:
+                body = NotificationService.to_message(n)
+                del body["id"]
+                groups[n.created_at] = (body, [])
+            groups[n.created_at][1].append((n.user_id, n.id))
+        return list(groups.values())
 
     @staticmethod
-    async def _send_websocket_notification(user_id: int, notification: dict):
-        """Helper method to send WebSocket notification"""
-        await manager.send_notification(user_id, notification)
+    def to_message(notification: Notification) -> dict:
+        """WebSocket frame for a notification (live delivery and replay)"""
+        return {
+            "id": notification.id,
+            "type": notification.type,
+            "payload": notification.payload,
+            "is_read": notification.is_read,
+            "created_at": notification.created_at.isoformat() if notification.created_at else None
+        }
+
+    @staticmethod
+    async def _send_websocket_notifications(messages: List[Tuple[dict, List[Tuple[int, int]]]]):
+        """Helper method to send WebSocket notifications"""
+        for body, recipients in messages:
+            await manager.send_shared(recipients, body)
+
+    @staticmethod
+    def list_page(
+        db: Session, user_id: int, unread_only: bool = False, limit: int = 50, cursor: Optional[str] = None
+    ) -> Tuple[List[Notification], Optional[str]]:
+        """One page of the feed and the cursor of the next one (None on the last page)"""
+        query = _page_query(db.get_bind().dialect.name, user_id, unread_only, limit, cursor)
+        return _page(db.scalars(query).all(), limit)
+
+    @staticmethod
+    def unread_count(db: Session, user_id: int) -> int:
+        return db.scalar(
+            select(NotificationCounter.unread).where(NotificationCounter.user_id == user_id)
+        ) or 0
 
     @staticmethod
     def list_by_user(db: Session, user_id: int, unread_only: bool = False) -> List[Notification]:
@@ -54,14 +216,154 @@ class NotificationService:
 
     @staticmethod
     def mark_as_read(db: Session, notification_id: int, user_id: int) -> Notification:
-        notification = db.query(Notification).filter(
+        # Conditional UPDATE: of two concurrent calls only one decrements the counter
+        run_write(db, lambda session: NotificationService._mark_read(session, user_id, [notification_id], None, None))
+        return db.query(Notification).filter(
             Notification.id == notification_id,
             Notification.user_id == user_id
         ).first()
 
-        if notification:
-            notification.is_read = True
-            db.commit()
-            db.refresh(notification)
+    @staticmethod
+    def mark_read(
+        db: Session,
+        user_id: int,
+        ids: Optional[List[int]] = None,
+        type: Optional[str] = None,
+        before_id: Optional[int] = None,
+        background_tasks: Optional[BackgroundTasks] = None
+    ) -> Tuple[int, int]:
+        """Mark the user's unread notifications read - all of them, or only
+        ``ids`` / one ``type`` / ids up to ``before_id`` - with one UPDATE.
+
+        Returns (rows changed, unread left); the new count is also pushed to
+        the user's sockets.
+        """
+        updated, unread = run_write(
+            db, lambda session: NotificationService._mark_read(session, user_id, ids, type, before_id)
+        )
+        if unread is None:
+            unread = NotificationService.unread_count(db, user_id)
+        _push_unread_count(background_tasks, user_id, unread)
+        return updated, unread
 
-        return notification
\ No newline at end of file
+    @staticmethod
+    def _mark_read(
+        db: Session, user_id: int, ids: Optional[List[int]], type: Optional[str], before_id: Optional[int]
+    ) -> Tuple[int, Optional[int]]:
+        """The UPDATE, its journal entry and the counter decrement; unread is None if nothing changed"""
+        changed = db.scalars(_mark_read_query(user_id, ids, type, before_id)).all()
+        if not changed:
+            return 0, None
+        journal.record(db.connection(), Notification.__tablename__, "update", changed, ["is_read"])
+        unread = db.scalar(_unread_decrement(user_id, len(changed)).returning(NotificationCounter.unread)) or 0
+        return len(changed), unread
+
+
+class AsyncNotificationService:
+    """AsyncSession counterpart of NotificationService"""
+
+    @staticmethod
+    async def create(
+        db: AsyncSession,
+        user_id: int,
+        type: str,  # invite, application_status, task_done
+        payload: Optional[Dict[str, Any]] = None,
+        background_tasks: Optional[BackgroundTasks] = None
+    ) -> Notification:
+        return (await AsyncNotificationService.create_many(db, [user_id], type, payload, background_tasks))[0]
+
+    @staticmethod
+    async def create_many(
+        db: AsyncSession,
+        user_ids: Iterable[int],
+        type: str,
+        payload: Optional[Dict[str, Any]] = None,
+        background_tasks: Optional[BackgroundTasks] = None
+    ) -> List[Notification]:
+        """See NotificationService.create_many.
+
+        Inside a larger ``run_write_async`` unit, call NotificationService.create_many
+        on the sync session with ``commit=False``.
+        """
+        rows = NotificationService._rows(user_ids, type, payload)
+        if not rows:
+            return []
+        notifications, messages = await run_write_async(db, lambda session: NotificationService._insert(session, rows))
+
+        if background_tasks:
+            background_tasks.add_task(NotificationService._send_websocket_notifications, messages)
+
+        return notifications
+
+    @staticmethod
+    async def list_since(db: AsyncSession, user_id: int, after_id: int, limit: int) -> Tuple[List[Notification], bool]:
+        """Notifications newer than ``after_id``, oldest first (range read on (user_id, id)).
+
+        Returns the rows and whether more than ``limit`` were pending.
+        """
+        result = await db.scalars(
+            select(Notification)
+            .where(Notification.user_id == user_id, Notification.id > after_id)
+            .order_by(Notification.id)
+            .limit(limit + 1)
+        )
+        rows = result.all()
+        return rows[:limit], len(rows) > limit
+
+    @staticmethod
+    async def list_by_ids(db: AsyncSession, ids: List[int]) -> List[Notification]:
+        """Notifications by id, oldest first (frames sent by reference)"""
+        result = await db.scalars(select(Notification).where(Notification.id.in_(ids)).order_by(Notification.id))
+        return result.all()
+
+    @staticmethod
+    async def list_page(
+        db: AsyncSession, user_id: int, unread_only: bool = False, limit: int = 50, cursor: Optional[str] = None
+    ) -> Tuple[List[Notification], Optional[str]]:
+        """One page of the feed and the cursor of the next one (None on the last page)"""
+        query = _page_query(db.get_bind().dialect.name, user_id, unread_only, limit, cursor)
+        result = await db.scalars(query)
+        return _page(result.all(), limit)
+
+    @staticmethod
+    async def unread_count(db: AsyncSession, user_id: int) -> int:
+        return await db.scalar(
+            select(NotificationCounter.unread).where(NotificationCounter.user_id == user_id)
+        ) or 0
+
+    @staticmethod
+    async def list_by_user(db: AsyncSession, user_id: int, unread_only: bool = False) -> List[Notification]:
+        query = select(Notification).where(Notification.user_id == user_id)
+        if unread_only:
+            query = query.where(Notification.is_read == False)
+        result = await db.scalars(query.order_by(Notification.created_at.desc()))
+        return result.all()
+
+    @staticmethod
+    async def mark_as_read(db: AsyncSession, notification_id: int, user_id: int) -> Notification:
+        # Conditional UPDATE: of two concurrent calls only one decrements the counter
+        await run_write_async(
+            db, lambda session: NotificationService._mark_read(session, user_id, [notification_id], None, None)
+        )
+        return await db.scalar(select(Notification).where(
+            Notification.id == notification_id,
+            Notification.user_id == user_id
+        ))
+
+    @staticmethod
+    async def mark_read(
+        db: AsyncSession,
+        user_id: int,
+        ids: Optional[List[int]] = None,
+        type: Optional[str] = None,
+        before_id: Optional[int] = None,
+        background_tasks: Optional[BackgroundTasks] = None
+    ) -> Tuple[int, int]:
+        """See NotificationService.mark_read"""
+        updated, unread = await run_write_async(
+            db, lambda session: NotificationService._mark_read(session, user_id, ids, type, before_id)
+        )
+        if unread is None:
+            unread = await AsyncNotificationService.unread_count(db, user_id)
+        _push_unread_count(background_tasks, user_id, unread)
+        return updated, unread
@@ -1,10 +1,16 @@
+from sqlalchemy import exists, false, select
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import HTTPException, status
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
+from db.tech_tags import normalize_tags, project_tech_tags, project_tech_tag_counts
 from models.project import Project
 from models.task import Task
 from schemas.project import ProjectCreate, ProjectUpdate
 
+# SQLite any-of filters: up to this many tagged rows, collect matching ids up front
+SQLITE_TAG_IN_LIMIT = 5000
+
 
 class ProjectService:
     @staticmethod
@@ -28,19 +34,28 @@ class ProjectService:
             status: Optional[str] = None,
             tech_stack: Optional[List[str]] = None,
             skip: int = 0,
-            limit: int = 100
+            limit: int = 100,
+            tech_match: str = "all"
     ) -> List[Project]:
+        """``tech_stack`` filters by tag: projects having all of them, or any with ``tech_match="any"``"""
         query = db.query(Project)
 
         if status:
             query = query.filter(Project.status == status)
 
-        if tech_stack:
-            for tech in tech_stack:
-                query = query.filter(Project.tech_stack.contains([tech]))
+        tags = normalize_tags(tech_stack)
+        if tags:
+            dialect_name = db.get_bind().dialect.name
+            counts = dict(db.execute(_tag_totals_query(tags)).all()) if dialect_name == "sqlite" else None
+            query = _filter_by_tags(query, dialect_name, tags, tech_match, counts)
 
         return query.offset(skip).limit(limit).all()
 
+    @staticmethod
+    def tech_tag_counts(db: Session, limit: int = 100) -> List[Tuple[str, int]]:
+        """(tag, projects) pairs, most used first"""
+        return db.execute(_tag_counts_query(limit)).all()
+
     @staticmethod
     def update(db: Session, project_id: int, project_data: ProjectUpdate) -> Project:
         project = db.query(Project).filter(Project.id == project_id).first()
@@ -69,4 +84,124 @@ class ProjectService:
             project.progress_percent = progress
             db.commit()
 
-        return progress
\ No newline at end of file
+        return progress
+
+
+class AsyncProjectService:
+    """AsyncSession counterpart of ProjectService for `async def` routes"""
+
+    @staticmethod
+    async def create(db: AsyncSession, project_data: ProjectCreate, created_by: int) -> Project:
+        project = Project(
+            **project_data.model_dump(exclude={"required_roles"}),
+            created_by=created_by
+        )
+        db.add(project)
+        await db.commit()
+        await db.refresh(project)
+        return project
+
+    @staticmethod
+    async def get_by_id(db: AsyncSession, project_id: int) -> Optional[Project]:
+        return await db.scalar(select(Project).where(Project.id == project_id))
+
+    @staticmethod
+    async def list_projects(
+            db: AsyncSession,
+            status: Optional[str] = None,
+            tech_stack: Optional[List[str]] = None,
+            skip: int = 0,
+            limit: int = 100,
+            tech_match: str = "all"
+    ) -> List[Project]:
+        query = select(Project)
+
+        if status:
+            query = query.where(Project.status == status)
+
+        tags = normalize_tags(tech_stack)
+        if tags:
+            dialect_name = db.get_bind().dialect.name
+            counts = dict((await db.execute(_tag_totals_query(tags))).all()) if dialect_name == "sqlite" else None
+            query = _filter_by_tags(query, dialect_name, tags, tech_match, counts)
+
+        result = await db.scalars(query.offset(skip).limit(limit))
+        return result.all()
+
+    @staticmethod
+    async def tech_tag_counts(db: AsyncSession, limit: int = 100) -> List[Tuple[str, int]]:
+        result = await db.execute(_tag_counts_query(limit))
+        return result.all()
+
+    @staticmethod
+    async def update(db: AsyncSession, project_id: int, project_data: ProjectUpdate) -> Project:
+        project = await AsyncProjectService.get_by_id(db, project_id)
+        if not project:
+            raise HTTPException(status_code=404, detail="Project not found")
+
+        update_data = project_data.model_dump(exclude_unset=True)
+        for field, value in update_data.items():
+            setattr(project, field, value)
+
+        await db.commit()
+        await db.refresh(project)
+        return project
+
+    @staticmethod
+    async def recalculate_progress(db: AsyncSession, project_id: int) -> float:
+        tasks = (await db.scalars(select(Task).where(Task.project_id == project_id))).all()
+        if not tasks:
+            progress = 0.0
+        else:
+            done_count = sum(1 for t in tasks if t.status == "done")
+            progress = (done_count / len(tasks)) * 100
+
+        project = await AsyncProjectService.get_by_id(db, project_id)
+        if project:
+            project.progress_percent = progress
+            await db.commit()
+
+        return progress
+
+
+def _filter_by_tags(query, dialect_name: str, tags: List[str], match: str, counts: Optional[Dict[str, int]]):
+    """Restrict ``query`` to projects with normalized ``tags``, using an index on either backend"""
+    if dialect_name != "sqlite":
+        # GIN index on tech_tags
+        return query.where(Project.tech_tags.overlap(tags) if match == "any" else Project.tech_tags.contains(tags))
+    if match == "any":
+        if sum(counts.get(tag, 0) for tag in tags) <= SQLITE_TAG_IN_LIMIT:
+            return query.where(Project.id.in_(
+                select(project_tech_tags.c.project_id).where(project_tech_tags.c.tag.in_(tags))
+            ))
+        # Common tags: walk projects and stop at the page limit instead of collecting every match
+        return query.where(exists().where(
+            project_tech_tags.c.project_id == Project.id, project_tech_tags.c.tag.in_(tags)
+        ))
+    if any(not counts.get(tag) for tag in tags):
+        return query.where(false())
+    # Walk the rarest tag's projects, probing the other tags by primary key
+    # before a project row is read; stops at the page limit
+    rarest, *others = sorted(tags, key=counts.get)
+    driver = project_tech_tags.alias("tag_0")
+    query = query.join(driver, driver.c.project_id == Project.id).where(driver.c.tag == rarest)
+    for i, tag in enumerate(others, 1):
+        other = project_tech_tags.alias(f"tag_{i}")
+        query = query.where(exists().where(other.c.tag == tag, other.c.project_id == driver.c.project_id))
+    return query
+
+
+def _tag_totals_query(tags: List[str]):
+    """Projects per tag for ``tags``"""
+    return select(project_tech_tag_counts.c.tag, project_tech_tag_counts.c.projects).where(
+        project_tech_tag_counts.c.tag.in_(tags)
+    )
+
+
+def _tag_counts_query(limit: int):
+    """Projects per tag, most used first, from the trigger-kept totals"""
+    return (
+        select(project_tech_tag_counts.c.tag, project_tech_tag_counts.c.projects)
+        .order_by(project_tech_tag_counts.c.projects.desc(), project_tech_tag_counts.c.tag)
+        .limit(limit)
+    )
@@ -0,0 +1,245 @@
+"""JWT revocation (denylist) checked in memory on every request.
+
+Two kinds of entries:
+* a single token by its ``jti`` (logout), kept until the token's ``exp``
+* every token of a user issued before a cutoff (password change, user
+  deletion), kept until the longest-lived token issued before it expires
+
+Checking is two dict lookups, no database round trip. Entries are stored in
+``token_revocations`` so a restarted worker reloads them, and after commit
+they are broadcast on the ``token_revocations`` pub/sub channel so every
+worker applies them. Revocations are applied only once the session commits;
+a rollback drops them.
+
+A broadcast can be missed (pub/sub listener or publisher disconnected), so
+every worker also re-reads the table every ``TOKEN_REVOCATION_RESYNC_SEC``
+and right after its pub/sub listener reconnects. ``revoke_user(persist=False)``
+entries are broadcast only; the missing user row covers them.
+"""
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import delete, event, select
+from sqlalchemy.orm import Session
+import structlog
+
+from core.config import settings
+from core.pubsub import broker
+from models.token_revocation import TokenRevocation
+
+logger = structlog.get_logger()
+
+CHANNEL = "token_revocations"
+
+
+class RevocationStore:
+    def __init__(self):
+        self._jtis: Dict[str, float] = {}  # jti -> exp
+        self._users: Dict[int, Tuple[float, float]] = {}  # user_id -> (issued_before, expires)
+        self._lock = threading.Lock()
+        self._next_purge = 0.0
+        self.loaded = 0
+        self.resyncs = 0
+        self.rejected = 0
+
+    def is_revoked(self, claims: dict) -> bool:
+        jti = claims.get("jti")
+        if jti is not None and jti in self._jtis:
+            self.rejected += 1
+            return True
+        try:
+            cutoff = self._users.get(int(claims.get("sub")))
+        except (TypeError, ValueError):
+            return False
+        # Tokens from before jti/iat existed have no iat: revoked by any cutoff
+        if cutoff is not None and (claims.get("iat") or 0) < cutoff[0]:
+            self.rejected += 1
+            return True
+        return False
+
+    def apply(self, jtis: Dict[str, float], users: Dict[int, Tuple[float, float]]):
+        now = time.time()
+        with self._lock:
+            self._jtis.update(jtis)
+            for user_id, (issued_before, expires) in users.items():
+                current = self._users.get(user_id)
+                if current is None or current[0] < issued_before:
+                    self._users[user_id] = (issued_before, expires)
+            if now >= self._next_purge:
+                self._purge(now)
+
+    def _purge(self, now: float):
+        self._jtis = {jti: exp for jti, exp in self._jtis.items() if exp > now}
+        self._users = {uid: entry for uid, entry in self._users.items() if entry[1] > now}
+        self._next_purge = now + 60
+
+    def load(self, db: Session, startup: bool = True):
+        """Load unexpired revocations; at startup also drop expired rows.
+
+        Resyncs (``startup=False``) only read, so every worker can run them
+        without contending on deletes.
+        """
+        now = datetime.now(timezone.utc)
+        if startup:
+            db.execute(delete(TokenRevocation).where(TokenRevocation.expires_at <= now))
+        rows = db.execute(select(TokenRevocation).where(TokenRevocation.expires_at > now)).scalars().all()
+        db.commit()
+        jtis, users = {}, {}
+        for row in rows:
+            expires = row.expires_at.timestamp()
+            if row.jti:
+                jtis[row.jti] = expires
+            elif row.user_id is not None and row.issued_before is not None:
+                users[row.user_id] = (row.issued_before, expires)
+        self.apply(jtis, users)
+        if startup:
+            self.loaded = len(rows)
+        else:
+            self.resyncs += 1
+
+    def stats(self) -> dict:
+        return {
+            "tokens": len(self._jtis),
+            "users": len(self._users),
+            "loaded_at_startup": self.loaded,
+            "resyncs": self.resyncs,
+            "rejected": self.rejected,
+        }
+
+
+revocations = RevocationStore()
+
+
+def _max_token_lifetime_sec() -> float:
+    return max(settings.ACCESS_TTL_MIN * 60, settings.REFRESH_TTL_DAYS * 86400)
+
+
+def _pending(db) -> dict:
+    session = getattr(db, "sync_session", db)
+    return session.info.setdefault("token_revocations", {"jtis": {}, "users": {}})
+
+
+class TokenRevocationService:
+    """Queue revocations on a session; they take effect when it commits"""
+
+    @staticmethod
+    def revoke_token(db, claims: dict):
+        """Revoke one token (logout). Tokens without a jti can't be revoked singly."""
+        jti = claims.get("jti")
+        exp = claims.get("exp")
+        if not jti or not exp:
+            return
+        try:
+            user_id = int(claims.get("sub"))
+        except (TypeError, ValueError):
+            user_id = None
+        db.add(TokenRevocation(
+            jti=jti,
+            user_id=user_id,
+            expires_at=datetime.fromtimestamp(exp, timezone.utc)
+        ))
+        _pending(db)["jtis"][jti] = float(exp)
+
+    @staticmethod
+    def revoke_user(db, user_id: int, persist: bool = True) -> float:
+        """Revoke every token of a user issued until now; returns the cutoff.
+
+        ``persist=False`` for user deletion: the missing user row already
+        fails authentication, the broadcast only closes the window until
+        every worker's user cache notices.
+        """
+        issued_before = round(time.time(), 3)
+        expires = issued_before + _max_token_lifetime_sec()
+        if persist:
+            db.add(TokenRevocation(
+                user_id=user_id,
+                issued_before=issued_before,
+                expires_at=datetime.fromtimestamp(expires, timezone.utc)
+            ))
+        _pending(db)["users"][user_id] = (issued_before, expires)
+        return issued_before
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_revocations(session):
+    pending = session.info.pop("token_revocations", None)
+    if not pending:
+        return
+    revocations.apply(pending["jtis"], pending["users"])
+    broker.publish(CHANNEL, {
+        "origin": broker.origin,
+        "jtis": pending["jtis"],
+        "users": {str(uid): list(entry) for uid, entry in pending["users"].items()},
+    })
+    logger.info("tokens_revoked", tokens=len(pending["jtis"]), users=sorted(pending["users"]))
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_revocations(session):
+    session.info.pop("token_revocations", None)
+
+
+def _on_remote_revocation(message: dict):
+    if message.get("origin") == broker.origin:
+        return  # applied in _apply_revocations
+    revocations.apply(
+        {jti: float(exp) for jti, exp in (message.get("jtis") or {}).items()},
+        {int(uid): (float(entry[0]), float(entry[1])) for uid, entry in (message.get("users") or {}).items()}
+    )
+
+
+def load_revocations(startup: bool = True):
+    """Startup hook: fill the in-memory store from the database (also used to resync)"""
+    from db.session import SessionLocal
+
+    db = SessionLocal()
+    try:
+        revocations.load(db, startup=startup)
+    except Exception as e:
+        # Workers still get new revocations over pub/sub, and the next resync retries
+        db.rollback()
+        logger.warning("token_revocations_load_failed", startup=startup, error=str(e))
+    finally:
+        db.close()
+
+
+def _resync_after_reconnect():
+    # Broadcasts sent while the listener was down are gone; the table has them
+    load_revocations(startup=False)
+    logger.info("token_revocations_resynced", reason="pubsub_reconnect")
+
+
+broker.subscribe(CHANNEL, _on_remote_revocation)
+broker.on_reconnect(_resync_after_reconnect)
+
+
+class RevocationResync:
+    """Daemon thread re-reading the table every TOKEN_REVOCATION_RESYNC_SEC"""
+
+    def __init__(self):
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def start(self):
+        if settings.TOKEN_REVOCATION_RESYNC_SEC <= 0:
+            return
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="token-revocation-resync", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(settings.TOKEN_REVOCATION_RESYNC_SEC):
+            load_revocations(startup=False)
+
+
+resync = RevocationResync()
@@ -0,0 +1,175 @@
+"""Per-process cache of authenticated users for get_current_user.
+
+Entries are snapshots of the users row (column values only), kept in an
+LRU with a TTL. On a hit the dependency rebuilds a detached ``User`` and
+attaches it to the request session without a query, so routes can still
+modify and commit it.
+
+Any flush that updates or deletes a user, and any bulk UPDATE/DELETE on
+``users``, drops the affected entries; after commit the ids are published on
+the ``user_cache`` pub/sub channel so other workers drop them too. The TTL
+bounds staleness if an invalidation is missed (e.g. PostgreSQL briefly
+unreachable).
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, make_transient_to_detached
+import structlog
+
+from core.config import settings
+from core.pubsub import broker
+from models.user import User
+
+logger = structlog.get_logger()
+
+CHANNEL = "user_cache"
+
+
+class UserCache:
+    def __init__(self, max_size: int, ttl_sec: float):
+        self.max_size = max_size
+        self.ttl_sec = ttl_sec
+        self._entries: "OrderedDict[int, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Bumped on every invalidation; a load that started before one is not cached
+        self._version = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.remote_invalidations = 0
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def get(self, user_id: int) -> Optional[User]:
+        """Detached User rebuilt from the snapshot, or None on a miss"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    del self._entries[user_id]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+            values = entry[1]
+        user = User(**{key: list(value) if isinstance(value, list) else value for key, value in values.items()})
+        make_transient_to_detached(user)
+        return user
+
+    def put(self, user: User, version: int):
+        """Cache a freshly loaded user unless it was invalidated since ``version``"""
+        state = inspect(user)
+        values = {
+            attr.key: state.dict[attr.key]
+            for attr in state.mapper.column_attrs
+            if attr.key in state.dict
+        }
+        values["skills"] = list(values.get("skills") or [])
+        with self._lock:
+            if version != self._version:
+                return
+            self._entries[user.id] = (time.monotonic() + self.ttl_sec, values)
+            self._entries.move_to_end(user.id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, user_ids, remote: bool = False):
+        with self._lock:
+            self._version += 1
+            for user_id in user_ids:
+                self._entries.pop(user_id, None)
+            if remote:
+                self.remote_invalidations += 1
+            else:
+                self.invalidations += 1
+
+    def clear(self, remote: bool = False):
+        with self._lock:
+            self._version += 1
+            self._entries.clear()
+            if remote:
+                self.remote_invalidations += 1
+            else:
+                self.invalidations += 1
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": settings.USER_CACHE_ENABLED,
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_sec": self.ttl_sec,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "remote_invalidations": self.remote_invalidations,
+        }
+
+
+user_cache = UserCache(settings.USER_CACHE_MAX_SIZE, settings.USER_CACHE_TTL_SEC)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_changed_users(session, flush_context):
+    changed = {
+        obj.id for obj in list(session.dirty) + list(session.deleted)
+        if isinstance(obj, User) and obj.id is not None
+    }
+    if changed:
+        # Drop now so nothing reads the old snapshot before commit; the
+        # version bump also stops in-flight loads from re-caching it
+        user_cache.invalidate(changed)
+        session.info.setdefault("user_cache_changed", set()).update(changed)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _bulk_user_dml(orm_execute_state):
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is not None and mapper.class_ is User:
+        user_cache.clear()
+        orm_execute_state.session.info["user_cache_cleared"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_changed_users(session):
+    changed = session.info.pop("user_cache_changed", None)
+    cleared = session.info.pop("user_cache_cleared", False)
+    if not (changed or cleared):
+        return
+    if cleared:
+        user_cache.clear()
+        broker.publish(CHANNEL, {"origin": broker.origin, "all": True})
+    else:
+        user_cache.invalidate(changed)
+        broker.publish(CHANNEL, {"origin": broker.origin, "user_ids": sorted(changed)})
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_changed_users(session):
+    session.info.pop("user_cache_changed", None)
+    session.info.pop("user_cache_cleared", None)
+
+
+def _on_remote_invalidation(message: dict):
+    if message.get("origin") == broker.origin:
+        return  # local delivery of our own publish, already applied
+    if message.get("all"):
+        user_cache.clear(remote=True)
+    else:
+        user_cache.invalidate(message.get("user_ids") or (), remote=True)
+
+
+broker.subscribe(CHANNEL, _on_remote_invalidation)
@@ -1,9 +1,9 @@
 #!/bin/bash
 set -e
 
-# Run migrations
-echo "Running database migrations..."
-if ! alembic upgrade head 2>/dev/null; then
+# Run migrations (skipped when already at head; one instance migrates at a time)
+echo "Checking database migrations..."
+if ! python3 -m db.migrate; then
     echo "Migrations failed, initializing database from models..."
     python3 init_sqlite_db.py || echo "Database initialization failed, continuing..."
 fi
@@ -0,0 +1,12 @@
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Settings are read at import: a throwaway SQLite database, never a real server
+os.environ.setdefault("JWT_SECRET", "test")
+os.environ["DB_URL"] = ""
+os.environ["DATABASE_URL"] = ""
+os.environ.setdefault("SQLITE_DB_PATH", os.path.join(tempfile.mkdtemp(), "teamup_test.db"))
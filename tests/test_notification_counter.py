@@ -0,0 +1,86 @@
+"""The unread counter must always equal COUNT(*) of the user's unread notifications."""
+import pytest
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import sessionmaker
+
+from db.base import Base
+from models import Notification, User
+from services.notification_service import NotificationService
+
+
+@pytest.fixture
+def db(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'notifications.db'}")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+@pytest.fixture
+def users(db):
+    users = [User(email=f"counter-{i}@example.com", password_hash="x", name=f"U{i}", skills=[]) for i in range(2)]
+    db.add_all(users)
+    db.commit()
+    return [user.id for user in users]
+
+
+def _unread_rows(db, user_id: int) -> int:
+    return db.scalar(
+        select(func.count()).select_from(Notification).where(Notification.user_id == user_id, Notification.is_read == False)
+    )
+
+
+def _assert_counters(db, user_ids):
+    for user_id in user_ids:
+        assert NotificationService.unread_count(db, user_id) == _unread_rows(db, user_id), user_id
+
+
+def test_counter_follows_creates_and_reads(db, users):
+    alice, bob = users
+
+    # Duplicate recipients get one notification each
+    NotificationService.create_many(db, [alice, bob, alice], "invite", {"project_id": 1})
+    NotificationService.create_many(db, [alice], "task_done", {"task_id": 1})
+    NotificationService.create_many(db, [alice, bob], "application_status", {"status": "approved"})
+    _assert_counters(db, users)
+    assert NotificationService.unread_count(db, alice) == 3
+
+    first = NotificationService.list_by_user(db, alice, unread_only=True)[-1]
+    NotificationService.mark_as_read(db, first.id, alice)
+    _assert_counters(db, users)
+    assert NotificationService.unread_count(db, alice) == 2
+
+    # Reading it again, or someone else's notification, changes nothing
+    NotificationService.mark_as_read(db, first.id, alice)
+    NotificationService.mark_as_read(db, first.id, bob)
+    _assert_counters(db, users)
+    assert NotificationService.unread_count(db, alice) == 2
+
+    assert NotificationService.mark_read(db, alice, type="task_done") == (1, 1)
+    _assert_counters(db, users)
+
+    assert NotificationService.mark_read(db, alice) == (1, 0)
+    _assert_counters(db, users)
+
+    # Repeated bulk read: nothing left to change
+    assert NotificationService.mark_read(db, alice) == (0, 0)
+    _assert_counters(db, users)
+    assert NotificationService.unread_count(db, bob) == 2
+
+
+def test_counter_follows_reads_by_id_and_cursor(db, users):
+    alice, _ = users
+    created = [NotificationService.create(db, alice, "invite", {"n": n}) for n in range(5)]
+    _assert_counters(db, users)
+
+    ids = [created[0].id, created[1].id]
+    assert NotificationService.mark_read(db, alice, ids=ids) == (2, 3)
+    # Overlapping batch: only the still-unread one counts
+    assert NotificationService.mark_read(db, alice, ids=ids + [created[2].id]) == (1, 2)
+    _assert_counters(db, users)
+
+    assert NotificationService.mark_read(db, alice, before_id=created[3].id) == (1, 1)
+    assert NotificationService.mark_read(db, alice, before_id=created[3].id) == (0, 1)
+    _assert_counters(db, users)
@@ -0,0 +1,82 @@
+"""Read-your-writes must hold for clients that send neither the cookie nor the header."""
+import time
+
+import pytest
+from fastapi import Request, Response
+from sqlalchemy import create_engine
+
+from core.pubsub import broker
+from core.security import create_access_token
+from db.replicas import PINS_CHANNEL, ReplicaSet, RoutingSession, _on_remote_pin, pin_to_primary, pins, route_session
+
+
+def _get(token: str = None, method: str = "GET") -> Request:
+    headers = [(b"authorization", f"Bearer {token}".encode())] if token else []
+    return Request({"type": "http", "method": method, "path": "/api/v1/tasks", "headers": headers, "query_string": b""})
+
+
+@pytest.fixture
+def replicas(tmp_path):
+    primary = create_engine(f"sqlite:///{tmp_path / 'primary.db'}")
+    replica = create_engine(f"sqlite:///{tmp_path / 'replica.db'}")
+    yield primary, ReplicaSet([replica])
+    primary.dispose()
+    replica.dispose()
+
+
+def _routed_to_replica(replicas, request: Request) -> bool:
+    primary, replica_set = replicas
+    session = RoutingSession(bind=primary, replicas=replica_set)
+    try:
+        route_session(session, request, Response())
+        return session.replica is not None
+    finally:
+        session.close()
+
+
+def test_write_pins_the_user_not_just_the_client(replicas, monkeypatch):
+    published = []
+    monkeypatch.setattr(broker, "publish", lambda channel, message: published.append((channel, message)))
+    writer, other = 9001, 9002
+    token = create_access_token(writer)
+
+    primary, replica_set = replicas
+    session = RoutingSession(bind=primary, replicas=replica_set)
+    response = Response()
+    route_session(session, _get(token, method="POST"), response)
+    session.on_write()  # what the session runs after committing a write
+    session.close()
+
+    assert response.headers["X-DB-Primary-Until"]
+    assert published[0][0] == PINS_CHANNEL and published[0][1]["user_id"] == writer
+    # Cross-origin fetch without credentials: only the Authorization header comes back
+    assert not _routed_to_replica(replicas, _get(token))
+    assert _routed_to_replica(replicas, _get(create_access_token(other)))
+    assert _routed_to_replica(replicas, _get())
+
+
+def test_pins_from_other_workers_apply(replicas):
+    user_id = 9003
+    token = create_access_token(user_id)
+    until = time.time() + 5
+
+    _on_remote_pin({"origin": broker.origin, "user_id": user_id, "until": until})
+    assert _routed_to_replica(replicas, _get(token))  # our own broadcast, pinned locally already
+
+    _on_remote_pin({"origin": "other-worker", "user_id": user_id, "until": until})
+    assert not _routed_to_replica(replicas, _get(token))
+
+
+def test_pin_expires_after_the_window(replicas):
+    user_id = 9004
+    pins.pin(user_id, time.time() - 0.1)
+    assert _routed_to_replica(replicas, _get(create_access_token(user_id)))
+
+
+def test_pin_to_primary_without_user_only_sets_the_token(monkeypatch):
+    published = []
+    monkeypatch.setattr(broker, "publish", lambda channel, message: published.append(message))
+    response = Response()
+    pin_to_primary(response)
+    assert float(response.headers["X-DB-Primary-Until"]) > time.time()
+    assert published == []
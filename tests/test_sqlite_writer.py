@@ -0,0 +1,113 @@
+"""The single writer must never leave a caller waiting once it cannot commit."""
+import threading
+import time
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine, text
+
+from core.config import settings
+from db.sqlite_writer import SQLiteWriter
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'writer.db'}")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE t (v INTEGER)"))
+    yield engine
+    engine.dispose()
+
+
+def _insert(value):
+    return lambda conn: conn.execute(text("INSERT INTO t (v) VALUES (:v)"), {"v": value}).rowcount
+
+
+def _submit_in_thread(writer, fn):
+    outcome = {}
+
+    def run():
+        try:
+            outcome["result"] = writer.submit(fn)
+        except BaseException as e:
+            outcome["error"] = e
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    return thread, outcome
+
+
+def _blocking_job(started: threading.Event, release: threading.Event):
+    def job(conn):
+        started.set()
+        release.wait(10)
+    return job
+
+
+def test_submit_after_stop_fails_fast(engine):
+    writer = SQLiteWriter(engine, queue_size=8, batch_size=4)
+    writer.start()
+    assert writer.submit(_insert(1)) == 1
+    writer.stop()
+
+    started = time.monotonic()
+    with pytest.raises(HTTPException) as exc:
+        writer.submit(_insert(2))
+    assert exc.value.status_code == 503
+    assert time.monotonic() - started < 1
+    with engine.connect() as conn:
+        assert conn.scalar(text("SELECT count(*) FROM t")) == 1
+
+
+def test_stop_fails_queued_jobs_even_if_the_join_times_out(engine):
+    writer = SQLiteWriter(engine, queue_size=8, batch_size=1)
+    writer.start()
+    started, release = threading.Event(), threading.Event()
+    busy, _ = _submit_in_thread(writer, _blocking_job(started, release))
+    assert started.wait(5)
+    queued, outcome = _submit_in_thread(writer, _insert(1))
+    while writer.stats()["queue_depth"] == 0:
+        time.sleep(0.01)
+
+    writer.stop(timeout=0.1)  # the running job holds the thread past the timeout
+    queued.join(2)
+    assert not queued.is_alive()
+    assert outcome["error"].status_code == 503
+
+    release.set()
+    busy.join(5)
+    with pytest.raises(HTTPException):
+        writer.submit(_insert(2))
+
+
+def test_failed_connect_does_not_hang_submitters(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'missing' / 'writer.db'}")
+    writer = SQLiteWriter(engine, queue_size=8, batch_size=4)
+    writer.start()
+    assert writer.stopped
+
+    with pytest.raises(HTTPException) as exc:
+        writer.submit(_insert(1))
+    assert exc.value.status_code == 503
+
+
+def test_job_not_committed_in_time_fails(engine, monkeypatch):
+    writer = SQLiteWriter(engine, queue_size=8, batch_size=1)
+    writer.start()
+    started, release = threading.Event(), threading.Event()
+    busy, _ = _submit_in_thread(writer, _blocking_job(started, release))
+    assert started.wait(5)
+    # Only the job queued behind the busy one waits with the short timeout
+    monkeypatch.setattr(settings, "SQLITE_WRITER_JOB_TIMEOUT_SEC", 0.2)
+
+    with pytest.raises(HTTPException) as exc:
+        writer.submit(_insert(1))
+    assert exc.value.status_code == 503
+    assert writer.stats()["timed_out"] == 1
+
+    release.set()
+    busy.join(5)
+    writer.stop()
+    with engine.connect() as conn:
+        # Abandoned before it started: it never ran
+        assert conn.scalar(text("SELECT count(*) FROM t")) == 0
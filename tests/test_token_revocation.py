@@ -0,0 +1,95 @@
+"""Revocations missed on pub/sub must still reach every worker."""
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import Session
+
+from core.config import settings
+from core.pubsub import PostgresBroker
+from models.token_revocation import TokenRevocation
+from services.token_revocation import RevocationStore
+
+
+@pytest.fixture
+def db(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'revocations.db'}")
+    TokenRevocation.__table__.create(engine)
+    with Session(engine) as session:
+        yield session
+    engine.dispose()
+
+
+def _row(expires_in_sec: float, **fields) -> TokenRevocation:
+    return TokenRevocation(expires_at=datetime.now(timezone.utc) + timedelta(seconds=expires_in_sec), **fields)
+
+
+def test_resync_applies_rows_that_were_never_broadcast(db):
+    store = RevocationStore()
+    db.add(_row(60, jti="before-start"))
+    db.add(_row(-60, jti="expired"))
+    db.commit()
+    store.load(db)
+    assert db.scalar(select(func.count()).select_from(TokenRevocation)) == 1  # startup drops expired rows
+
+    # Another worker revoked while this one's listener was disconnected
+    issued_before = time.time()
+    db.add(_row(60, jti="missed"))
+    db.add(_row(60, user_id=7, issued_before=issued_before))
+    db.add(_row(-60, jti="expired-later"))
+    db.commit()
+    assert not store.is_revoked({"jti": "missed", "sub": "1"})
+
+    store.load(db, startup=False)
+
+    assert store.is_revoked({"jti": "missed", "sub": "1"})
+    assert store.is_revoked({"jti": "other", "sub": "7", "iat": issued_before - 1})
+    assert not store.is_revoked({"jti": "other", "sub": "7", "iat": issued_before + 1})
+    assert store.stats()["loaded_at_startup"] == 1
+    assert store.stats()["resyncs"] == 1
+    # Resyncs only read: the expired row stays until the next startup
+    assert db.scalar(select(func.count()).select_from(TokenRevocation)) == 4
+
+
+class _Connection:
+    """Listener connection that drops after its first wait for notifications"""
+
+    def __init__(self, drops: bool):
+        self.drops = drops
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, *args):
+        pass
+
+    def notifies(self, timeout: float):
+        if self.drops:
+            raise ConnectionError("server closed the connection")
+        time.sleep(timeout / 10)
+        return []
+
+
+def test_reconnect_hooks_run_after_listen_is_back_only(monkeypatch):
+    monkeypatch.setattr(settings, "DB_PROBE_BASE_DELAY_SEC", 0.01)
+    broker = PostgresBroker("postgresql://localhost/teamup")
+    connections = iter([_Connection(drops=True), _Connection(drops=False)])
+    monkeypatch.setattr(broker, "_connect", lambda: next(connections))
+    reloaded = threading.Event()
+    broker.on_reconnect(reloaded.set)
+    broker.subscribe("token_revocations", lambda message: None)
+
+    thread = threading.Thread(target=broker._run, daemon=True)
+    thread.start()
+    try:
+        assert reloaded.wait(5)
+        assert broker.connected
+        assert broker.reconnects == 1
+    finally:
+        broker._stop.set()
+        thread.join(5)
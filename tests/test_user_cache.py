@@ -0,0 +1,129 @@
+"""A changed user must never be served from the cache, on this worker or another."""
+import pytest
+from sqlalchemy import create_engine, update
+from sqlalchemy.orm import sessionmaker
+
+from core.pubsub import broker
+from db.base import Base
+from models import User
+from services.user_cache import CHANNEL, user_cache
+
+
+@pytest.fixture
+def db(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'users.db'}")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+@pytest.fixture
+def published(monkeypatch):
+    messages = []
+    monkeypatch.setattr(broker, "publish", lambda channel, message: messages.append((channel, message)))
+    user_cache.clear()
+    yield messages
+    user_cache.clear()
+
+
+def _cached_user(db, name: str) -> User:
+    user = User(email=f"{name}@example.com", password_hash="x", name=name, skills=["python"])
+    db.add(user)
+    db.commit()
+    db.refresh(user)  # get_current_user caches a freshly loaded row
+    user_cache.put(user, user_cache.version)
+    assert user_cache.get(user.id).email == user.email
+    return user
+
+
+def test_update_drops_entry_at_flush_and_publishes_after_commit(db, published):
+    user = _cached_user(db, "alice")
+    user_id = user.id
+    published.clear()
+
+    user.bio = "changed"
+    db.flush()
+    assert user_cache.get(user_id) is None
+    assert published == []  # nothing leaves the worker before commit
+
+    db.commit()
+    assert published == [(CHANNEL, {"origin": broker.origin, "user_ids": [user_id]})]
+
+
+def test_rollback_publishes_nothing(db, published):
+    user = _cached_user(db, "bob")
+    published.clear()
+
+    user.name = "Robert"
+    db.flush()
+    db.rollback()
+
+    assert user_cache.get(user.id) is None
+    assert published == []
+
+
+def test_change_through_a_cached_user_invalidates_it(db, published):
+    user_id = _cached_user(db, "carol").id
+    db.expunge_all()
+
+    # What get_current_user does on a hit
+    user = db.merge(user_cache.get(user_id), load=False)
+    user.skills = ["python", "go"]
+    db.commit()
+
+    assert user_cache.get(user_id) is None
+    assert db.get(User, user_id).skills == ["python", "go"]
+    assert published[-1] == (CHANNEL, {"origin": broker.origin, "user_ids": [user_id]})
+
+
+def test_bulk_update_clears_everything(db, published):
+    alice, bob = _cached_user(db, "dave"), _cached_user(db, "erin")
+    published.clear()
+
+    db.execute(update(User).where(User.id == alice.id).values(bio="bulk"))
+    db.commit()
+
+    assert user_cache.get(alice.id) is None
+    assert user_cache.get(bob.id) is None
+    assert published == [(CHANNEL, {"origin": broker.origin, "all": True})]
+
+
+def test_delete_invalidates(db, published):
+    user = _cached_user(db, "frank")
+    user_id = user.id
+
+    db.delete(user)
+    db.commit()
+
+    assert user_cache.get(user_id) is None
+    assert published[-1] == (CHANNEL, {"origin": broker.origin, "user_ids": [user_id]})
+
+
+def test_remote_invalidation_from_other_workers_only(db, published):
+    from services.user_cache import _on_remote_invalidation
+
+    alice, bob = _cached_user(db, "grace"), _cached_user(db, "heidi")
+
+    _on_remote_invalidation({"origin": broker.origin, "user_ids": [alice.id]})
+    assert user_cache.get(alice.id) is not None  # our own publish, already applied
+
+    _on_remote_invalidation({"origin": "other-worker", "user_ids": [alice.id]})
+    assert user_cache.get(alice.id) is None
+    assert user_cache.get(bob.id) is not None
+
+    _on_remote_invalidation({"origin": "other-worker", "all": True})
+    assert user_cache.get(bob.id) is None
+
+
+def test_load_that_raced_an_invalidation_is_not_cached(db, published):
+    user = User(email="ivan@example.com", password_hash="x", name="ivan", skills=[])
+    db.add(user)
+    db.commit()
+
+    version = user_cache.version  # get_current_user starts loading
+    user_cache.invalidate([user.id])  # another request changes the user meanwhile
+    user_cache.put(user, version)
+
+    assert user_cache.get(user.id) is None
@@ -1,38 +1,496 @@
-from typing import Dict, Set
+"""WebSocket connections of this process, with cross-process fan-out.
+
+Every notification goes through the pub/sub broker (``core.pubsub``) on the
+``ws_notifications`` channel, so it reaches the recipient whichever worker
+or instance holds their socket. Each process receives every message and
+forwards it only to users it has sockets for; WebSocket capacity scales by
+adding processes. Messages published by this process are delivered locally
+without waiting for the NOTIFY round trip.
+
+Delivery never awaits a client: each connection has a bounded outbound
+queue drained by its own writer task, with a send timeout. When a queue is
+full, WS_SLOW_CONSUMER_POLICY decides: ``drop_oldest`` (default),
+``drop_newest`` or ``disconnect``. A send that times out closes the socket.
+
+Heartbeats: every WS_PING_INTERVAL_SEC of silence the server queues
+``{"type": "ping"}``; any frame from the client (``pong``, ``ping`` or
+anything else) counts as alive. A connection silent for the interval plus
+WS_PING_TIMEOUT_SEC is closed (code 4009) and removed by one sweeper task
+per process, so sockets of closed laptops don't pile up.
+
+Reconnect replay: a client that connects with ``last_seen_id`` first gets
+the notifications it missed (oldest first, from an index range read), then
+``{"type": "replay_complete", ...}``, then live traffic. Live frames that
+arrive during the replay are held and released afterwards, minus the ones
+the replay already covered, so notification ids reach the client in
+order and without duplicates.
+
+``send_to_many`` and ``broadcast`` encode the message once; the same text
+frame travels over pub/sub and is queued on every target socket, whose
+writer tasks send it concurrently. ``send_shared`` does the same for one
+notification stored once per recipient (each row with its own id): the
+body after the id is encoded once, travels once per pub/sub message, and
+each recipient's frame is ``{"id":<id>,`` plus that shared tail.
+
+A notification too large for one NOTIFY payload travels by
+reference: ``{"refs": [[user_id, notification_id], ...]}``, and each
+process loads the rows of its connected recipients from the database. It
+may reach the socket after frames published later.
+
+SSE and long-poll clients (ws/streams.py) are pulled connections: same
+queue and delivery, no writer task and no ping/pong sweep.
+"""
+import asyncio
+import json
+import os
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Dict, Iterable, List, Optional, Set, Tuple
 from fastapi import WebSocket
+from sqlalchemy.exc import SQLAlchemyError
+import structlog
+
+from core.config import settings
+from core.pubsub import broker as default_broker, NOTIFY_MAX_BYTES
+from db import session as db_session
+
+logger = structlog.get_logger()
+
+CHANNEL = "ws_notifications"
+SLOW_CONSUMER_CLOSE_CODE = 4008
+HEARTBEAT_CLOSE_CODE = 4009
+PING_FRAME = '{"type":"ping"}'
+ENVELOPE_OVERHEAD = 128  # origin id and keys around the message in a NOTIFY payload
+
+
+def encode(message: dict) -> str:
+    """Text frame for a message (same encoding as WebSocket.send_json)"""
+    return json.dumps(message, separators=(",", ":"), ensure_ascii=False)
+
+
+class Connection:
+    """One socket with its outbound queue and writer task.
+
+    Without a websocket the connection is pulled instead (SSE, long-poll):
+    there is no writer task, the request handler takes frames with
+    ``pull()``, and the connection is its own key in the manager.
+    """
+
+    def __init__(self, manager: "ConnectionManager", websocket: Optional[WebSocket], user_id: int):
+        self.manager = manager
+        self.websocket = websocket
+        self.key = websocket if websocket is not None else self
+        self.user_id = user_id
+        self.queue: deque = deque()
+        self._ready = asyncio.Event()
+        self.closed = False
+        self.sent = 0
+        self.dropped = 0
+        loop = asyncio.get_running_loop()
+        self.last_seen = loop.time()
+        self.last_ping = 0.0
+        self.replaying = False
+        self._held: list = []
+        self.replayed_through = 0
+        self.task = loop.create_task(self._writer()) if websocket is not None else None
+
+    def enqueue(self, frame: str, seq: Optional[int] = None):
+        if self.closed:
+            return
+        if self.replaying:
+            if len(self._held) >= settings.WS_SEND_QUEUE_SIZE:
+                self._held.pop(0)
+            self._held.append((frame, seq))
+            return
+        if seq is not None and seq <= self.replayed_through:
+            return  # already sent by the reconnect replay
+        if len(self.queue) >= settings.WS_SEND_QUEUE_SIZE:
+            policy = settings.WS_SLOW_CONSUMER_POLICY
+            if policy == "disconnect":
+                self.manager.slow_disconnects += 1
+                logger.warning("ws_slow_consumer_disconnected", user_id=self.user_id, queued=len(self.queue))
+                self.close(reason="Slow consumer")
+                return
+            self.dropped += 1
+            self.manager.dropped += 1
+            if policy == "drop_newest":
+                return
+            self.queue.popleft()
+        self.queue.append(frame)
+        self._ready.set()
+
+    async def _writer(self):
+        timeout = settings.WS_SEND_TIMEOUT_SEC
+        try:
+            while True:
+                while not self.queue:
+                    self._ready.clear()
+                    await self._ready.wait()
+                frame = self.queue.popleft()
+                await asyncio.wait_for(self.websocket.send_text(frame), timeout)
+                self.sent += 1
+        except asyncio.TimeoutError:
+            self.manager.send_timeouts += 1
+            logger.warning("ws_send_timeout", user_id=self.user_id, timeout_sec=timeout)
+            await self._close_socket("Send timeout")
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            pass  # peer gone; the endpoint's receive loop sees the disconnect
+        finally:
+            self.closed = True
+            self.queue.clear()
+            self.manager._remove(self)
+
+    async def pull(self, timeout: float) -> list:
+        """Pulled connections: wait up to ``timeout`` for frames, take all queued"""
+        if not self.queue and not self.closed:
+            self._ready.clear()
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout)
+            except asyncio.TimeoutError:
+                return []
+        frames = list(self.queue)
+        self.queue.clear()
+        self.sent += len(frames)
+        return frames
+
+    def finish_replay(self, items: list, after_id: int, truncated: bool, marker: bool = True):
+        """Queue replayed ``(id, frame)`` pairs, then the live frames held meanwhile"""
+        self.replaying = False
+        for seq, frame in items:
+            self.queue.append(frame)
+        self.replayed_through = items[-1][0] if items else after_id
+        if marker:
+            self.queue.append(encode({
+                "type": "replay_complete",
+                "last_id": self.replayed_through,
+                "count": len(items),
+                "truncated": truncated
+            }))
+        self._ready.set()
+        held, self._held = self._held, []
+        for frame, seq in held:
+            self.enqueue(frame, seq)
+
+    def close(self, reason: str = "", code: int = SLOW_CONSUMER_CLOSE_CODE):
+        """Stop writing and close the socket (from the event loop thread)"""
+        if self.closed:
+            return
+        self.closed = True
+        if self.task is None:
+            self._ready.set()  # wake the puller, which ends the stream
+            return
+        self.task.cancel()
+        asyncio.get_running_loop().create_task(self._close_socket(reason, code))
+
+    async def _close_socket(self, reason: str, code: int = SLOW_CONSUMER_CLOSE_CODE):
+        try:
+            await asyncio.wait_for(
+                self.websocket.close(code=code, reason=reason),
+                settings.WS_SEND_TIMEOUT_SEC
+            )
+        except Exception:
+            pass
+
+    def stats(self) -> dict:
+        return {"user_id": self.user_id, "queued": len(self.queue), "sent": self.sent, "dropped": self.dropped}
 
 
 class ConnectionManager:
-    def __init__(self):
-        self.active_connections: Dict[int, Set[WebSocket]] = {}
+    def __init__(self, broker=None):
+        self.active_connections: Dict[int, Set[Connection]] = {}
+        self._by_socket: Dict[WebSocket, Connection] = {}
+        self.broker = broker or default_broker
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._subscribed = False
+        self._sweeper: Optional[asyncio.Task] = None
+        self.opened = 0
+        self.reaped = 0
+        self.pings_sent = 0
+        self.published = 0
+        self.forwarded = 0
+        self.dropped = 0
+        self.send_timeouts = 0
+        self.slow_disconnects = 0
+        self.by_reference = 0
+
+    def start(self):
+        """Bind to the running event loop and subscribe to the fan-out channel"""
+        self._loop = asyncio.get_running_loop()
+        if not self._subscribed:
+            self.broker.subscribe(CHANNEL, self._on_message)
+            self._subscribed = True
+        if settings.WS_PING_INTERVAL_SEC > 0 and self._sweeper is None:
+            self._sweeper = self._loop.create_task(self._sweep_forever())
+
+    def stop(self):
+        self._loop = None
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            self._sweeper = None
+        for connection in list(self._by_socket.values()):
+            if connection.task is not None:
+                connection.task.cancel()
+
+    async def _sweep_forever(self):
+        period = max(1.0, min(settings.WS_PING_INTERVAL_SEC, settings.WS_PING_TIMEOUT_SEC) / 2)
+        while True:
+            await asyncio.sleep(period)
+            try:
+                self.sweep()
+            except Exception as e:
+                logger.error("ws_sweep_failed", error=str(e))
+
+    def sweep(self):
+        """Ping quiet connections, close the ones that stopped answering"""
+        now = asyncio.get_running_loop().time()
+        interval = settings.WS_PING_INTERVAL_SEC
+        deadline = interval + settings.WS_PING_TIMEOUT_SEC
+        for connection in list(self._by_socket.values()):
+            if connection.task is None:
+                continue  # pulled: the stream sends its own heartbeats
+            silent = now - connection.last_seen
+            if silent >= deadline:
+                self.reaped += 1
+                logger.info("ws_connection_reaped", user_id=connection.user_id, silent_sec=round(silent, 1))
+                connection.close(reason="Heartbeat timeout", code=HEARTBEAT_CLOSE_CODE)
+                self._remove(connection)
+            elif silent >= interval and now - connection.last_ping >= interval:
+                connection.last_ping = now
+                connection.enqueue(PING_FRAME)
+                self.pings_sent += 1
+
+    def touch(self, websocket: WebSocket):
+        """Record that the client is alive (call on every received frame)"""
+        connection = self._by_socket.get(websocket)
+        if connection is not None:
+            connection.last_seen = asyncio.get_running_loop().time()
 
-    async def connect(self, websocket: WebSocket, user_id: int):
+    async def connect(self, websocket: WebSocket, user_id: int, replay: bool = False) -> Connection:
+        """Accept the socket; with ``replay`` live frames are held until finish_replay()"""
         await websocket.accept()
-        if user_id not in self.active_connections:
-            self.active_connections[user_id] = set()
-        self.active_connections[user_id].add(websocket)
+        return self._register(Connection(self, websocket, user_id), replay)
 
-    def disconnect(self, websocket: WebSocket, user_id: int):
-        if user_id in self.active_connections:
-            self.active_connections[user_id].discard(websocket)
-            if not self.active_connections[user_id]:
-                del self.active_connections[user_id]
+    def attach(self, user_id: int, replay: bool = False) -> Connection:
+        """Register a pulled connection (SSE, long-poll); disconnect(connection, ...) when done"""
+        return self._register(Connection(self, None, user_id), replay)
+
+    def _register(self, connection: Connection, replay: bool) -> Connection:
+        connection.replaying = replay
+        self.opened += 1
+        self._by_socket[connection.key] = connection
+        self.active_connections.setdefault(connection.user_id, set()).add(connection)
+        return connection
+
+    def disconnect(self, websocket, user_id: int):
+        """Drop a connection by its socket (or, for pulled ones, the Connection)"""
+        connection = self._by_socket.get(websocket)
+        if connection is not None:
+            connection.closed = True
+            if connection.task is not None:
+                connection.task.cancel()
+            self._remove(connection)
+
+    def _remove(self, connection: Connection):
+        self._by_socket.pop(connection.key, None)
+        connections = self.active_connections.get(connection.user_id)
+        if connections is not None:
+            connections.discard(connection)
+            if not connections:
+                del self.active_connections[connection.user_id]
+
+    def reply(self, websocket: WebSocket, text: str):
+        """Queue a frame for one socket (keeps all writes on its writer task)"""
+        connection = self._by_socket.get(websocket)
+        if connection is not None:
+            connection.enqueue(text)
 
     async def send_to_user(self, user_id: int, message: dict):
-        if user_id in self.active_connections:
-            disconnected = set()
-            for connection in self.active_connections[user_id]:
-                try:
-                    await connection.send_json(message)
-                except:
-                    disconnected.add(connection)
+        """Deliver to every socket of the user, on whichever process holds it"""
+        await self.send_to_many([user_id], message)
+
+    async def send_to_many(self, user_ids: Iterable[int], message: dict, seq: Optional[int] = None):
+        """Deliver one message to many users, serialized once.
 
-            for conn in disconnected:
-                self.disconnect(conn, user_id)
+        ``seq`` is the notification id, used to skip frames a reconnect
+        replay already delivered.
+        """
+        user_ids = list(dict.fromkeys(user_ids))
+        if user_ids:
+            self._publish_frame(encode(message), user_ids, seq)
+
+    async def broadcast(self, message: dict):
+        """Deliver one message to every connected user on every process"""
+        self._publish_frame(encode(message), None)
 
     async def send_notification(self, user_id: int, notification: dict):
         """Send notification to user via WebSocket"""
-        await self.send_to_user(user_id, notification)
+        await self.send_to_many([user_id], notification, seq=notification.get("id"))
+
+    async def send_shared(self, recipients: Iterable[Tuple[int, int]], body: dict):
+        """Deliver one notification body to ``(user_id, notification_id)`` recipients.
+
+        ``body`` is the notification message without its id; it is encoded
+        once and every frame equals ``encode({"id": notification_id, **body})``.
+        """
+        recipients = [[user_id, notification_id] for user_id, notification_id in recipients]
+        if not recipients:
+            return
+        tail = encode(body)[1:]
+        if self._loop is None:
+            self._enqueue_shared(tail, recipients)
+            return
+        budget = NOTIFY_MAX_BYTES - len(json.dumps(tail)) - ENVELOPE_OVERHEAD
+        widths = [len(json.dumps(recipient)) + 1 for recipient in recipients]
+        if budget < max(widths):
+            self._publish_refs(recipients)
+            return
+        # Split the recipients so each envelope fits in one NOTIFY payload
+        chunk, size = [], 0
+        for recipient, width in zip(recipients, widths):
+            if chunk and size + width > budget:
+                self.published += 1
+                self.broker.publish(CHANNEL, {"shared": tail, "to": chunk})
+                chunk, size = [], 0
+            chunk.append(recipient)
+            size += width
+        self.published += 1
+        self.broker.publish(CHANNEL, {"shared": tail, "to": chunk})
+
+    def _publish_refs(self, refs: List[list]):
+        """Publish ``[user_id, notification_id]`` pairs for frames too large for NOTIFY"""
+        if not refs:
+            return
+        self.by_reference += len(refs)
+        budget = NOTIFY_MAX_BYTES - ENVELOPE_OVERHEAD
+        batch, size = [], 0
+        for ref in refs:
+            width = len(json.dumps(ref)) + 1
+            if batch and size + width > budget:
+                self.published += 1
+                self.broker.publish(CHANNEL, {"refs": batch})
+                batch, size = [], 0
+            batch.append(ref)
+            size += width
+        self.published += 1
+        self.broker.publish(CHANNEL, {"refs": batch})
+
+    def _publish_frame(self, frame: str, user_ids: Optional[list], seq: Optional[int] = None):
+        if self._loop is None:
+            # Not started (scripts, app without lifespan): this process only
+            self._enqueue_local(user_ids, frame, seq)
+            return
+        if user_ids is None:
+            self.published += 1
+            self.broker.publish(CHANNEL, {"all": True, "frame": frame})
+            return
+        # Split the recipients so each envelope fits in one NOTIFY payload
+        budget = NOTIFY_MAX_BYTES - len(json.dumps(frame)) - ENVELOPE_OVERHEAD
+        if seq is not None and budget < len(json.dumps(user_ids[0])) + 1:
+            self._publish_refs([[user_id, seq] for user_id in user_ids])
+            return
+        chunk, size = [], 0
+        for user_id in user_ids:
+            width = len(str(user_id)) + 1
+            if chunk and size + width > budget:
+                self.published += 1
+                self.broker.publish(CHANNEL, {"user_ids": chunk, "frame": frame, "seq": seq})
+                chunk, size = [], 0
+            chunk.append(user_id)
+            size += width
+        self.published += 1
+        self.broker.publish(CHANNEL, {"user_ids": chunk, "frame": frame, "seq": seq})
+
+    def _on_message(self, envelope: dict):
+        """Broker callback (listener thread, or the publisher's own thread)"""
+        loop = self._loop
+        if loop is None or not self.active_connections:
+            return
+        if "shared" in envelope:
+            recipients = [recipient for recipient in envelope["to"] if recipient[0] in self.active_connections]
+            if recipients:
+                self.forwarded += 1
+                loop.call_soon_threadsafe(self._enqueue_shared, envelope["shared"], recipients)
+            return
+        if "refs" in envelope:
+            refs = [ref for ref in envelope["refs"] if ref[0] in self.active_connections]
+            if refs:
+                self.forwarded += 1
+                loop.call_soon_threadsafe(lambda: loop.create_task(self._deliver_refs(refs)))
+            return
+        if envelope.get("all"):
+            targets = None
+        else:
+            user_ids = envelope.get("user_ids") or ()
+            if len(user_ids) > len(self.active_connections):
+                targets = list(self.active_connections.keys() & set(user_ids))
+            else:
+                targets = [uid for uid in user_ids if uid in self.active_connections]
+            if not targets:
+                return
+        self.forwarded += 1
+        loop.call_soon_threadsafe(self._enqueue_local, targets, envelope["frame"], envelope.get("seq"))
+
+    def _enqueue_local(self, user_ids: Optional[list], frame: str, seq: Optional[int] = None):
+        if user_ids is None:
+            for connection in list(self._by_socket.values()):
+                connection.enqueue(frame)
+            return
+        for user_id in user_ids:
+            for connection in list(self.active_connections.get(user_id, ())):
+                connection.enqueue(frame, seq)
+
+    def _enqueue_shared(self, tail: str, recipients: list):
+        for user_id, seq in recipients:
+            connections = self.active_connections.get(user_id)
+            if connections:
+                frame = '{"id":%d,%s' % (seq, tail)
+                for connection in list(connections):
+                    connection.enqueue(frame, seq)
+
+    async def _deliver_refs(self, refs: List[list]):
+        """Load referenced notifications (a short session) and queue their frames"""
+        # Imported here: the notification service imports this module
+        from services.notification_service import AsyncNotificationService, NotificationService
+
+        wanted = {(user_id, notification_id) for user_id, notification_id in refs}
+        try:
+            async with asynccontextmanager(db_session.get_async_db)() as db:
+                rows = await AsyncNotificationService.list_by_ids(db, [ref[1] for ref in refs])
+        except SQLAlchemyError as e:
+            # The client still gets it from the REST list or a reconnect replay
+            logger.warning("ws_reference_load_failed", notifications=len(refs), error=str(e))
+            return
+        for row in rows:
+            if (row.user_id, row.id) in wanted:
+                for connection in list(self.active_connections.get(row.user_id, ())):
+                    connection.enqueue(encode(NotificationService.to_message(row)), row.id)
+
+    def stats(self) -> dict:
+        connections = list(self._by_socket.values())
+        depths = [len(c.queue) for c in connections]
+        worst = sorted(connections, key=lambda c: (len(c.queue), c.dropped), reverse=True)[:5]
+        return {
+            "pid": os.getpid(),
+            "users": len(self.active_connections),
+            "connections": len(connections),
+            "pulled": sum(1 for c in connections if c.task is None),
+            "opened": self.opened,
+            "reaped": self.reaped,
+            "pings_sent": self.pings_sent,
+            "published": self.published,
+            "forwarded": self.forwarded,
+            "by_reference": self.by_reference,
+            "queued": sum(depths),
+            "max_queue_depth": max(depths, default=0),
+            "queue_size": settings.WS_SEND_QUEUE_SIZE,
+            "slow_consumer_policy": settings.WS_SLOW_CONSUMER_POLICY,
+            "dropped": self.dropped,
+            "send_timeouts": self.send_timeouts,
+            "slow_disconnects": self.slow_disconnects,
+            "slowest": [c.stats() for c in worst if c.queue or c.dropped],
+        }
 
 
-manager = ConnectionManager()
\ No newline at end of file
+manager = ConnectionManager()
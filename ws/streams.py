@@ -0,0 +1,94 @@
+"""Notification delivery without a WebSocket: Server-Sent Events and long-poll.
+
+Both register a pulled Connection with the ConnectionManager, so they get
+exactly what a socket would: local and pub/sub deliveries, the queue limit
+and slow-consumer policy, and reconnect replay from the notifications
+table. Only the transport differs:
+
+* SSE keeps the response open; notifications carry ``id:`` so a browser
+  EventSource resumes by itself (Last-Event-ID), and a comment line every
+  SSE_HEARTBEAT_SEC keeps proxies from closing an idle stream.
+* Long-poll answers as soon as anything newer than ``after_id`` exists,
+  or with an empty list after the poll timeout, which doubles as the
+  heartbeat.
+
+Neither holds a database session while waiting: replay opens a short one.
+"""
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+
+from sqlalchemy.exc import SQLAlchemyError
+import structlog
+
+from core.config import settings
+from db import session as db_session
+from services.notification_service import NotificationService, AsyncNotificationService
+from ws.manager import Connection, encode, manager
+
+logger = structlog.get_logger()
+
+SSE_HEARTBEAT = b": heartbeat\n\n"
+
+
+async def replay_missed(connection: Connection, user_id: int, after_id: int, marker: bool = True):
+    """Queue the user's notifications newer than ``after_id``, then release live frames"""
+    items, truncated = [], False
+    try:
+        async with asynccontextmanager(db_session.get_async_db)() as db:
+            rows, truncated = await AsyncNotificationService.list_since(
+                db, user_id, after_id, settings.WS_REPLAY_LIMIT
+            )
+            items = [(row.id, encode(NotificationService.to_message(row))) for row in rows]
+    except SQLAlchemyError as e:
+        # Live delivery still works; the client can page the REST list
+        logger.warning("ws_replay_failed", user_id=user_id, error=str(e))
+        truncated = True
+    connection.finish_replay(items, after_id, truncated, marker)
+
+
+def frame_id(frame: str) -> Optional[int]:
+    """Notification id of a frame (NotificationService.to_message puts it first)"""
+    if not frame.startswith('{"id":'):
+        return None
+    try:
+        return int(frame[6:frame.index(",", 6)])
+    except ValueError:
+        return None
+
+
+async def sse_events(user_id: int, after_id: Optional[int]) -> AsyncIterator[bytes]:
+    """text/event-stream body: replay after ``after_id`` (if given), then live"""
+    connection = manager.attach(user_id, replay=after_id is not None)
+    logger.info("sse_connected", user_id=user_id, after_id=after_id)
+    try:
+        if after_id is not None:
+            await replay_missed(connection, user_id, after_id)
+        while True:
+            frames = await connection.pull(settings.SSE_HEARTBEAT_SEC)
+            if not frames:
+                if connection.closed:
+                    break  # slow consumer
+                yield SSE_HEARTBEAT
+                continue
+            chunk = []
+            for frame in frames:
+                seq = frame_id(frame)
+                chunk.append(f"id: {seq}\ndata: {frame}\n\n" if seq is not None else f"data: {frame}\n\n")
+            yield "".join(chunk).encode()
+    finally:
+        manager.disconnect(connection, user_id)
+        logger.info("sse_disconnected", user_id=user_id)
+
+
+async def long_poll(user_id: int, after_id: int, timeout: float) -> bytes:
+    """JSON body ``{"events": [...], "last_id": n}``; empty events after ``timeout``"""
+    connection = manager.attach(user_id, replay=True)
+    try:
+        await replay_missed(connection, user_id, after_id, marker=False)
+        frames = await connection.pull(timeout)
+    finally:
+        manager.disconnect(connection, user_id)
+    last_id = max((seq for seq in map(frame_id, frames) if seq is not None), default=after_id)
+    # Frames are already JSON text: splice them instead of decoding and re-encoding
+    return f'{{"events":[{",".join(frames)}],"last_id":{last_id}}}'.encode()